@@ -0,0 +1,87 @@
+"""Benchmark compiled add/filter expressions against evaluating them in SQLite.
+
+Usage:
+    python benchmarks/compiled_expressions.py [--rows 200000]
+
+Parses a generated CSV once, then times each expression both ways: loading
+the rows into SQLite and running the query, and converting the rows and
+calling the compiled Python closure. Results are checked to be identical.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from uplt.core import create_table_from_csv, parse_csv, infer_column_types  # noqa: E402
+from uplt.expressions import compile_condition, compile_expression, row_converter  # noqa: E402
+
+ADD = [
+    "price * qty",
+    "iif(substr(name, 1, 3) = 'abc', upper(name), lower(name))",
+    "CASE WHEN latency > 500 THEN 'slow' WHEN latency > 100 THEN 'ok' ELSE 'fast' END",
+]
+FILTER = [
+    "price * qty > 4000",
+    "name LIKE 'abc%' AND latency BETWEEN 50 AND 200",
+    "qty IN (1, 2, 3) OR price < 1",
+]
+
+
+def time_sqlite(csv_data, query):
+    start = time.perf_counter()
+    conn = sqlite3.connect(':memory:')
+    cursor = conn.cursor()
+    create_table_from_csv(cursor, csv_data, "data", "yes")
+    results = cursor.execute(query).fetchall()
+    conn.close()
+    return time.perf_counter() - start, results
+
+
+def time_compiled(csv_data, expr, add):
+    start = time.perf_counter()
+    headers, rows = parse_csv(csv_data, "yes")
+    types = infer_column_types(headers, rows)
+    convert = row_converter(types)
+    if add:
+        evaluate = compile_expression(expr, headers, types)
+        results = [convert(row) + (evaluate(row),) for row in rows]
+    else:
+        condition = compile_condition(expr, headers, types)
+        results = [convert(row) for row in rows if condition(row)]
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000, help="Number of input rows")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    lines = ["name,price,qty,latency"]
+    for _ in range(args.rows):
+        name = rng.choice(["abc", "xyz", "abd"]) + "".join(rng.choices("klmnopq", k=6))
+        lines.append(f"{name},{rng.uniform(0, 100):.2f},{rng.randrange(50)},"
+                     f"{rng.lognormvariate(4, 1):.2f}")
+    csv_data = "\n".join(lines)
+
+    print(f"{args.rows} rows")
+    print(f"{'':<8} {'sqlite':>8} {'compiled':>9}  expression")
+    for add, exprs in ((True, ADD), (False, FILTER)):
+        for expr in exprs:
+            if add:
+                query = f"SELECT *, {expr} FROM data"
+            else:
+                query = f"SELECT * FROM data WHERE {expr}"
+            sqlite_time, expected = time_sqlite(csv_data, query)
+            compiled_time, results = time_compiled(csv_data, expr, add)
+            assert results == expected, expr
+            print(f"{'add' if add else 'filter':<8} {sqlite_time:7.3f}s {compiled_time:8.3f}s  {expr}")
+
+
+if __name__ == "__main__":
+    main()
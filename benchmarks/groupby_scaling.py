@@ -0,0 +1,86 @@
+"""Benchmark groupby scaling across worker processes.
+
+Usage:
+    python benchmarks/groupby_scaling.py [--rows 1000000] [--groups 100000] [--jobs 1,2,4,8]
+
+Times the serial path (load the table, GROUP BY in one SQLite connection)
+against the partitioned path of `uplt --jobs N groupby`, starting from the
+same CSV text, and checks that both produce the same groups.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from uplt.aggregates import register_aggregates  # noqa: E402
+from uplt.core import create_table_from_csv, infer_column_types, parse_csv  # noqa: E402
+from uplt.partitioned import parallel_groupby  # noqa: E402
+
+AGGREGATES = ["avg(latency)", "count(*)", "max(latency)", "stddev(latency)"]
+
+
+def make_csv(rows, groups, seed):
+    rng = random.Random(seed)
+    lines = ["key,latency,tokens"]
+    for _ in range(rows):
+        lines.append(f"k{rng.randrange(groups)},{rng.lognormvariate(3, 1):.3f},{rng.randrange(4096)}")
+    return "\n".join(lines)
+
+
+def serial(csv_data):
+    conn = sqlite3.connect(':memory:')
+    register_aggregates(conn)
+    cursor = conn.cursor()
+    create_table_from_csv(cursor, csv_data, "data")
+    return cursor.execute(
+        f"SELECT key, {', '.join(AGGREGATES)} FROM data GROUP BY key ORDER BY key"
+    ).fetchall()
+
+
+def partitioned(csv_data, jobs):
+    conn = sqlite3.connect(':memory:')
+    register_aggregates(conn)
+    headers, rows = parse_csv(csv_data)
+    types = infer_column_types(headers, rows)
+    _, results = parallel_groupby(conn.cursor(), "data", headers, types, rows, [("key", None)],
+                                  [(expr, None) for expr in AGGREGATES], jobs)
+    return results
+
+
+def close(a, b):
+    return all(
+        x == y or (isinstance(x, float) and abs(x - y) <= 1e-9 * max(abs(x), abs(y)))
+        for row_a, row_b in zip(a, b) for x, y in zip(row_a, row_b)
+    ) and len(a) == len(b)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Number of input rows")
+    parser.add_argument("--groups", type=int, default=100_000, help="Number of distinct keys")
+    parser.add_argument("--jobs", default="1,2,4,8", help="Comma-separated worker counts")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    csv_data = make_csv(args.rows, args.groups, args.seed)
+    print(f"{args.rows} rows, {args.groups} groups, {os.cpu_count()} CPUs")
+
+    start = time.perf_counter()
+    expected = serial(csv_data)
+    baseline = time.perf_counter() - start
+    print(f"{'serial':<12} {baseline:8.3f}s")
+
+    for jobs in (int(j) for j in args.jobs.split(',')):
+        start = time.perf_counter()
+        results = partitioned(csv_data, jobs)
+        elapsed = time.perf_counter() - start
+        assert close(results, expected)
+        print(f"{f'--jobs {jobs}':<12} {elapsed:8.3f}s  {baseline / elapsed:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark the percentile aggregates against sorting-based implementations.
+
+Usage:
+    python benchmarks/percentiles.py [--values 10000000] [--groups 1] [--q 99]
+
+Times the selection used by uplt.aggregates (quickselect in pure Python,
+np.partition with NumPy) against sorting every group, over the same values.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from uplt import aggregates  # noqa: E402
+
+
+def sorted_percentile(values, q):
+    """Reference implementation: sort the group, then interpolate."""
+    ordered = sorted(values)
+    position = q / 100.0 * (len(ordered) - 1)
+    k = int(position)
+    upper = ordered[min(k + 1, len(ordered) - 1)]
+    return ordered[k] + (upper - ordered[k]) * (position - k)
+
+
+def timed(label, func, groups, q):
+    start = time.perf_counter()
+    results = [func(group, q) for group in groups]
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.3f}s")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--values", type=int, default=10_000_000, help="Total number of values")
+    parser.add_argument("--groups", type=int, default=1, help="Number of groups to split them into")
+    parser.add_argument("--q", type=float, default=99.0, help="Percentile to compute")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    per_group = args.values // args.groups
+    groups = [
+        array('d', (rng.lognormvariate(0, 1) for _ in range(per_group)))
+        for _ in range(args.groups)
+    ]
+    print(f"{args.groups} group(s) x {per_group} values, p{args.q:g}")
+
+    expected = timed("sorted()", sorted_percentile, groups, args.q)
+
+    numpy = aggregates._get_numpy()
+    aggregates._numpy = False
+    selected = timed("quickselect (pure Python)", aggregates.percentile_of, groups, args.q)
+    assert selected == expected
+
+    if numpy:
+        def numpy_sort(values, q):
+            ordered = numpy.sort(numpy.frombuffer(values, dtype=float))
+            position = q / 100.0 * (len(ordered) - 1)
+            k = int(position)
+            upper = ordered[min(k + 1, len(ordered) - 1)]
+            return float(ordered[k] + (upper - ordered[k]) * (position - k))
+
+        numpy_sorted = timed("np.sort", numpy_sort, groups, args.q)
+        aggregates._numpy = numpy
+        partitioned = timed("np.partition", aggregates.percentile_of, groups, args.q)
+        assert all(abs(a - b) <= 1e-9 * abs(b) for a, b in zip(partitioned, numpy_sorted))
+    else:
+        print("NumPy not installed; skipping np.sort / np.partition")
+
+
+if __name__ == "__main__":
+    main()
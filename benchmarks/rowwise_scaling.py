@@ -0,0 +1,66 @@
+"""Benchmark parallel add/filter over chunks of a file.
+
+Usage:
+    python benchmarks/rowwise_scaling.py [--rows 500000] [--jobs 1,2,4,8]
+
+Writes a CSV file, then times `uplt --input FILE --jobs N add EXPR` for an
+expensive nested substr/IIF/CASE expression and checks that every worker
+count produces the same output.
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+
+EXPRESSION = (
+    "iif(substr(name, 1, 3) = 'abc', upper(substr(name, 4, 5)), "
+    "CASE WHEN latency > 500 THEN 'slow' WHEN latency > 100 THEN 'ok' ELSE lower(name) END) AS tag, "
+    "round(latency * tokens / (tokens + 1.0), 2) AS weighted"
+)
+
+
+def run(path, jobs):
+    env = dict(os.environ, PYTHONPATH=SRC)
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-m", "uplt", "--input", path, "--jobs", str(jobs), "add", EXPRESSION],
+        capture_output=True, text=True, env=env, check=True
+    )
+    return time.perf_counter() - start, proc.stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000, help="Number of input rows")
+    parser.add_argument("--jobs", default="1,2,4,8", help="Comma-separated worker counts")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+        f.write("name,latency,tokens\n")
+        for _ in range(args.rows):
+            name = rng.choice(["abc", "xyz", "abd"]) + "".join(rng.choices("klmnopq", k=6))
+            f.write(f"{name},{rng.lognormvariate(4, 1):.2f},{rng.randrange(4096)}\n")
+        path = f.name
+
+    try:
+        print(f"{args.rows} rows, {os.cpu_count()} CPUs")
+        baseline, expected = None, None
+        for jobs in (int(j) for j in args.jobs.split(',')):
+            elapsed, output = run(path, jobs)
+            if expected is None:
+                baseline, expected = elapsed, output
+            assert output == expected
+            print(f"{f'--jobs {jobs}':<12} {elapsed:8.3f}s  {baseline / elapsed:5.2f}x")
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
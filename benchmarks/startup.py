@@ -0,0 +1,88 @@
+"""Measure uplt cold-start latency against bare interpreter startup.
+
+Usage:
+    python benchmarks/startup.py [--runs 30] [--top 15]
+
+Times complete invocations on a two-row input the way the console script
+runs them, and compares the median with `python -c pass`. Bytecode is cached
+in a temporary directory (as an installed package would have it) and warmed
+before timing. Then prints the slowest imports of `uplt q` from
+`python -X importtime`, by cumulative time.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# What the uplt console script does
+ENTRY = "import sys; from uplt.cli import main; sys.argv[0] = 'uplt'; main()"
+
+COMMANDS = [
+    ("bare interpreter", ["-c", "pass"]),
+    ("uplt q", ["-c", ENTRY, "q", "SELECT * FROM data"]),
+    ("uplt filter", ["-c", ENTRY, "filter", "b > 1"]),
+    ("uplt groupby", ["-c", ENTRY, "groupby", "a", "max(b)"]),
+    ("uplt describe", ["-c", ENTRY, "describe"]),
+]
+
+INPUT = "a,b\nx,1\ny,2\n"
+
+
+def run(argv, env, importtime=False):
+    flags = ["-X", "importtime"] if importtime else []
+    return subprocess.run([sys.executable] + flags + argv, input=INPUT, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def median_seconds(argv, env, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        run(argv, env)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def slowest_imports(argv, env, top):
+    """(cumulative us, self us, module) of the slowest imports, from -X importtime."""
+    imports = []
+    for line in run(argv, env, importtime=True).stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports.append((int(cumulative_us), int(self_us), name.rstrip()))
+    imports.sort(reverse=True)
+    return imports[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=30, help="Invocations timed per command")
+    parser.add_argument("--top", type=int, default=15, help="Number of imports listed")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache:
+        env = dict(os.environ, PYTHONPATH=SRC, PYTHONPYCACHEPREFIX=cache)
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        for _, argv in COMMANDS:
+            run(argv, env)  # warm the bytecode cache
+
+        bare = None
+        print(f"{'':<18} {'median':>8} {'x bare':>7}")
+        for name, argv in COMMANDS:
+            seconds = median_seconds(argv, env, args.runs)
+            bare = bare or seconds
+            print(f"{name:<18} {seconds * 1000:6.1f}ms {seconds / bare:6.2f}x")
+
+        print(f"\nSlowest imports of uplt q (cumulative / self):")
+        for cumulative_us, self_us, name in slowest_imports(COMMANDS[1][1], env, args.top):
+            print(f"{cumulative_us / 1000:7.2f}ms {self_us / 1000:6.2f}ms {name}")
+
+
+if __name__ == "__main__":
+    main()
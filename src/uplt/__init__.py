@@ -1,17 +1,18 @@
 __version__ = "0.3.1"
 
-from .core import (
-    detect_delimiter,
-    sanitize_column_name,
-    infer_column_type,
-    create_table_from_csv,
-    execute_query,
-    format_output,
-)
-from .query_builder import (
-    parse_aggregation,
-    parse_chart_command,
-)
+# Re-exports are resolved on first access, so `import uplt` (which every CLI
+# invocation does) doesn't load modules the command won't use
+_EXPORTS = {
+    "detect_delimiter": "core",
+    "sanitize_column_name": "core",
+    "infer_column_type": "core",
+    "create_table_from_csv": "core",
+    "execute_query": "core",
+    "format_output": "core",
+    "parse_aggregation": "query_builder",
+    "parse_chart_command": "query_builder",
+    "Session": "session",
+}
 
 __all__ = [
     "detect_delimiter",
@@ -22,4 +23,19 @@ __all__ = [
     "format_output",
     "parse_aggregation",
     "parse_chart_command",
+    "Session",
 ]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        import importlib
+        module = importlib.import_module(f".{_EXPORTS[name]}", __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,307 @@
+"""Extra SQL aggregate functions registered on uplt connections.
+
+SQLite has no percentile aggregates, so exact ones are provided here:
+
+    median(x)          50th percentile
+    p1(x) ... p99(x)   NNth percentile
+    percentile(x, q)   qth percentile, 0 <= q <= 100
+
+Percentiles interpolate linearly between the two nearest values (NumPy's
+default method). Values are found with a selection algorithm instead of
+sorting each group: np.partition when NumPy is installed, quickselect in
+pure Python otherwise.
+
+Sample variance and standard deviation are computed with Welford's
+online update:
+
+    variance(x)        sample variance (n - 1 denominator)
+    stddev(x)          square root of variance(x)
+
+Their partial state (count, mean, sum of squared deviations) can be saved
+per group with uplt_moments(x) and combined with uplt_merge_variance() or
+uplt_merge_stddev(), which lets them be merged across grouping levels and
+worker processes like sum and count.
+
+Bounded-memory approximations (approx_percentile, approx_count_distinct)
+live in uplt.sketches and are registered alongside these, as is the
+time_bucket() scalar function from uplt.timeparse.
+"""
+from __future__ import annotations
+
+import math
+import re
+import sqlite3
+import struct
+from array import array
+from functools import partial
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Optional, Sequence, Tuple
+
+# NumPy module once imported, False if it isn't installed; loaded on first use
+# so registering the aggregates doesn't slow down startup
+_numpy = None
+
+# Groups this small are cheaper to sort than to partition in Python
+_SORT_THRESHOLD = 1024
+
+# Percentile shortcuts registered as pNN functions
+PERCENTILE_SHORTCUTS = range(1, 100)
+
+_SHORTCUT_PATTERN = re.compile(r'^p([1-9][0-9]?)$', re.IGNORECASE)
+
+
+def shortcut_percentile(name: str) -> Optional[float]:
+    """
+    Percentile of a median/pNN aggregate name, or None for other names.
+
+    Examples:
+        "median" -> 50.0
+        "p99" -> 99.0
+        "avg" -> None
+    """
+    if name.lower() == 'median':
+        return 50.0
+    match = _SHORTCUT_PATTERN.match(name)
+    if match:
+        return float(match.group(1))
+    return None
+
+
+def _get_numpy():
+    """Import NumPy on first use, returning None when it isn't installed."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+def _select_pair(values: Sequence[float], k: int) -> Tuple[float, float]:
+    """
+    Return the kth and (k+1)th smallest values (0-based) with quickselect.
+
+    The second value equals the first when k is the last index.
+    """
+    import random
+    
+    rng = random.Random(len(values))
+    values = list(values)
+    while len(values) > _SORT_THRESHOLD:
+        # Median of three random elements keeps partitions balanced
+        pivot = sorted(rng.sample(values, 3))[1]
+        lows = [v for v in values if v < pivot]
+        if k < len(lows):
+            if k == len(lows) - 1:
+                return max(lows), pivot
+            values = lows
+            continue
+        highs = [v for v in values if v > pivot]
+        equal = len(values) - len(lows) - len(highs)
+        if k < len(lows) + equal:
+            if k + 1 < len(lows) + equal or not highs:
+                return pivot, pivot
+            return pivot, min(highs)
+        k -= len(lows) + equal
+        values = highs
+
+    ordered = sorted(values)
+    return ordered[k], ordered[min(k + 1, len(ordered) - 1)]
+
+
+def percentile_of(values: Sequence[float], q: float) -> Optional[float]:
+    """
+    Exact qth percentile (0-100) of the values with linear interpolation.
+
+    Returns:
+        The percentile, or None when there are no values
+    """
+    count = len(values)
+    if not count:
+        return None
+    position = q / 100.0 * (count - 1)
+    k = int(position)
+    fraction = position - k
+
+    np = _get_numpy()
+    if np is not None:
+        if isinstance(values, array):
+            data = np.frombuffer(values, dtype=float)
+        else:
+            data = np.asarray(values, dtype=float)
+        kth = [k, k + 1] if k + 1 < count else [k]
+        partitioned = np.partition(data, kth)
+        lower = float(partitioned[k])
+        upper = float(partitioned[kth[-1]])
+    else:
+        lower, upper = _select_pair(values, k)
+
+    if fraction == 0:
+        return lower
+    return lower + (upper - lower) * fraction
+
+
+class _PercentileAggregate:
+    """Collect the numeric values of a group as doubles; NULL and NaN are ignored."""
+
+    q: Optional[float] = None
+
+    def __init__(self):
+        self.values = array('d')
+
+    def add(self, value):
+        if value is None:
+            return
+        try:
+            self.values.append(value)
+        except TypeError:
+            # Text that looks numeric counts; anything else is skipped
+            try:
+                self.values.append(float(value))
+            except (TypeError, ValueError):
+                return
+        if self.values[-1] != self.values[-1]:
+            self.values.pop()
+
+    def finalize(self):
+        return percentile_of(self.values, self.q)
+
+
+class _FixedPercentile(_PercentileAggregate):
+    def __init__(self, q: float):
+        super().__init__()
+        self.q = q
+
+    def step(self, value):
+        self.add(value)
+
+
+def _fixed_percentile(q: float):
+    """Aggregate factory for a percentile known at registration time."""
+    # A partial instead of a class per percentile: registering p1..p99 stays cheap
+    return partial(_FixedPercentile, q)
+
+
+class _Percentile(_PercentileAggregate):
+    """percentile(x, q) with q taken from the first row of the group."""
+
+    def step(self, value, q):
+        if self.q is None:
+            q = float(q)
+            if not 0 <= q <= 100:
+                raise ValueError(f"percentile must be between 0 and 100, got {q:g}")
+            self.q = q
+        self.add(value)
+
+    def finalize(self):
+        if self.q is None:
+            return None
+        return super().finalize()
+
+
+def _as_number(value) -> Optional[float]:
+    """Numeric value of an SQL value, or None for NULL, NaN and non-numeric text."""
+    if value is None:
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number == number else None
+
+
+# Packed (count, mean, m2) state of uplt_moments
+_MOMENTS = struct.Struct('<qdd')
+
+
+class _Moments:
+    """Count, mean and sum of squared deviations of the numeric values of a group."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value):
+        number = _as_number(value)
+        if number is None:
+            return
+        # Welford's online update
+        self.count += 1
+        delta = number - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (number - self.mean)
+
+    def merge(self, state: bytes):
+        count, mean, m2 = _MOMENTS.unpack(state)
+        if not count:
+            return
+        # Chan et al. pairwise combination
+        total = self.count + count
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.mean += delta * count / total
+        self.count = total
+
+    def variance(self) -> Optional[float]:
+        return self.m2 / (self.count - 1) if self.count > 1 else None
+
+    def stddev(self) -> Optional[float]:
+        variance = self.variance()
+        return None if variance is None else math.sqrt(variance)
+
+
+class _Variance(_Moments):
+    def step(self, value):
+        self.add(value)
+
+    def finalize(self):
+        return self.variance()
+
+
+class _StdDev(_Variance):
+    def finalize(self):
+        return self.stddev()
+
+
+class _MomentsState(_Variance):
+    """uplt_moments(x): partial state for uplt_merge_variance/uplt_merge_stddev."""
+
+    def finalize(self):
+        return _MOMENTS.pack(self.count, self.mean, self.m2)
+
+
+class _MergeVariance(_Moments):
+    def step(self, state):
+        if state is not None:
+            self.merge(state)
+
+    def finalize(self):
+        return self.variance()
+
+
+class _MergeStdDev(_MergeVariance):
+    def finalize(self):
+        return self.stddev()
+
+
+def register_aggregates(conn: sqlite3.Connection):
+    """Register the percentile, variance and approximate sketch aggregates on a connection."""
+    from .sketches import register_sketches
+    from .timeparse import register_time_functions
+
+    register_sketches(conn)
+    register_time_functions(conn)
+    conn.create_aggregate("median", 1, _fixed_percentile(50.0))
+    for n in PERCENTILE_SHORTCUTS:
+        conn.create_aggregate(f"p{n}", 1, _fixed_percentile(float(n)))
+    conn.create_aggregate("percentile", 2, _Percentile)
+    conn.create_aggregate("variance", 1, _Variance)
+    conn.create_aggregate("stddev", 1, _StdDev)
+    conn.create_aggregate("uplt_moments", 1, _MomentsState)
+    conn.create_aggregate("uplt_merge_variance", 1, _MergeVariance)
+    conn.create_aggregate("uplt_merge_stddev", 1, _MergeStdDev)
@@ -0,0 +1,134 @@
+"""Stored baseline snapshots for comparison charts.
+
+A snapshot keeps the per-metric aggregates of one version (value, count, sum
+and sum of squares for each value field) in a small SQLite file. Later runs
+compare fresh input against it without re-reading the raw reference rows.
+"""
+import json
+import os
+import sqlite3
+import time
+from typing import List
+
+# Directory for named snapshots, relative to the working directory unless absolute
+DEFAULT_BASELINE_DIR = os.path.join(".uplt", "baselines")
+
+# Bumped when the snapshot layout changes
+SNAPSHOT_FORMAT = 1
+
+_SCHEMA = "uplt_baseline"
+
+
+def baseline_path(name: str) -> str:
+    """
+    Resolve a baseline name to its snapshot file.
+
+    Names containing a path separator or ending in .db are used as paths;
+    other names are stored as NAME.db in $UPLT_BASELINE_DIR (default .uplt/baselines).
+    """
+    if os.sep in name or (os.altsep and os.altsep in name) or name.endswith(".db"):
+        return name
+    directory = os.environ.get("UPLT_BASELINE_DIR", DEFAULT_BASELINE_DIR)
+    return os.path.join(directory, f"{name}.db")
+
+
+def _snapshot_columns(labels: List[str]) -> List[str]:
+    """Columns stored for each value field, in order."""
+    return [
+        f"{name}_{index}"
+        for index in range(len(labels))
+        for name in ("value", "n", "total", "total_sq")
+    ]
+
+
+def _detach(cursor: sqlite3.Cursor):
+    """Detach the snapshot database; this is only possible outside a transaction."""
+    if cursor.connection.in_transaction:
+        cursor.connection.commit()
+    cursor.execute(f"DETACH DATABASE {_SCHEMA}")
+
+
+def save_baseline(cursor: sqlite3.Cursor, name: str, aggregates: str, version,
+                  labels: List[str]) -> int:
+    """
+    Save the aggregates of one version as a named snapshot, replacing any previous one.
+
+    Args:
+        cursor: Database cursor
+        name: Baseline name or snapshot path
+        aggregates: Table with metric, version and value_i/n_i/total_i/total_sq_i columns
+        version: Version whose aggregates are saved
+        labels: Value field expressions, stored to check later comparisons
+
+    Returns:
+        Number of metrics saved
+    """
+    path = baseline_path(name)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    columns = ", ".join(_snapshot_columns(labels))
+    cursor.execute(f"ATTACH DATABASE ? AS {_SCHEMA}", (path,))
+    try:
+        cursor.execute(f"DROP TABLE IF EXISTS {_SCHEMA}.aggregates")
+        cursor.execute(f"DROP TABLE IF EXISTS {_SCHEMA}.meta")
+        cursor.execute(
+            f"CREATE TABLE {_SCHEMA}.aggregates AS "
+            f"SELECT metric, {columns} FROM {aggregates} WHERE version = ?",
+            (version,)
+        )
+        cursor.execute(f"CREATE TABLE {_SCHEMA}.meta (key TEXT PRIMARY KEY, value TEXT)")
+        cursor.executemany(f"INSERT INTO {_SCHEMA}.meta VALUES (?, ?)", [
+            ("format", str(SNAPSHOT_FORMAT)),
+            ("values", json.dumps(labels)),
+            ("version", str(version)),
+            ("created", time.strftime("%Y-%m-%dT%H:%M:%S%z")),
+        ])
+        cursor.connection.commit()
+        cursor.execute(f"SELECT COUNT(*) FROM {_SCHEMA}.aggregates")
+        return cursor.fetchone()[0]
+    finally:
+        _detach(cursor)
+
+
+def load_baseline(cursor: sqlite3.Cursor, name: str, aggregates: str, labels: List[str]) -> int:
+    """
+    Add a named snapshot to an aggregates table as version `name`.
+
+    Raises:
+        ValueError: If the snapshot doesn't exist or was saved for other value fields
+
+    Returns:
+        Number of metrics loaded
+    """
+    path = baseline_path(name)
+    if not os.path.exists(path):
+        raise ValueError(f"Baseline '{name}' not found at {path}. Save it first with --save-baseline")
+
+    cursor.execute(f"ATTACH DATABASE ? AS {_SCHEMA}", (path,))
+    try:
+        try:
+            cursor.execute(f"SELECT key, value FROM {_SCHEMA}.meta")
+            meta = dict(cursor.fetchall())
+        except sqlite3.Error:
+            raise ValueError(f"{path} is not a uplt baseline snapshot")
+        if meta.get("format") != str(SNAPSHOT_FORMAT):
+            raise ValueError(f"Unsupported baseline snapshot format in {path}")
+
+        saved_labels = json.loads(meta["values"])
+        if saved_labels != labels:
+            raise ValueError(
+                f"Baseline '{name}' was saved for values {', '.join(saved_labels)}; "
+                f"got {', '.join(labels)}"
+            )
+
+        columns = ", ".join(_snapshot_columns(labels))
+        cursor.execute(
+            f"INSERT INTO {aggregates} (metric, version, {columns}) "
+            f"SELECT metric, ?, {columns} FROM {_SCHEMA}.aggregates",
+            (name,)
+        )
+        return cursor.rowcount
+    finally:
+        _detach(cursor)
@@ -0,0 +1,231 @@
+"""Batches: several commands run in sequence over one load of the input.
+
+    uplt -i results.csv run report.uplt
+    uplt -i results.csv q "SELECT count(*) FROM data" ';;' groupby model avg
+
+A script holds one command per line, written as on the command line
+without the leading `uplt`. Words are split as by the shell, `#` starts a
+comment, a trailing backslash continues the line and `;;` separates several
+commands on one line:
+
+    # Slow runs, kept as a table for the next commands
+    filter "latency > 100" --into slow
+    groupby model "count(*), p99(latency)" -t slow > slow_by_model.csv
+    cmp model metric "avg(latency)" -m value
+
+`> FILE` writes a command's output to FILE. When more than one command
+prints to stdout, each output is preceded by a `==> command <==` label.
+
+The input is loaded once, with the load options of the `uplt` command line
+(--delimiter, --header/--no-header, --parse-times, --dict-encode,
+--numeric-threshold, --table-name). Other options given there, or with the
+first command of a `;;` list, apply to every command unless it sets its own.
+add and filter with --into NAME store their rows as table NAME instead of
+printing them; they are temporary tables, so this works on a read-only --db.
+describe, top and --presorted groupby read the input itself. The batch stops
+at the first command that fails.
+"""
+import argparse
+import io
+import shlex
+import sqlite3
+import sys
+
+from .aggregates import register_aggregates
+from .cli import (
+    LOAD_OPTIONS,
+    check_options,
+    get_header_mode,
+    is_streaming,
+    load_table,
+    run_command,
+    save_table,
+    streaming_command,
+)
+from .core import parse_field_with_alias, split_expressions
+
+SEPARATOR = ';;'
+
+
+def split_commands(tokens):
+    """Split a token list at ';;' separators."""
+    commands = [[]]
+    for token in tokens:
+        if token == SEPARATOR:
+            commands.append([])
+        else:
+            commands[-1].append(token)
+    return commands
+
+
+def parse_script(text: str):
+    """Token lists of the commands of a script."""
+    commands = []
+    logical = ''
+    for line in text.splitlines():
+        if line.endswith('\\'):
+            logical += line[:-1] + ' '
+            continue
+        logical += line
+        tokens = shlex.split(logical, comments=True)
+        logical = ''
+        commands.extend(command for command in split_commands(tokens) if command)
+    if logical.strip():
+        commands.extend(command for command in split_commands(shlex.split(logical, comments=True))
+                        if command)
+    return commands
+
+
+class Step:
+    """One command of a batch: its label, parsed arguments and output file."""
+
+    def __init__(self, parser: argparse.ArgumentParser, base, tokens):
+        self.output = None
+        if '>' in tokens:
+            index = tokens.index('>')
+            if index + 1 >= len(tokens):
+                raise ValueError(f"Missing file name after '>' in: {shlex.join(tokens)}")
+            self.output = tokens[index + 1]
+            tokens = tokens[:index] + tokens[index + 2:]
+        namespace = argparse.Namespace(**vars(base))
+        namespace.into = None
+        self.args = parser.parse_intermixed_args(tokens, namespace=namespace)
+        # Options before the command, such as --input, are left out of the label
+        if self.args.command and self.args.command[0] in tokens:
+            tokens = tokens[tokens.index(self.args.command[0]):]
+        self.label = shlex.join(tokens)
+        for option in LOAD_OPTIONS:
+            setattr(self.args, option, getattr(base, option))
+
+        if not self.args.command or self.args.command[0] in ("run", "serve"):
+            raise ValueError(f"Not a command for a batch: {self.label or '(empty)'}")
+        if self.args.into and self.args.command[0] not in ("add", "a", "filter", "f"):
+            raise ValueError(f"--into only applies to add and filter: {self.label}")
+        check_options(self.args)
+        # Whether the command's output goes to stdout
+        self.prints = self.output is None and not self.args.into
+
+
+def store_rows(args, cursor: sqlite3.Cursor, headers, timestamps):
+    """
+    Store the rows of an add or filter command as table args.into.
+
+    Returns:
+        (headers, timestamps, dictionaries) of the new table; epoch seconds
+        stay epoch seconds, and added time expressions count as timestamps
+    """
+    from .query_builder import added_column_names
+    from .timeparse import SECONDS_FORMAT, convert_time_literals, is_time_expression
+
+    if len(args.command) < 2:
+        raise ValueError(f"Expression required after '{args.command[0]}'")
+    expr = convert_time_literals(args.command[1], timestamps)
+    new_timestamps = dict(timestamps) if timestamps is not None else None
+    if args.command[0] in ("add", "a"):
+        names = added_column_names(expr, headers)
+        fields = []
+        for field, name in zip(split_expressions(expr), names):
+            field_expr = parse_field_with_alias(field)[0]
+            fields.append(f"{field_expr} AS {name}")
+            if new_timestamps is not None and is_time_expression(field_expr, timestamps):
+                new_timestamps[name] = timestamps.get(field_expr.strip(), SECONDS_FORMAT)
+        query = f"SELECT *, {', '.join(fields)} FROM {args.table_name}"
+        new_headers = headers + names
+    else:
+        query = f"SELECT * FROM {args.table_name} WHERE {expr}"
+        new_headers = list(headers)
+    if args.verbose:
+        print(f"Generated query: CREATE TEMP TABLE {args.into} AS {query}", file=sys.stderr)
+    try:
+        cursor.execute(f"CREATE TEMP TABLE {args.into} AS {query}")
+    except sqlite3.Error as e:
+        raise ValueError(f"SQL Error: {e}")
+    # Dictionary codes stay behind in the source table; the new one holds the values
+    return new_headers, new_timestamps, None
+
+
+def run_batch(parser: argparse.ArgumentParser, args, segments):
+    """Load the input once and run the commands of a script or a ';;' list."""
+    if args.command[0] == "run":
+        if len(args.command) != 2 or len(segments) > 1:
+            print("Error: run takes one script file", file=sys.stderr)
+            sys.exit(1)
+        with open(args.command[1]) as script:
+            commands = parse_script(script.read())
+    else:
+        commands = segments
+    steps = [Step(parser, args, tokens) for tokens in commands]
+    if not steps:
+        print("Error: No commands to run", file=sys.stderr)
+        sys.exit(1)
+
+    header_mode = get_header_mode(args)
+    if args.db:
+        from .database import open_database
+        conn, *table = open_database(args.db, args.table_name)
+        csv_data = None
+    else:
+        if not args.input and sys.stdin.isatty():
+            print("Error: No input data. Please pipe CSV data to this script.", file=sys.stderr)
+            sys.exit(1)
+        source = open(args.input, newline='') if args.input else sys.stdin
+        with source:
+            csv_data = source.read().strip()
+        if not csv_data:
+            print("Error: No input data received.", file=sys.stderr)
+            sys.exit(1)
+
+        conn = sqlite3.connect(':memory:')
+        register_aggregates(conn)
+        table = load_table(args, conn.cursor(), csv_data, header_mode)
+        if args.save_db:
+            save_table(args, conn, *table)
+    cursor = conn.cursor()
+    tables = {args.table_name.lower(): tuple(table)}
+
+    labeled = sum(step.prints for step in steps) > 1
+    first_label = True
+    for number, step in enumerate(steps, 1):
+        if labeled and step.prints:
+            if not first_label:
+                print()
+            print(f"==> {step.label} <==")
+            first_label = False
+        stdout = sys.stdout
+        try:
+            if step.output is not None:
+                sys.stdout = open(step.output, 'w', newline='')
+            run_step(step.args, cursor, csv_data, header_mode, tables)
+        except SystemExit as e:
+            if e.code:
+                print(f"Batch stopped at command {number}: {step.label}", file=sys.stderr)
+                raise
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            print(f"Batch stopped at command {number}: {step.label}", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            if sys.stdout is not stdout:
+                sys.stdout.close()
+                sys.stdout = stdout
+    conn.close()
+
+
+def run_step(args, cursor: sqlite3.Cursor, csv_data: str, header_mode: str, tables):
+    """Run one command of a batch against the loaded tables."""
+    if is_streaming(args):
+        if csv_data is None:
+            raise ValueError("describe, top and --presorted read CSV input; "
+                             "they can't be used with --db")
+        streaming_command(args, io.StringIO(csv_data), header_mode)
+        return
+    table = tables.get(args.table_name.lower())
+    if table is None:
+        raise ValueError(f"Table '{args.table_name}' doesn't exist (tables: "
+                         f"{', '.join(tables)})")
+    if args.into:
+        if args.into.lower() in tables:
+            raise ValueError(f"Table '{args.into}' already exists")
+        tables[args.into.lower()] = store_rows(args, cursor, *table[:2])
+        return
+    run_command(args, cursor, *table)
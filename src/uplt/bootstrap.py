@@ -0,0 +1,222 @@
+"""Bootstrap confidence intervals for comparison charts.
+
+Resampling is vectorized with NumPy when it is installed and falls back to
+pure Python otherwise. Seeds are derived from the metric name, so results
+don't depend on how metrics are spread across worker processes.
+"""
+import math
+import random
+import statistics
+import zlib
+from typing import Any, Deque, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when NumPy is absent
+    np = None
+
+DEFAULT_RESAMPLES = 1000
+
+# Upper bound on resample matrix size (resamples x samples) per NumPy batch
+_MAX_BATCH_ELEMENTS = 1_000_000
+
+# Number of metrics sent to a worker process at a time
+_METRICS_PER_TASK = 32
+
+# Per-metric input: (seed key, baseline samples, [comparison samples, ...])
+BootstrapTask = Tuple[str, Sequence[float], List[Sequence[float]]]
+Interval = Optional[Tuple[float, float]]
+
+_PYTHON_STATISTICS = {
+    'avg': lambda values: sum(values) / len(values),
+    'sum': sum,
+    'min': min,
+    'max': max,
+    'median': statistics.median,
+}
+
+_NUMPY_STATISTICS = {
+    'avg': 'mean',
+    'sum': 'sum',
+    'min': 'min',
+    'max': 'max',
+    'median': 'median',
+}
+
+
+def parse_ci_spec(spec: str) -> int:
+    """
+    Parse a confidence interval method specification.
+
+    Examples:
+        "bootstrap" -> 1000
+        "bootstrap:10000" -> 10000
+
+    Returns:
+        Number of bootstrap resamples
+    """
+    method, _, count = spec.strip().partition(':')
+    if method.lower() != 'bootstrap':
+        raise ValueError(f"Unknown confidence interval method: {method}. Valid methods: bootstrap")
+    if not count:
+        return DEFAULT_RESAMPLES
+    try:
+        resamples = int(count)
+    except ValueError:
+        raise ValueError(f"Invalid number of bootstrap resamples: {count}")
+    if resamples < 1:
+        raise ValueError(f"Invalid number of bootstrap resamples: {count}")
+    return resamples
+
+
+def supports_statistic(statistic: str) -> bool:
+    """Check whether the bootstrap can resample the given aggregation."""
+    return statistic in _PYTHON_STATISTICS
+
+
+def parse_samples(concatenated: Optional[str]) -> List[float]:
+    """Parse values collected with group_concat, skipping non-numeric ones."""
+    samples = []
+    if concatenated is None:
+        return samples
+    for token in str(concatenated).split(','):
+        try:
+            samples.append(float(token))
+        except ValueError:
+            continue
+    return samples
+
+
+def seed_for(key: str, seed: int) -> int:
+    """Derive a stable per-metric seed independent of worker assignment."""
+    return zlib.crc32(f"{seed}:{key}".encode('utf-8'))
+
+
+def _quantile(sorted_values: Sequence[float], q: float) -> float:
+    """Quantile with linear interpolation (NumPy's default method)."""
+    position = q * (len(sorted_values) - 1)
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = position - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+def _numpy_resample(rng, values: Sequence[float], statistic: str, resamples: int):
+    """Statistic of `resamples` bootstrap samples, vectorized in batches."""
+    data = np.asarray(values, dtype=float)
+    size = data.size
+    reduce = getattr(np, _NUMPY_STATISTICS[statistic])
+    result = np.empty(resamples)
+    batch = max(1, _MAX_BATCH_ELEMENTS // size)
+    for start in range(0, resamples, batch):
+        stop = min(start + batch, resamples)
+        indices = rng.integers(0, size, size=(stop - start, size))
+        result[start:stop] = reduce(data[indices], axis=1)
+    return result
+
+
+def _python_resample(rng: random.Random, values: Sequence[float], statistic: str,
+                     resamples: int) -> List[float]:
+    """Statistic of `resamples` bootstrap samples in pure Python."""
+    reduce = _PYTHON_STATISTICS[statistic]
+    size = len(values)
+    result: List[float] = []
+    batch = max(1, _MAX_BATCH_ELEMENTS // size)
+    # Drawing many resamples per choices() call is much cheaper than one per call
+    for start in range(0, resamples, batch):
+        count = min(batch, resamples - start)
+        draws = rng.choices(values, k=size * count)
+        result.extend(reduce(draws[i:i + size]) for i in range(0, size * count, size))
+    return result
+
+
+def bootstrap_diff_intervals(
+    task: BootstrapTask,
+    statistic: str = 'avg',
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = 0.95,
+    seed: int = 0
+) -> List[Interval]:
+    """
+    Percentile bootstrap intervals for statistic(comparison) - statistic(baseline).
+
+    Returns:
+        One (low, high) interval per comparison sample, or None where either
+        side has no samples
+    """
+    key, baseline_samples, comparison_samples = task
+    tail = (1 - confidence) / 2
+    intervals: List[Interval] = []
+    if not baseline_samples:
+        return [None] * len(comparison_samples)
+
+    if np is not None:
+        rng = np.random.default_rng(seed_for(key, seed))
+        baseline_stats = _numpy_resample(rng, baseline_samples, statistic, resamples)
+        for samples in comparison_samples:
+            if not samples:
+                intervals.append(None)
+                continue
+            diffs = _numpy_resample(rng, samples, statistic, resamples) - baseline_stats
+            low, high = np.quantile(diffs, [tail, 1 - tail])
+            intervals.append((float(low), float(high)))
+        return intervals
+
+    rng = random.Random(seed_for(key, seed))
+    baseline_stats = _python_resample(rng, baseline_samples, statistic, resamples)
+    for samples in comparison_samples:
+        if not samples:
+            intervals.append(None)
+            continue
+        comp_stats = _python_resample(rng, samples, statistic, resamples)
+        diffs = sorted(c - b for c, b in zip(comp_stats, baseline_stats))
+        intervals.append((_quantile(diffs, tail), _quantile(diffs, 1 - tail)))
+    return intervals
+
+
+def _bootstrap_batch(args: Tuple[List[BootstrapTask], str, int, float, int]) -> List[List[Interval]]:
+    """Worker entry point: bootstrap a batch of metrics."""
+    tasks, statistic, resamples, confidence, seed = args
+    return [bootstrap_diff_intervals(task, statistic, resamples, confidence, seed)
+            for task in tasks]
+
+
+def attach_intervals(
+    items: Iterable[Tuple[Any, BootstrapTask]],
+    statistic: str = 'avg',
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = 0.95,
+    seed: int = 0,
+    jobs: int = 1
+) -> Iterator[Tuple[Any, List[Interval]]]:
+    """
+    Compute bootstrap intervals for a stream of metrics, preserving order.
+
+    Args:
+        items: Iterable of (payload, task) pairs; payload is passed through
+        statistic: Aggregation to resample (avg, sum, min, max, median)
+        resamples: Number of bootstrap resamples per version
+        confidence: Confidence level of the intervals
+        seed: Base seed for the random number generators
+        jobs: Number of worker processes
+
+    Yields:
+        (payload, intervals) pairs in input order
+    """
+    import collections
+    import itertools
+    from .parallel import ordered_map
+
+    payloads: Deque[List[Any]] = collections.deque()
+
+    def batches():
+        items_iter = iter(items)
+        while True:
+            batch = list(itertools.islice(items_iter, _METRICS_PER_TASK))
+            if not batch:
+                return
+            payloads.append([payload for payload, _ in batch])
+            yield [task for _, task in batch], statistic, resamples, confidence, seed
+
+    for results in ordered_map(_bootstrap_batch, batches(), jobs=jobs):
+        yield from zip(payloads.popleft(), results)
@@ -1,6 +1,6 @@
 """Terminal chart plotting using Unicode characters."""
 # Re-export all chart functions from the submodules
 from .charts.heatmap import create_heatmap
-from .charts.multi_comparison import create_multi_comparison
+from .charts.multi_comparison import create_multi_comparison, iter_multi_comparison
 
-__all__ = ['create_heatmap', 'create_multi_comparison']
\ No newline at end of file
+__all__ = ['create_heatmap', 'create_multi_comparison', 'iter_multi_comparison']
\ No newline at end of file
@@ -1,5 +1,5 @@
 """Chart modules for uplt."""
 from .heatmap import create_heatmap
-from .multi_comparison import create_multi_comparison
+from .multi_comparison import create_multi_comparison, iter_multi_comparison
 
-__all__ = ['create_heatmap', 'create_multi_comparison']
\ No newline at end of file
+__all__ = ['create_heatmap', 'create_multi_comparison', 'iter_multi_comparison']
\ No newline at end of file
@@ -1,6 +1,11 @@
 """Display mode configuration for comparison charts."""
+from __future__ import annotations
+
 from enum import Enum, auto
-from typing import Optional, Tuple
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Optional, Tuple
 
 
 class DisplayMode(Enum):
@@ -61,6 +66,22 @@ class DisplayMode(Enum):
         else:  # FULL
             return f"{diff:+.6g} ({pct_diff:+.1f}%)"
 
+    def format_half_width(self, half_width: float, baseline: float) -> str:
+        """Format a confidence interval half-width in the same units as the difference."""
+        if self in (DisplayMode.PERCENT, DisplayMode.COMPACT, DisplayMode.VALUE_PERCENT):
+            if baseline == 0:
+                return "±inf%"
+            return f"±{abs(half_width / baseline) * 100:.1f}%"
+        return f"±{half_width:.3g}"
+
+    def format_interval(self, low: float, high: float, baseline: float) -> str:
+        """Format a confidence interval for the difference in the same units as the difference."""
+        if self in (DisplayMode.PERCENT, DisplayMode.COMPACT, DisplayMode.VALUE_PERCENT):
+            if baseline == 0:
+                return "[inf%]"
+            return f"[{low / abs(baseline) * 100:+.1f}%, {high / abs(baseline) * 100:+.1f}%]"
+        return f"[{low:+.3g}, {high:+.3g}]"
+
     def should_show_value_in_diff_column(self) -> bool:
         """Check if the mode includes raw values in difference columns."""
         return self in (DisplayMode.VALUE, DisplayMode.VALUE_DIFF, DisplayMode.VALUE_PERCENT)
@@ -1,9 +1,15 @@
 """Heatmap chart implementation."""
+from __future__ import annotations
+
 import sqlite3
 import sys
-from typing import List, Tuple, Optional, Union
 
 from .utils import is_numeric_axis, create_numeric_scale, find_bin_index
+from ..timeparse import create_time_scale, format_epoch, time_label_format
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import List, Tuple, Optional, Union
 
 
 def build_axis_query(
@@ -11,11 +17,14 @@ def build_axis_query(
     min_val: Union[float, str, None],
     max_val: Union[float, str, None],
     target_bins: int,
-    alias: str
+    alias: str,
+    time: bool = False
 ) -> Tuple[str, Optional[List[float]], bool]:
     """
     Build query piece for an axis (either numeric with binning or categorical).
     
+    Time axes (epoch seconds) are binned in whole seconds, minutes, hours or days.
+    
     Returns:
         - SQL expression for the axis
         - Scale (if numeric) or None (if categorical)
@@ -36,7 +45,10 @@ def build_axis_query(
     
     if is_numeric:
         # Create scale and build CASE statement for binning
-        scale = create_numeric_scale(min_num, max_num, target_bins)
+        if time:
+            scale = create_time_scale(min_num, max_num, target_bins)
+        else:
+            scale = create_numeric_scale(min_num, max_num, target_bins)
         
         case_parts = []
         for i in range(len(scale) - 1):
@@ -62,13 +74,17 @@ def create_heatmap(
     table_name: str,
     width: Optional[int] = None,
     height: Optional[int] = None,
-    verbose: bool = False
+    verbose: bool = False,
+    x_time: bool = False,
+    y_time: bool = False
 ) -> Optional[str]:
     """
     Create a heatmap with proper SQL-based aggregation for binned data.
     
     This avoids double aggregation by determining bins first, then running
     a SQL query that groups by those bins with the correct aggregation function.
+    x_time and y_time mark axes holding epoch seconds, which get time steps
+    and date/time labels.
     """
     from ..query_builder import parse_aggregation
     from ..core import execute_query
@@ -90,10 +106,10 @@ def create_heatmap(
         
         # Build query pieces for each axis
         x_expr, x_scale, x_is_numeric = build_axis_query(
-            x_field, x_min, x_max, width or 20, "x"
+            x_field, x_min, x_max, width or 20, "x", x_time
         )
         y_expr, y_scale, y_is_numeric = build_axis_query(
-            y_field, y_min, y_max, height or 15, "y"
+            y_field, y_min, y_max, height or 15, "y", y_time
         )
         
         # Parse the aggregation function if provided
@@ -195,7 +211,9 @@ def create_heatmap(
             x_scale if x_is_numeric else None,
             y_scale if y_is_numeric else None,
             width=width,
-            height=height
+            height=height,
+            x_time=x_is_numeric and x_time,
+            y_time=y_is_numeric and y_time
         )
         
     except Exception as e:
@@ -210,7 +228,9 @@ def create_heatmap_without_aggregation(
     y_scale: Optional[List[float]] = None,
     width: Optional[int] = None,
     height: Optional[int] = None,
-    chars: str = " ░▒▓█"
+    chars: str = " ░▒▓█",
+    x_time: bool = False,
+    y_time: bool = False
 ) -> str:
     """
     Create a heatmap from pre-aggregated data without any additional aggregation.
@@ -227,7 +247,10 @@ def create_heatmap_without_aggregation(
     # Use provided scales or create from data
     if x_scale is not None:
         x_is_numeric = True
-        x_labels = [f"{x:.6g}" for x in x_scale]
+        if x_time:
+            x_labels = [format_epoch(x, time_label_format(x_scale)) for x in x_scale]
+        else:
+            x_labels = [f"{x:.6g}" for x in x_scale]
         x_bins = len(x_scale) - 1
     else:
         x_is_numeric = False
@@ -236,7 +259,10 @@ def create_heatmap_without_aggregation(
     
     if y_scale is not None:
         y_is_numeric = True
-        y_labels = [f"{y:.6g}" for y in y_scale]
+        if y_time:
+            y_labels = [format_epoch(y, time_label_format(y_scale)) for y in y_scale]
+        else:
+            y_labels = [f"{y:.6g}" for y in y_scale]
         y_bins = len(y_scale) - 1
         # Reverse for display
         y_labels = list(reversed(y_labels))
@@ -358,11 +384,17 @@ def create_heatmap_without_aggregation(
     if x_is_numeric:
         x_min = min(float(x) for x in x_values_raw)
         x_max = max(float(x) for x in x_values_raw)
-        lines.append(f"X-axis: {x_min:.6g} to {x_max:.6g}")
+        if x_time:
+            lines.append(f"X-axis: {format_epoch(x_min)} to {format_epoch(x_max)}")
+        else:
+            lines.append(f"X-axis: {x_min:.6g} to {x_max:.6g}")
     if y_is_numeric:
         y_min = min(float(y) for y in y_values_raw)
         y_max = max(float(y) for y in y_values_raw)
-        lines.append(f"Y-axis: {y_min:.6g} to {y_max:.6g}")
+        if y_time:
+            lines.append(f"Y-axis: {format_epoch(y_min)} to {format_epoch(y_max)}")
+        else:
+            lines.append(f"Y-axis: {y_min:.6g} to {y_max:.6g}")
     
     # Create legend showing range for each character
     if min_val == max_val:
@@ -1,8 +1,21 @@
 """Multi-comparison chart implementation."""
+import itertools
 import sqlite3
 import sys
-from typing import Optional, List
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 from .display_mode import DisplayMode
+from .table import DEFAULT_LOOKAHEAD, render_table
+
+# Appended to cells whose difference is not statistically significant
+NOT_SIGNIFICANT_MARK = "~"
+
+# Ranking keys for --sort-by, computed per comparison version (c) against
+# the baseline (b); a metric is ranked by its largest key across versions
+SORT_KEYS = {
+    'diff': "c.value - b.value",
+    'pct': "(c.value - b.value) * 100.0 / b.value",
+    'abs-pct': "ABS((c.value - b.value) * 100.0 / b.value)",
+}
 
 
 def should_use_original_names(names: List[str], max_length: int = 8) -> bool:
@@ -23,6 +36,169 @@ def should_use_original_names(names: List[str], max_length: int = 8) -> bool:
     return all(len(str(name)) <= max_length for name in names)
 
 
+def format_value(value) -> str:
+    """Format an aggregated value for display."""
+    return f"{value:.6g}" if isinstance(value, (int, float)) else str(value)
+
+
+def format_comparison_cell(mode: DisplayMode, baseline_val, comp_val) -> str:
+    """Format a comparison version's cell relative to the baseline value."""
+    try:
+        baseline_num = float(baseline_val)
+        comp_num = float(comp_val)
+    except (ValueError, TypeError):
+        return "N/A"
+    
+    diff = comp_num - baseline_num
+    
+    # Calculate percentage difference
+    if baseline_num != 0:
+        pct_diff = (diff / baseline_num) * 100
+    else:
+        pct_diff = float('inf') if diff != 0 else 0
+    
+    comp_str = format_value(comp_val)
+    
+    if mode == DisplayMode.VALUE:
+        return comp_str
+    elif mode == DisplayMode.DIFF:
+        return f"{diff:+.6g}"
+    elif mode == DisplayMode.PERCENT or mode == DisplayMode.COMPACT:
+        if baseline_num == 0 and diff != 0:
+            return "inf%"
+        return f"{pct_diff:+.1f}%"
+    elif mode == DisplayMode.VALUE_DIFF:
+        return f"{comp_str} ({diff:+.6g})"
+    elif mode == DisplayMode.VALUE_PERCENT:
+        if baseline_num == 0 and diff != 0:
+            return f"{comp_str} (inf%)"
+        return f"{comp_str} ({pct_diff:+.1f}%)"
+    else:  # FULL
+        if baseline_num != 0 or diff == 0:
+            return f"{comp_str} {diff:+.6g} ({pct_diff:+.1f}%)"
+        return f"{comp_str} {diff:+.6g} (inf%)"
+
+
+def format_significance(mode: DisplayMode, baseline_val, baseline_moments, comp_moments,
+                        alpha: float) -> Tuple[str, Optional[float]]:
+    """
+    Build the statistics suffix for a comparison cell.
+    
+    Args:
+        mode: Display mode used for the difference
+        baseline_val: Aggregated baseline value (reference for percentages)
+        baseline_moments: (count, sum, sum of squares) of the baseline samples
+        comp_moments: (count, sum, sum of squares) of the comparison samples
+        alpha: Significance level
+    
+    Returns:
+        Tuple of (suffix, p-value); p-value is None when the test can't be run
+    """
+    from ..stats import welch_test
+    
+    result = welch_test(baseline_moments, comp_moments, confidence=1 - alpha)
+    if result is None:
+        return f" {NOT_SIGNIFICANT_MARK}", None
+    
+    try:
+        reference = float(baseline_val)
+    except (ValueError, TypeError):
+        reference = 0.0
+    suffix = f" {mode.format_half_width(result.half_width, reference)}"
+    if result.p_value >= alpha:
+        suffix += f" {NOT_SIGNIFICANT_MARK}"
+    return suffix, result.p_value
+
+
+def format_interval_suffix(mode: DisplayMode, baseline_val, interval) -> str:
+    """Build the bootstrap confidence interval suffix for a comparison cell."""
+    if interval is None:
+        return f" {NOT_SIGNIFICANT_MARK}"
+    
+    low, high = interval
+    try:
+        reference = float(baseline_val)
+    except (ValueError, TypeError):
+        reference = 0.0
+    suffix = f" {mode.format_interval(low, high, reference)}"
+    if low <= 0 <= high:
+        suffix += f" {NOT_SIGNIFICANT_MARK}"
+    return suffix
+
+
+def build_ranked_query(aggregate_query: str, sort_by: str, top: Optional[int],
+                       baseline_literal: str) -> str:
+    """
+    Wrap a per-(metric, version) aggregate query so metrics come out ranked.
+    
+    Ranking, and the LIMIT when `top` is given, run inside SQLite so only the
+    selected metrics are transferred. Metrics without a baseline or comparison
+    value can't be ranked: they are dropped with `top` and listed last otherwise.
+    
+    Args:
+        aggregate_query: Query returning metric, version, value, ... columns
+        sort_by: One of SORT_KEYS
+        top: Optional number of metrics to keep
+        baseline_literal: Baseline version as an SQL literal
+    """
+    if sort_by not in SORT_KEYS:
+        valid = ', '.join(sorted(SORT_KEYS))
+        raise ValueError(f"Invalid sort key: {sort_by}. Valid keys: {valid}")
+    
+    limit = f"LIMIT {int(top)}" if top is not None else ""
+    join = "JOIN" if top is not None else "LEFT JOIN"
+    return f"""
+        WITH agg AS ({aggregate_query}),
+        ranked AS (
+            SELECT c.metric AS metric, MAX({SORT_KEYS[sort_by]}) AS rank_key
+            FROM agg c JOIN agg b ON b.metric = c.metric AND b.version = {baseline_literal}
+            WHERE c.version <> {baseline_literal}
+            GROUP BY c.metric
+            ORDER BY rank_key DESC, c.metric
+            {limit}
+        )
+        SELECT agg.*
+        FROM agg {join} ranked ON ranked.metric = agg.metric
+        ORDER BY ranked.rank_key DESC, agg.metric, agg.version
+        """
+
+
+def group_rows_by_metric(rows: Iterable[Tuple]) -> Iterator[Tuple[object, Dict[object, Tuple]]]:
+    """
+    Group (metric, version, value, ...) rows that arrive ordered by metric.
+    
+    Yields one (metric, {version: (value, ...)}) pair per metric, so only a
+    single metric's values are held in memory at a time.
+    """
+    for metric, group in itertools.groupby(rows, key=lambda row: row[0]):
+        yield metric, {row[1]: tuple(row[2:]) for row in group}
+
+
+def parse_pairs(spec: str, versions: List) -> List[Tuple]:
+    """
+    Parse a --pairs specification into (baseline, version) pairs.
+    
+    Examples:
+        "all" -> every pair of versions, in version order
+        "A:B,B:C" -> [("A", "B"), ("B", "C")]
+    """
+    if spec.strip().lower() == 'all':
+        return list(itertools.combinations(versions, 2))
+    
+    by_name = {str(v): v for v in versions}
+    pairs = []
+    for item in spec.split(','):
+        left, sep, right = item.partition(':')
+        if not sep:
+            raise ValueError(f"Invalid pair '{item.strip()}'. Use BASELINE:VERSION")
+        for name in (left.strip(), right.strip()):
+            if name not in by_name:
+                available = ', '.join(str(v) for v in versions)
+                raise ValueError(f"Version '{name}' not found. Available versions: {available}")
+        pairs.append((by_name[left.strip()], by_name[right.strip()]))
+    return pairs
+
+
 def create_multi_comparison(
     cursor: sqlite3.Cursor,
     versions_field: str,
@@ -31,7 +207,19 @@ def create_multi_comparison(
     table_name: str,
     verbose: bool = False,
     display_mode: str = 'value-percent',
-    baseline: Optional[str] = None
+    baseline: Optional[str] = None,
+    max_width: Optional[int] = None,
+    stats: bool = False,
+    alpha: float = 0.05,
+    ci: Optional[str] = None,
+    seed: int = 0,
+    jobs: int = 1,
+    sort_by: Optional[str] = None,
+    top: Optional[int] = None,
+    pairs: Optional[str] = None,
+    matrix: bool = False,
+    save_baseline: Optional[str] = None,
+    against_baseline: Optional[str] = None
 ) -> Optional[str]:
     """
     Create a multi-comparison chart showing differences between multiple versions.
@@ -41,17 +229,163 @@ def create_multi_comparison(
         cursor: Database cursor
         versions_field: Field containing version identifiers
         metrics_field: Field containing metric names (rows in output)
-        value_field: Optional field to aggregate (defaults to COUNT)
+        value_field: Optional field to aggregate (defaults to COUNT); a comma-separated
+            list compares several fields from one GROUP BY, one section per field
         table_name: Name of the table
         verbose: Whether to show additional debug info
         display_mode: Display mode for difference formatting
         baseline: Optional baseline version to compare against (defaults to first version)
+        max_width: Optional cap on column width; wider cells are truncated
+        stats: Whether to add Welch's t-test confidence intervals and mark
+            differences that aren't significant
+        alpha: Significance level used when stats or ci is enabled
+        ci: Confidence interval method, "bootstrap" or "bootstrap:N" for N resamples
+        seed: Base seed for bootstrap resampling
+        jobs: Number of worker processes used for bootstrap resampling
+        sort_by: Rank metrics by their largest 'diff', 'pct' or 'abs-pct' change
+            against the baseline instead of listing them by name
+        top: Only show the first N ranked metrics (ranks by 'abs-pct' unless
+            sort_by is given)
+        pairs: Compare pairs of versions instead of everything against one
+            baseline: "all" or "A:B,B:C". Aggregates are computed once for all pairs.
+        matrix: With pairs, print a versions x versions summary of the mean
+            percentage change instead of one section per pair
+        save_baseline: Save the aggregates of the baseline version under this
+            name instead of printing a chart
+        against_baseline: Compare every version against the aggregates saved
+            under this name, which appear as a version of that name
     
     Returns:
         Formatted multi-comparison chart as string
     """
+    lines = list(iter_multi_comparison(
+        cursor, versions_field, metrics_field, value_field, table_name,
+        verbose=verbose, display_mode=display_mode, baseline=baseline,
+        max_width=max_width, stats=stats, alpha=alpha, ci=ci, seed=seed, jobs=jobs,
+        sort_by=sort_by, top=top, pairs=pairs, matrix=matrix,
+        save_baseline=save_baseline, against_baseline=against_baseline
+    ))
+    return "\n".join(lines) if lines else None
+
+
+class ValueSpec(NamedTuple):
+    """One value field of a comparison and the columns it adds to the aggregate query."""
+    label: str                   # Value expression as given by the user
+    value_expr: str              # SQL expression for the aggregated value
+    statistic: Optional[str]     # Aggregation function, if any
+    sample_expr: Optional[str]   # Per-row expression behind the aggregate
+
+
+def parse_value_specs(value_field: Optional[str]) -> List[ValueSpec]:
+    """
+    Parse the value argument of a comparison into one spec per value field.
+    
+    Examples:
+        None -> [COUNT(*)]
+        "avg(ts), max(ns)" -> [AVG(ts), MAX(ns)]
+    """
+    from ..core import split_expressions
     from ..query_builder import parse_aggregation
+    
+    if not value_field:
+        return [ValueSpec("count", "COUNT(*)", "count", None)]
+    
+    specs = []
+    for expr in split_expressions(value_field):
+        agg_func, field_name = parse_aggregation(expr)
+        if agg_func:
+            # percentile(x, q) and similar aggregate their first argument
+            sample_expr = split_expressions(field_name)[0]
+            specs.append(ValueSpec(expr, f"{agg_func.upper()}({field_name})", agg_func, sample_expr))
+        else:
+            specs.append(ValueSpec(expr, expr, None, expr))
+    return specs
+
+
+def value_columns(spec: ValueSpec, index: int, stats: bool, ci: bool) -> List[Tuple[str, str]]:
+    """
+    Aggregate columns for one value field as (SQL expression, column name) pairs.
+    
+    Column names carry the value index so several value fields can share one
+    GROUP BY; section_query() maps them back to value, n, total, ... names.
+    """
+    columns = [(spec.value_expr, f"value_{index}")]
+    if stats and spec.sample_expr in (None, '*'):
+        # count(*) has no per-row values to sum; only the row count is kept
+        columns += [
+            ("COUNT(*)", f"n_{index}"),
+            ("NULL", f"total_{index}"),
+            ("NULL", f"total_sq_{index}"),
+        ]
+    elif stats:
+        x = spec.sample_expr
+        columns += [
+            (f"COUNT({x})", f"n_{index}"),
+            (f"SUM({x})", f"total_{index}"),
+            (f"SUM(({x}) * ({x}))", f"total_sq_{index}"),
+        ]
+    if ci:
+        columns.append((f"group_concat({spec.sample_expr})", f"samples_{index}"))
+    return columns
+
+
+def section_query(source: str, index: int, stats: bool, ci: bool,
+                  versions: Optional[Tuple] = None) -> str:
+    """
+    Select the columns of one value field from the shared aggregates.
+    
+    Args:
+        source: Aggregates table name or parenthesized aggregate query
+        index: Index of the value field
+        stats: Whether moment columns are present
+        ci: Whether the samples column is present
+        versions: Optional versions to restrict the rows to
+    """
+    from ..query_builder import sql_literal
+    
+    names = ["value"] + (["n", "total", "total_sq"] if stats else []) + (["samples"] if ci else [])
+    columns = ", ".join(f"{name}_{index} AS {name}" for name in names)
+    query = f"SELECT metric, version, {columns} FROM {source}"
+    if versions is not None:
+        query += f" WHERE version IN ({', '.join(sql_literal(v) for v in versions)})"
+    return query + "\n"
+
+
+def iter_multi_comparison(
+    cursor: sqlite3.Cursor,
+    versions_field: str,
+    metrics_field: str, 
+    value_field: Optional[str],
+    table_name: str,
+    verbose: bool = False,
+    display_mode: str = 'value-percent',
+    baseline: Optional[str] = None,
+    max_width: Optional[int] = None,
+    stats: bool = False,
+    alpha: float = 0.05,
+    ci: Optional[str] = None,
+    seed: int = 0,
+    jobs: int = 1,
+    sort_by: Optional[str] = None,
+    top: Optional[int] = None,
+    pairs: Optional[str] = None,
+    matrix: bool = False,
+    save_baseline: Optional[str] = None,
+    against_baseline: Optional[str] = None,
+    lookahead: int = DEFAULT_LOOKAHEAD
+) -> Iterator[str]:
+    """
+    Stream a multi-comparison chart line by line.
+    
+    Rows are formatted as they are read from the cursor and column widths are
+    taken from the first `lookahead` metrics, so memory use doesn't grow with
+    the number of metrics. Arguments match create_multi_comparison.
+    
+    Yields:
+        Lines of the chart; nothing if the chart couldn't be created
+    """
     from ..core import execute_query
+    from .. import baselines
     
     # Parse display mode
     try:
@@ -61,39 +395,207 @@ def create_multi_comparison(
             print(f"Invalid display mode: {e}", file=sys.stderr)
         mode = DisplayMode.FULL
     
-    # Parse the aggregation function if provided
-    if value_field:
-        agg_func, field_name = parse_aggregation(value_field)
-        if agg_func:
-            value_expr = f"{agg_func.upper()}({field_name})"
-        else:
-            value_expr = value_field
-    else:
-        value_expr = "COUNT(*)"
-        agg_func = "count"
-    
-    # First, get distinct versions
-    version_query = f"""
-    SELECT DISTINCT {versions_field}
-    FROM {table_name}
-    WHERE {versions_field} IS NOT NULL
-    ORDER BY {versions_field}
-    """
+    specs = parse_value_specs(value_field)
+    
+    if (stats or ci) and not 0 < alpha < 1:
+        raise ValueError("--alpha must be between 0 and 1")
+    
+    resamples = None
+    if ci:
+        from .. import bootstrap
+        
+        if stats:
+            yield "Use either Welch statistics or bootstrap confidence intervals, not both"
+            return
+        resamples = bootstrap.parse_ci_spec(ci)
+        for spec in specs:
+            statistic = spec.statistic or 'avg'
+            if not bootstrap.supports_statistic(statistic):
+                yield f"Bootstrap confidence intervals are not supported for {statistic}()"
+                return
+    
+    # Sample moments (and raw samples for the bootstrap) are collected in the
+    # same GROUP BY as the values
+    if (stats or ci) and not value_field:
+        yield "Statistics require a value field to compare"
+        return
+    
+    if stats:
+        # Welch's t-test compares means; it says nothing about max, sum or percentiles
+        for spec in specs:
+            statistic = spec.statistic or 'avg'
+            if statistic.lower() != 'avg':
+                raise ValueError(f"--stats compares means and only supports avg(), not {statistic}()")
+    
+    if against_baseline and ci:
+        yield "Bootstrap confidence intervals need raw samples, which stored baselines don't keep"
+        return
+    
+    # Snapshots keep the moments so --stats works against them later
+    moments = stats or bool(save_baseline or against_baseline)
+    columns = [
+        column
+        for index, spec in enumerate(specs)
+        for column in value_columns(spec, index, moments, bool(ci))
+    ]
+    select_columns = ",\n            ".join(f"{expr} as {name}" for expr, name in columns)
+    
+    # Get all metrics and their values for all versions, for every value field at once
+    aggregate_query = f"""
+        SELECT 
+            {metrics_field} as metric,
+            {versions_field} as version,
+            {select_columns}
+        FROM {table_name}
+        WHERE {metrics_field} IS NOT NULL
+        GROUP BY {metrics_field}, {versions_field}
+        """
+    
+    if verbose:
+        print(f"Display mode: {mode.name.lower()} - {mode.describe()}", file=sys.stderr)
+    
+    # Several value fields or pairs read the aggregates more than once, so
+    # materialize them instead of scanning the source table again each time
+    materialize = len(specs) > 1 or bool(pairs or save_baseline or against_baseline)
+    aggregates = "uplt_comparison_aggregates"
+    labels = [spec.label for spec in specs]
     
     try:
+        if materialize:
+            cursor.execute(f"DROP TABLE IF EXISTS temp.{aggregates}")
+            create_query = f"CREATE TEMP TABLE {aggregates} AS {aggregate_query}"
+            if verbose:
+                print(f"Generated query: {create_query}", file=sys.stderr)
+            cursor.execute(create_query)
+            source = aggregates
+            version_query = f"""
+            SELECT DISTINCT version FROM {aggregates}
+            WHERE version IS NOT NULL
+            ORDER BY version
+            """
+            if against_baseline:
+                cursor.execute(f"SELECT 1 FROM {aggregates} WHERE version = ? LIMIT 1",
+                               (against_baseline,))
+                if cursor.fetchone():
+                    _drop_table(cursor, aggregates)
+                    yield f"Version '{against_baseline}' clashes with the stored baseline name"
+                    return
+                try:
+                    loaded = baselines.load_baseline(cursor, against_baseline, aggregates, labels)
+                except ValueError as e:
+                    _drop_table(cursor, aggregates)
+                    yield str(e)
+                    return
+                if verbose:
+                    print(f"Loaded {loaded} metrics from baseline '{against_baseline}'",
+                          file=sys.stderr)
+        else:
+            source = f"({aggregate_query})"
+            version_query = f"""
+            SELECT DISTINCT {versions_field}
+            FROM {table_name}
+            WHERE {versions_field} IS NOT NULL
+            ORDER BY {versions_field}
+            """
         version_results = execute_query(cursor, version_query)
-        if not version_results:
-            return "No versions found"
-        
-        versions = [row[0] for row in version_results]
-        
-        if len(versions) < 2:
-            return "Need at least 2 versions to compare"
-        
+    except sqlite3.Error as e:
+        if materialize:
+            _drop_table(cursor, aggregates)
+        raise ValueError(f"SQL Error: {e}")
+    except Exception:
+        if materialize:
+            _drop_table(cursor, aggregates)
+        raise
+    
+    versions = [row[0] for row in version_results]
+    
+    if save_baseline:
+        try:
+            if not versions:
+                yield "No versions found"
+                return
+            if baseline and baseline not in versions:
+                yield f"Baseline version '{baseline}' not found. Available versions: {', '.join(versions)}"
+                return
+            saved_version = baseline or versions[0]
+            saved = baselines.save_baseline(cursor, save_baseline, aggregates, saved_version, labels)
+            yield (f"Saved {saved} metrics of version '{saved_version}' as baseline "
+                   f"'{save_baseline}' ({baselines.baseline_path(save_baseline)})")
+        finally:
+            _drop_table(cursor, aggregates)
+        return
+    
+    if against_baseline:
+        if baseline and baseline != against_baseline and verbose:
+            print(f"Ignoring baseline: comparing against stored baseline '{against_baseline}'",
+                  file=sys.stderr)
+        baseline = against_baseline
+    
+    try:
+        yield from _iter_sections(
+            cursor, source, specs, versions,
+            baseline=baseline, pairs=pairs, matrix=matrix, mode=mode, verbose=verbose,
+            max_width=max_width, stats=stats, alpha=alpha, resamples=resamples,
+            seed=seed, jobs=jobs, sort_by=sort_by, top=top, lookahead=lookahead
+        )
+    finally:
+        if materialize:
+            _drop_table(cursor, aggregates)
+
+
+def _drop_table(cursor: sqlite3.Cursor, name: str):
+    """Drop a temporary table, ignoring errors."""
+    try:
+        cursor.execute(f"DROP TABLE IF EXISTS temp.{name}")
+    except sqlite3.Error:
+        pass
+
+
+def _iter_sections(
+    cursor: sqlite3.Cursor,
+    source: str,
+    specs: List[ValueSpec],
+    versions: List,
+    baseline: Optional[str],
+    pairs: Optional[str],
+    matrix: bool,
+    **render_options
+) -> Iterator[str]:
+    """
+    Resolve the baseline or pairs and render one section per value field and pair.
+    
+    With a single value field and no pairs this is a single unheaded table.
+    """
+    verbose = render_options['verbose']
+    stats = render_options['stats']
+    ci = render_options['resamples'] is not None
+    
+    if not versions:
+        yield "No versions found"
+        return
+    
+    if len(versions) < 2:
+        yield "Need at least 2 versions to compare"
+        return
+    
+    if pairs:
+        if baseline and verbose:
+            print("Ignoring baseline: pairs define their own baselines", file=sys.stderr)
+        try:
+            pair_list = parse_pairs(pairs, versions)
+        except ValueError as e:
+            yield str(e)
+            return
+        if matrix and pairs.strip().lower() == 'all':
+            # The summary has room for both directions of every pair
+            pair_list = list(itertools.permutations(versions, 2))
+        comparisons = [(f"{a} vs {b}", a, [b]) for a, b in pair_list]
+    else:
         # Determine baseline version
         if baseline:
             if baseline not in versions:
-                return f"Baseline version '{baseline}' not found. Available versions: {', '.join(versions)}"
+                yield f"Baseline version '{baseline}' not found. Available versions: {', '.join(versions)}"
+                return
             baseline_version = baseline
             comparison_versions = [v for v in versions if v != baseline]
         else:
@@ -104,184 +606,239 @@ def create_multi_comparison(
         if verbose:
             print(f"Baseline: {baseline_version}", file=sys.stderr)
             print(f"Comparing against: {comparison_versions}", file=sys.stderr)
+        comparisons = [(None, baseline_version, comparison_versions)]
+    
+    first = True
+    for index, spec in enumerate(specs):
+        value_title = spec.label if len(specs) > 1 else None
         
-        # Get all metrics and their values for all versions
-        data_query = f"""
-        SELECT 
-            {metrics_field} as metric,
-            {versions_field} as version,
-            {value_expr} as value
-        FROM {table_name}
-        WHERE {metrics_field} IS NOT NULL
-        GROUP BY {metrics_field}, {versions_field}
-        ORDER BY {metrics_field}, {versions_field}
-        """
+        if pairs and matrix:
+            if not first:
+                yield ""
+            first = False
+            if value_title:
+                yield f"=== {value_title} ==="
+            yield from _render_pair_matrix(
+                cursor, section_query(source, index, stats, ci), versions, pair_list,
+                render_options['max_width']
+            )
+            continue
+        
+        for pair_title, baseline_version, comparison_versions in comparisons:
+            if not first:
+                yield ""
+            first = False
+            title = ": ".join(t for t in (value_title, pair_title) if t)
+            if title:
+                yield f"=== {title} ==="
+            restrict = (baseline_version, *comparison_versions) if pairs else None
+            yield from _render_comparison(
+                cursor, section_query(source, index, stats, ci, restrict),
+                baseline_version, comparison_versions,
+                statistic=(spec.statistic or 'avg') if ci else None,
+                **render_options
+            )
+
+
+def _render_pair_matrix(
+    cursor: sqlite3.Cursor,
+    source_query: str,
+    versions: List,
+    pair_list: List[Tuple],
+    max_width: Optional[int]
+) -> Iterator[str]:
+    """Render the mean percentage change for each requested pair as a versions x versions table."""
+    from ..core import execute_query
+    
+    results = execute_query(cursor, f"""
+        WITH agg AS ({source_query})
+        SELECT b.version, c.version, AVG((c.value - b.value) * 100.0 / b.value), COUNT(*)
+        FROM agg b JOIN agg c
+            ON c.metric = b.metric AND c.version <> b.version
+        WHERE b.version IS NOT NULL AND c.version IS NOT NULL
+        GROUP BY b.version, c.version
+        """)
+    summary = {(row[0], row[1]): (row[2], row[3]) for row in results}
+    requested = set(pair_list)
+    
+    if should_use_original_names(versions):
+        labels = {v: str(v) for v in versions}
+    else:
+        labels = {v: chr(ord('A') + i) for i, v in enumerate(versions)}
+        for version in versions:
+            yield f"{labels[version]}: {version}"
+        yield ""
+    
+    def rows():
+        for row_version in versions:
+            cells = [labels[row_version]]
+            for col_version in versions:
+                if row_version == col_version:
+                    cells.append("-")
+                elif (row_version, col_version) not in requested:
+                    cells.append("")
+                else:
+                    mean_pct, shared = summary.get((row_version, col_version), (None, 0))
+                    cells.append("n/a" if mean_pct is None else f"{mean_pct:+.1f}% ({shared})")
+            yield cells
+    
+    yield from render_table(
+        ["baseline"] + [labels[v] for v in versions], rows(), max_width=max_width
+    )
+    yield ""
+    yield "Mean % change of each column version against the row version (shared metrics)"
+
+
+def _render_comparison(
+    cursor: sqlite3.Cursor,
+    source_query: str,
+    baseline_version,
+    comparison_versions: List,
+    mode: DisplayMode,
+    verbose: bool,
+    max_width: Optional[int],
+    stats: bool,
+    alpha: float,
+    resamples: Optional[int],
+    statistic: Optional[str],
+    seed: int,
+    jobs: int,
+    sort_by: Optional[str],
+    top: Optional[int],
+    lookahead: int
+) -> Iterator[str]:
+    """
+    Render a comparison of versions against a baseline from an aggregate query.
+    
+    Args:
+        source_query: Query returning metric, version, value columns followed
+            by the moment columns (stats) and the samples column (bootstrap)
+        baseline_version: Version used as the baseline
+        comparison_versions: Versions compared against the baseline
+    
+    The remaining arguments are the resolved options of iter_multi_comparison.
+    """
+    from ..query_builder import sql_literal
+    
+    ci = resamples is not None
+    missing = (0,) + ((0, 0, 0) if stats else ()) + ((None,) if ci else ())
+    
+    try:
+        if top is not None and sort_by is None:
+            sort_by = 'abs-pct'
+        if sort_by is not None:
+            # Rank (and limit) metrics in SQL so only the shown rows are fetched
+            data_query = build_ranked_query(source_query, sort_by, top, sql_literal(baseline_version))
+        else:
+            data_query = source_query + "        ORDER BY metric, version\n"
         
         if verbose:
             print(f"Generated query: {data_query}", file=sys.stderr)
-            print(f"Display mode: {mode.name.lower()} - {mode.describe()}", file=sys.stderr)
         
-        results = execute_query(cursor, data_query)
+        # Stream results from the cursor instead of fetching them all
+        cursor.execute(data_query)
+        metric_groups = group_rows_by_metric(cursor)
+        
+        first = next(metric_groups, None)
+        if first is None:
+            yield "No data to compare"
+            return
+        metric_groups = itertools.chain([first], metric_groups)
+    except sqlite3.Error as e:
+        raise ValueError(f"SQL Error: {e}")
+    
+    # Determine whether to use original names or letter labels
+    all_versions = [baseline_version] + comparison_versions
+    use_original = should_use_original_names(all_versions)
+    
+    if use_original:
+        # Use original names directly
+        baseline_label = str(baseline_version)
+        version_labels = {v: str(v) for v in comparison_versions}
+    else:
+        # Use letter labels with legend
+        baseline_label = "A"
+        yield f"Baseline (A): {baseline_version}"
         
-        if not results:
-            return "No data to compare"
+        # Create letter labels for comparison versions
+        version_labels = {}
+        for i, version in enumerate(comparison_versions):
+            label = chr(ord('B') + i)  # B, C, D, ...
+            version_labels[version] = label
+            yield f"{label}: {version}"
         
-        # Organize data by metric
-        metric_data = {}
-        for metric, version, value in results:
-            if metric not in metric_data:
-                metric_data[metric] = {}
-            metric_data[metric][version] = value
+        yield ""
+    
+    if ci:
+        from .. import bootstrap
+        
+        # Resample metrics in order, possibly across worker processes
+        def bootstrap_tasks():
+            for metric, metric_values in metric_groups:
+                baseline_samples = bootstrap.parse_samples(metric_values.get(baseline_version, missing)[-1])
+                comparison_samples = [
+                    bootstrap.parse_samples(metric_values.get(version, missing)[-1])
+                    for version in comparison_versions
+                ]
+                yield (metric, metric_values), (str(metric), baseline_samples, comparison_samples)
         
-        # Print data points in verbose mode
+        rows_with_intervals = (
+            (metric, metric_values, intervals)
+            for (metric, metric_values), intervals in bootstrap.attach_intervals(
+                bootstrap_tasks(), statistic=statistic, resamples=resamples,
+                confidence=1 - alpha, seed=seed, jobs=jobs
+            )
+        )
+    else:
+        rows_with_intervals = (
+            (metric, metric_values, None) for metric, metric_values in metric_groups
+        )
+    
+    def format_rows():
         if verbose:
             print("\nData points:", file=sys.stderr)
-            for metric in sorted(metric_data.keys()):
+        for metric, metric_values, intervals in rows_with_intervals:
+            # Print data points in verbose mode as they stream by
+            if verbose:
                 print(f"  {metric}:", file=sys.stderr)
-                for version, value in sorted(metric_data[metric].items()):
-                    value_str = f"{value:.6g}" if isinstance(value, (int, float)) else str(value)
-                    print(f"    {version}: {value_str}", file=sys.stderr)
-            print(file=sys.stderr)
-        
-        # Build the multi-comparison table
-        lines = []
-        
-        # Determine whether to use original names or letter labels
-        all_versions = [baseline_version] + comparison_versions
-        use_original = should_use_original_names(all_versions)
-        
-        if use_original:
-            # Use original names directly
-            baseline_label = str(baseline_version)
-            version_labels = {v: str(v) for v in comparison_versions}
-        else:
-            # Use letter labels with legend
-            baseline_label = "A"
-            lines.append(f"Baseline (A): {baseline_version}")
+                for version, columns in metric_values.items():
+                    print(f"    {version}: {format_value(columns[0])}", file=sys.stderr)
             
-            # Create letter labels for comparison versions
-            version_labels = {}
+            # Missing values default to 0
+            baseline_columns = metric_values.get(baseline_version, missing)
+            baseline_val = baseline_columns[0]
+            row = [str(metric), format_value(baseline_val)]
             for i, version in enumerate(comparison_versions):
-                label = chr(ord('B') + i)  # B, C, D, ...
-                version_labels[version] = label
-                lines.append(f"{label}: {version}")
-            
-            lines.append("")
-        
-        # Calculate column widths
-        metric_width = max(len(str(metric)) for metric in metric_data.keys())
-        metric_width = max(metric_width, 7)  # Minimum width for header
-        
-        # Calculate widths for baseline and each comparison version
-        baseline_values = []
-        for metric in metric_data.values():
-            if baseline_version in metric:
-                baseline_values.append(metric[baseline_version])
-        
-        baseline_width = max(len(f"{val:.6g}" if isinstance(val, (int, float)) else str(val)) for val in baseline_values) if baseline_values else 8
-        baseline_header = baseline_label
-        baseline_width = max(baseline_width, len(baseline_header))
-        
-        # Calculate widths and formatted values for comparison versions
-        version_widths = {}
-        version_formatted_values = {}  # Store pre-calculated formatted values
-        
-        for version in comparison_versions:
-            formatted_values = []
-            
-            for metric in sorted(metric_data.keys()):
-                metric_values = metric_data[metric]
-                baseline_val = metric_values.get(baseline_version, 0)
-                comp_val = metric_values.get(version, 0)
-                
-                # Format based on display mode
-                try:
-                    baseline_num = float(baseline_val)
-                    comp_num = float(comp_val)
-                    diff = comp_num - baseline_num
-                    
-                    # Calculate percentage difference
-                    if baseline_num != 0:
-                        pct_diff = (diff / baseline_num) * 100
-                    else:
-                        pct_diff = float('inf') if diff != 0 else 0
-                    
-                    # Format based on display mode
-                    comp_str = f"{comp_val:.6g}" if isinstance(comp_val, (int, float)) else str(comp_val)
-                    
-                    if mode == DisplayMode.VALUE:
-                        formatted = comp_str
-                    elif mode == DisplayMode.DIFF:
-                        formatted = f"{diff:+.6g}"
-                    elif mode == DisplayMode.PERCENT or mode == DisplayMode.COMPACT:
-                        if baseline_num == 0 and diff != 0:
-                            formatted = "inf%"
-                        else:
-                            formatted = f"{pct_diff:+.1f}%"
-                    elif mode == DisplayMode.VALUE_DIFF:
-                        formatted = f"{comp_str} ({diff:+.6g})"
-                    elif mode == DisplayMode.VALUE_PERCENT:
-                        if baseline_num == 0 and diff != 0:
-                            formatted = f"{comp_str} (inf%)"
-                        else:
-                            formatted = f"{comp_str} ({pct_diff:+.1f}%)"
-                    else:  # FULL
-                        formatted = f"{comp_str} {diff:+.6g} ({pct_diff:+.1f}%)" if baseline_num != 0 or diff == 0 else f"{comp_str} {diff:+.6g} (inf%)"
-                except (ValueError, TypeError):
-                    formatted = "N/A"
-                
-                formatted_values.append(formatted)
-            
-            # Calculate column width based on formatted values
-            width = max(len(val) for val in formatted_values) if formatted_values else 8
-            version_header = version_labels[version]
-            width = max(width, len(version_header))
-            version_widths[version] = (width, version_header)
-            version_formatted_values[version] = formatted_values
-        
-        # Build header
-        header_parts = [" " * metric_width, baseline_header.ljust(baseline_width)]
-        
-        for version in comparison_versions:
-            width, letter_label = version_widths[version]
-            header_parts.append(letter_label.ljust(width))
-        
-        header = " | ".join(header_parts)
-        lines.append(header)
-        
-        # Add separator
-        sep_parts = ["-" * metric_width, "-" * baseline_width]
-        for version in comparison_versions:
-            width, _ = version_widths[version]
-            sep_parts.append("-" * width)
-        
-        separator = "-+-".join(sep_parts)
-        lines.append(separator)
-        
-        # Add data rows
-        for i, metric in enumerate(sorted(metric_data.keys())):
-            metric_values = metric_data[metric]
-            
-            # Get baseline value
-            baseline_val = metric_values.get(baseline_version, 0)
-            baseline_str = f"{baseline_val:.6g}" if isinstance(baseline_val, (int, float)) else str(baseline_val)
-            
-            # Start building row
-            row_parts = [str(metric).ljust(metric_width), baseline_str.ljust(baseline_width)]
-            
-            # Add comparison values
-            for version in comparison_versions:
-                # Get pre-calculated formatted value
-                formatted_value = version_formatted_values[version][i]
-                width, _ = version_widths[version]
-                row_parts.append(formatted_value.ljust(width))
-            
-            row = " | ".join(row_parts)
-            lines.append(row)
-        
-        return "\n".join(lines)
-        
-    except Exception as e:
-        if verbose:
-            print(f"Error creating multi-comparison: {e}", file=sys.stderr)
-        return None
+                comp_columns = metric_values.get(version, missing)
+                cell = format_comparison_cell(mode, baseline_val, comp_columns[0])
+                if stats:
+                    suffix, p_value = format_significance(
+                        mode, baseline_val, baseline_columns[1:4], comp_columns[1:4], alpha
+                    )
+                    cell += suffix
+                    if verbose and p_value is not None:
+                        print(f"    p-value {version} vs {baseline_version}: {p_value:.4g}",
+                              file=sys.stderr)
+                if ci:
+                    cell += format_interval_suffix(mode, baseline_val, intervals[i])
+                row.append(cell)
+            yield row
+    
+    headers = [""] + [baseline_label] + [version_labels[v] for v in comparison_versions]
+    
+    yield from render_table(
+        headers,
+        format_rows(),
+        max_width=max_width,
+        lookahead=lookahead,
+        min_widths=[7]  # Minimum width for the metric column
+    )
+    
+    if stats:
+        yield ""
+        yield (f"{NOT_SIGNIFICANT_MARK} not significant at {(1 - alpha) * 100:g}% confidence "
+               f"(Welch's t-test, needs 2+ samples per version)")
+    elif ci:
+        yield ""
+        yield (f"{NOT_SIGNIFICANT_MARK} not significant at {(1 - alpha) * 100:g}% confidence "
+               f"(bootstrap, {resamples} resamples)")
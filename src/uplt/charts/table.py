@@ -0,0 +1,83 @@
+"""Streaming table renderer for aligned terminal output."""
+from __future__ import annotations
+
+import itertools
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Iterable, Iterator, List, Optional, Sequence
+
+# Marker appended to cells that had to be cut to fit their column
+TRUNCATION_MARK = "…"
+
+# Number of rows buffered to compute column widths before streaming starts
+DEFAULT_LOOKAHEAD = 1000
+
+
+def truncate_cell(text: str, width: int) -> str:
+    """Cut a cell to the given width, marking the cut with TRUNCATION_MARK."""
+    if len(text) <= width:
+        return text
+    if width <= len(TRUNCATION_MARK):
+        return TRUNCATION_MARK[:width]
+    return text[:width - len(TRUNCATION_MARK)] + TRUNCATION_MARK
+
+
+def format_cell(value) -> str:
+    """Format a single query value for display in a table."""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    return str(value)
+
+
+def render_table(
+    headers: Sequence[str],
+    rows: Iterable[Sequence[str]],
+    max_width: Optional[int] = None,
+    lookahead: int = DEFAULT_LOOKAHEAD,
+    min_widths: Optional[Sequence[int]] = None
+) -> Iterator[str]:
+    """
+    Render rows of pre-formatted cells as an aligned table, one line at a time.
+
+    Column widths are computed from the headers and the first `lookahead` rows
+    only, so memory stays bounded and output starts before the input is
+    exhausted. Cells of later rows that don't fit are truncated, as are any
+    cells wider than `max_width`.
+
+    Args:
+        headers: Header label for each column
+        rows: Iterable of rows, each a sequence of already formatted strings
+        max_width: Optional cap on the width of every column
+        lookahead: Number of rows inspected to determine column widths
+        min_widths: Optional minimum width for each column
+
+    Yields:
+        Header line, separator line and one line per row
+    """
+    rows = iter(rows)
+    buffered = list(itertools.islice(rows, max(lookahead, 0)))
+
+    widths: List[int] = [len(str(h)) for h in headers]
+    for i, minimum in enumerate(min_widths or []):
+        widths[i] = max(widths[i], minimum)
+    for row in buffered:
+        for i, cell in enumerate(row):
+            if len(cell) > widths[i]:
+                widths[i] = len(cell)
+    if max_width is not None:
+        widths = [min(w, max_width) for w in widths]
+
+    def render_row(cells: Sequence[str]) -> str:
+        return " | ".join(
+            truncate_cell(str(cell), width).ljust(width)
+            for cell, width in zip(cells, widths)
+        )
+
+    yield render_row(headers)
+    yield "-+-".join("-" * width for width in widths)
+
+    for row in itertools.chain(buffered, rows):
+        yield render_row(row)
@@ -1,6 +1,11 @@
 """Shared utilities for chart plotting."""
+from __future__ import annotations
+
 import math
-from typing import List, Union
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import List, Union
 
 
 def is_numeric_axis(values: List) -> bool:
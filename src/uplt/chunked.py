@@ -0,0 +1,115 @@
+"""Order-preserving parallel add and filter over chunks of rows.
+
+`add` and `filter` only look at one row at a time, so the input can be cut
+into chunks that worker processes run through their own in-memory SQLite
+with the same generated query. Chunks come back in input order through the
+bounded reorder buffer of parallel.ordered_map.
+
+Column types must not depend on the chunk (a chunk of whole numbers would
+otherwise store 3 where the full table stores 3.0), so they are inferred
+over the whole input in a first pass, which is why this needs a file.
+"""
+from __future__ import annotations
+
+import itertools
+import sqlite3
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Iterable, Iterator, List, Sequence
+
+# Rows sent to a worker at a time
+CHUNK_ROWS = 10_000
+
+
+def stream_column_types(rows: Iterable[Sequence[str]], width: int) -> List[str]:
+    """Column types as core.infer_column_type would give for all rows, in one pass."""
+    is_integer = [True] * width
+    is_real = [True] * width
+    seen = [False] * width
+    # Columns that could still be numeric; text can't change type again
+    undecided = tuple(range(width))
+    for row in rows:
+        for i in undecided:
+            if i >= len(row) or not row[i].strip():
+                continue
+            seen[i] = True
+            if is_integer[i]:
+                try:
+                    int(row[i])
+                    continue
+                except ValueError:
+                    is_integer[i] = False
+            try:
+                float(row[i])
+            except ValueError:
+                is_real[i] = False
+                undecided = tuple(j for j in undecided if is_real[j])
+    return [
+        'INTEGER' if seen[i] and is_integer[i] else 'REAL' if seen[i] and is_real[i] else 'TEXT'
+        for i in range(width)
+    ]
+
+
+def _connect(table: str, headers: List[str], types: List[str]) -> sqlite3.Connection:
+    from .aggregates import register_aggregates
+
+    conn = sqlite3.connect(':memory:')
+    register_aggregates(conn)
+    columns = ', '.join(f"{name} {col_type}" for name, col_type in zip(headers, types))
+    conn.execute(f"CREATE TABLE {table} ({columns})")
+    return conn
+
+
+def _run_chunk(task) -> str:
+    """Worker entry point: run the query over one chunk and return it as CSV lines."""
+    from .core import format_csv_row, insert_rows
+
+    table, headers, types, rows, query = task
+    conn = _connect(table, headers, types)
+    cursor = conn.cursor()
+    insert_rows(cursor, table, len(headers), rows)
+    try:
+        return ''.join(format_csv_row(row) + '\n' for row in cursor.execute(query))
+    except sqlite3.Error as e:
+        raise ValueError(f"SQL Error: {e}")
+    finally:
+        conn.close()
+
+
+def iter_chunk_results(
+    rows: Iterable[List[str]],
+    table: str,
+    headers: List[str],
+    types: List[str],
+    query: str,
+    jobs: int,
+    chunk_rows: int = CHUNK_ROWS
+) -> Iterator[str]:
+    """
+    Run a row-local query over chunks of rows in worker processes.
+
+    Yields:
+        The CSV lines of every chunk, in input order
+    """
+    from .parallel import ordered_map
+
+    # Report mistakes in the expression before any output is produced
+    conn = _connect(table, headers, types)
+    try:
+        conn.execute(query).fetchall()
+    except sqlite3.Error as e:
+        raise ValueError(f"SQL Error: {e}")
+    finally:
+        conn.close()
+
+    rows = iter(rows)
+
+    def tasks():
+        while True:
+            chunk = list(itertools.islice(rows, chunk_rows))
+            if not chunk:
+                return
+            yield table, headers, types, chunk, query
+
+    return ordered_map(_run_chunk, tasks(), jobs=jobs)
@@ -1,11 +1,443 @@
+import os
 import sys
 import sqlite3
 import argparse
-from .core import create_table_from_csv, execute_query, format_output, parse_field_with_alias, split_expressions
-from .query_builder import parse_chart_command
+from .core import create_table_from_csv, execute_query, iter_query, format_csv_row, format_output, parse_field_with_alias, sample_numeric_columns, split_expressions
+from .aggregates import register_aggregates
+from .timeparse import display_expression, is_time_expression
 
 
-def main():
+class HelpFormatter(argparse.RawDescriptionHelpFormatter):
+    """RawDescriptionHelpFormatter that finds the terminal width without shutil.
+    
+    argparse builds a formatter for every parser, not only for --help, and
+    the default one imports shutil (and with it bz2 and lzma) to size itself.
+    """
+    
+    def __init__(self, prog, indent_increment=2, max_help_position=24, width=None):
+        if width is None:
+            width = terminal_columns() - 2
+        super().__init__(prog, indent_increment, max_help_position, width)
+
+
+def terminal_columns() -> int:
+    """Terminal width the way shutil.get_terminal_size() finds it, defaulting to 80."""
+    try:
+        columns = int(os.environ.get('COLUMNS', 0))
+    except ValueError:
+        columns = 0
+    if columns <= 0:
+        try:
+            columns = os.get_terminal_size(sys.__stdout__.fileno()).columns
+        except (AttributeError, ValueError, OSError):
+            columns = 0
+    return columns or 80
+
+
+def print_table(cursor: sqlite3.Cursor, max_width=None) -> bool:
+    """Stream the rows of an executed query to stdout as an aligned table.
+    
+    Returns:
+        False if the query produced no rows, True otherwise
+    """
+    import itertools
+    from .charts.table import format_cell, render_table
+    
+    first = cursor.fetchone()
+    if first is None:
+        return False
+    
+    headers = [desc[0] for desc in cursor.description]
+    rows = ([format_cell(val) for val in row] for row in itertools.chain([first], cursor))
+    for line in render_table(headers, rows, max_width=max_width):
+        print(line)
+    return True
+
+
+def describe_command(args, source, header_mode: str):
+    """Profile every column of the input in one streaming pass."""
+    from .core import open_csv_stream
+    from .describe import HEADERS, describe_rows
+    
+    columns = split_expressions(args.command[1]) if len(args.command) > 1 else None
+    headers, rows = open_csv_stream(source, header_mode, args.delimiter)
+    
+    if columns:
+        missing = [c for c in columns if c not in headers]
+        if missing:
+            print(f"Error: Unknown column(s): {', '.join(missing)}. Available: {', '.join(headers)}",
+                  file=sys.stderr)
+            sys.exit(1)
+        indices = [headers.index(c) for c in columns]
+        headers = columns
+        rows = ([row[i] if i < len(row) else None for i in indices] for row in rows)
+    
+    summaries = describe_rows(headers, rows, jobs=args.jobs,
+                              numeric_threshold=args.numeric_threshold / 100)
+    if args.pretty:
+        from .charts.table import format_cell, render_table
+        for line in render_table(HEADERS, ([format_cell(v) for v in row] for row in summaries),
+                                 max_width=args.col_width):
+            print(line)
+    else:
+        print(format_output(list(summaries), [(h,) for h in HEADERS]), end='')
+
+
+def top_command(args, source, header_mode: str):
+    """Print the most frequent values of a column with bounded memory."""
+    from .core import open_csv_stream
+    from .topk import exact_counts, heavy_hitters, sqlite_sort_key
+    
+    if len(args.command) != 2:
+        print("Error: top requires exactly one column: top COLUMN", file=sys.stderr)
+        sys.exit(1)
+    if args.k < 1:
+        print("Error: -k must be at least 1", file=sys.stderr)
+        sys.exit(1)
+    if args.exact and not args.input:
+        print("Error: --exact needs a second pass over the data; use --input FILE", file=sys.stderr)
+        sys.exit(1)
+    
+    column = args.command[1]
+    headers, rows = open_csv_stream(source, header_mode, args.delimiter)
+    if column not in headers:
+        print(f"Error: Unknown column(s): {column}. Available: {', '.join(headers)}", file=sys.stderr)
+        sys.exit(1)
+    index = headers.index(column)
+    
+    def values(rows):
+        return (row[index] if index < len(row) else '' for row in rows)
+    
+    summary = heavy_hitters(values(rows), args.k)
+    if args.verbose:
+        print(f"Counted {summary.total} values with {summary.capacity} counters", file=sys.stderr)
+    
+    if args.exact:
+        candidates = [value for value, _, _ in summary.top(summary.capacity)]
+        with open(args.input, newline='') as second_pass:
+            _, rows = open_csv_stream(second_pass, header_mode, args.delimiter)
+            counts = exact_counts(values(rows), candidates)
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], sqlite_sort_key(item[0])))
+        output_headers = [column, "count"]
+        results = [[value, count] for value, count in ranked[:args.k] if count]
+    else:
+        # count overestimates by at most error: the true count is in [count - error, count]
+        output_headers = [column, "count", "error"]
+        results = [list(entry) for entry in summary.top(args.k)]
+    
+    if args.pretty:
+        from .charts.table import format_cell, render_table
+        for line in render_table(output_headers, ([format_cell(v) for v in row] for row in results),
+                                 max_width=args.col_width):
+            print(line)
+    else:
+        print(format_output(results, [(h,) for h in output_headers]), end='')
+
+
+def report_nulled(nulled):
+    """Print how many stray values of each mostly-numeric column were stored as NULL."""
+    for column, count in nulled.items():
+        print(f"Stored {count} non-numeric value{'s' if count != 1 else ''} of {column} as NULL",
+              file=sys.stderr)
+
+
+def parallel_rows_command(args, source, header_mode: str):
+    """Run add or filter over chunks of the --input file in --jobs worker processes, keeping row order."""
+    from .chunked import iter_chunk_results, stream_column_types
+    from .core import open_csv_stream
+    from .query_builder import added_column_names, added_columns
+    
+    # First pass: column types over the whole file, as the serial path infers them
+    headers, rows = open_csv_stream(source, header_mode, args.delimiter)
+    types = stream_column_types(rows, len(headers))
+    
+    expr = args.command[1]
+    if args.command[0] in ("add", "a"):
+        query = f"SELECT *, {added_columns(expr)} FROM {args.table_name}"
+        output_headers = headers + added_column_names(expr, headers)
+    else:
+        query = f"SELECT * FROM {args.table_name} WHERE {expr}"
+        output_headers = headers
+    if args.verbose:
+        print(f"Generated query: {query}", file=sys.stderr)
+        print(f"Running chunks in {args.jobs} worker processes", file=sys.stderr)
+    
+    with open(args.input, newline='') as second_pass:
+        _, rows = open_csv_stream(second_pass, header_mode, args.delimiter)
+        chunks = iter_chunk_results(rows, args.table_name, headers, types, query, args.jobs)
+        print(','.join(output_headers))
+        for lines in chunks:
+            sys.stdout.write(lines)
+
+
+def compiled_rows_command(args, csv_data: str, header_mode: str) -> bool:
+    """
+    Run add or filter with the expressions compiled to Python, skipping SQLite.
+    
+    Returns:
+        False without printing anything if some expression or value needs
+        SQLite, in which case the caller runs the query as usual
+    """
+    from .core import infer_column_types, null_stray_values, parse_csv
+    from .expressions import Unsupported, compile_condition, compile_expression, row_converter
+    from .query_builder import added_column_names
+    
+    try:
+        headers, rows = parse_csv(csv_data, header_mode)
+        types = infer_column_types(headers, rows, args.numeric_threshold / 100)
+        # Column names SQLite would reject are reported by the usual path
+        columns = ', '.join(f"{name} {col_type}" for name, col_type in zip(headers, types))
+        sqlite3.connect(':memory:').execute(f"CREATE TABLE {args.table_name} ({columns})")
+    except (ValueError, sqlite3.Error):
+        return False
+    nulled = null_stray_values(rows, types) if args.numeric_threshold < 100 else {}
+    
+    expr = args.command[1]
+    try:
+        if args.command[0] in ("add", "a"):
+            evaluators = [compile_expression(parse_field_with_alias(field)[0], headers, types)
+                          for field in split_expressions(expr)]
+        else:
+            condition = compile_condition(expr, headers, types)
+        convert = row_converter(types)
+        results = []
+        if args.command[0] in ("add", "a"):
+            for row in rows:
+                results.append(convert(row) + tuple(evaluate(row) for evaluate in evaluators))
+        else:
+            results = [convert(row) for row in rows if condition(row)]
+    except Unsupported as e:
+        if args.verbose:
+            print(f"Evaluating with SQLite: {e}", file=sys.stderr)
+        return False
+    
+    if args.verbose:
+        report_nulled({headers[i]: count for i, count in nulled.items()})
+        print(f"Evaluated compiled expression over {len(rows)} rows", file=sys.stderr)
+    if args.command[0] in ("add", "a"):
+        if results:
+            print(','.join(headers + added_column_names(expr, headers)))
+    else:
+        # Always output headers for filter command
+        print(','.join(headers))
+    for row in results:
+        print(format_csv_row(row))
+    return True
+
+
+def groupby_aggregates(args, keys, headers, rows):
+    """
+    (expression, alias) pairs of the groupby aggregations over CSV rows that aren't loaded yet.
+    
+    A bare function name (or no aggregation at all, meaning avg) applies to
+    every column that isn't a group key and whose first values are numbers,
+    picked as the serial groupby picks them.
+    """
+    from .core import sample_numeric_row_columns
+    from .query_builder import is_aggregate_shortcut
+    
+    agg_spec = args.command[2] if len(args.command) >= 3 else 'avg'
+    if not is_aggregate_shortcut(agg_spec):
+        return [parse_field_with_alias(expr) for expr in split_expressions(agg_spec)]
+    
+    agg_func = agg_spec.lower()
+    key_exprs = [expr for expr, _ in keys]
+    candidates = [col for col in headers if col not in key_exprs]
+    numeric_columns = sample_numeric_row_columns(headers, rows, candidates)
+    if not numeric_columns:
+        print("Error: No numeric columns found to aggregate", file=sys.stderr)
+        sys.exit(1)
+    return [(f"{agg_func}({col})", f"{col}_{agg_func}") for col in numeric_columns]
+
+
+def parallel_groupby_command(args, cursor: sqlite3.Cursor, csv_data: str, header_mode: str) -> bool:
+    """
+    Run groupby across --jobs worker processes, merging partial aggregates.
+    
+    Returns:
+        False without reading the data when some aggregate can't be split
+        into partials; the caller then runs the serial groupby
+    """
+    from .core import infer_column_types, null_stray_values, parse_csv
+    from .partitioned import parallel_groupby, partial_plan
+    from .query_builder import is_aggregate_shortcut
+    
+    agg_spec = args.command[2] if len(args.command) >= 3 else 'avg'
+    if is_aggregate_shortcut(agg_spec):
+        requested = [f"{agg_spec}(x)"]
+    else:
+        requested = [parse_field_with_alias(expr)[0] for expr in split_expressions(agg_spec)]
+    if partial_plan(requested) is None:
+        return False
+    
+    try:
+        headers, rows = parse_csv(csv_data, header_mode)
+    except Exception as e:
+        raise ValueError(f"Error parsing CSV: {e}")
+    types = infer_column_types(headers, rows, args.numeric_threshold / 100)
+    if args.numeric_threshold < 100:
+        nulled = null_stray_values(rows, types)
+        if args.verbose:
+            report_nulled({headers[i]: count for i, count in nulled.items()})
+    keys = [parse_field_with_alias(field) for field in split_expressions(args.command[1])]
+    aggregates = groupby_aggregates(args, keys, headers, rows)
+    if args.verbose:
+        print(f"Grouping {len(rows)} rows in {args.jobs} worker processes", file=sys.stderr)
+    
+    try:
+        columns, results = parallel_groupby(
+            cursor, args.table_name, headers, types, rows, keys, aggregates, args.jobs
+        )
+    except sqlite3.Error as e:
+        raise ValueError(f"SQL Error: {e}")
+    
+    if args.pretty:
+        from .charts.table import format_cell, render_table
+        for line in render_table(columns, ([format_cell(v) for v in row] for row in results),
+                                 max_width=args.col_width):
+            print(line)
+    elif results:
+        print(format_output(results, [(c,) for c in columns]), end='')
+    elif args.verbose:
+        print("Query returned no results.", file=sys.stderr)
+    return True
+
+
+def presorted_groupby_command(args, source, header_mode: str):
+    """Aggregate input sorted by the group keys as it streams, printing each group when it ends."""
+    import csv
+    import itertools
+    from .core import open_csv_stream
+    from .presorted import CHUNK_ROWS, create_staging_table, iter_presorted_groups
+    
+    if len(args.command) < 2:
+        print("Error: Group by fields required after 'groupby'", file=sys.stderr)
+        sys.exit(1)
+    if args.rollup or args.grouping_sets or args.top is not None:
+        print("Error: --presorted can't be combined with --rollup, --grouping-sets or --top",
+              file=sys.stderr)
+        sys.exit(1)
+    if args.numeric_threshold < 100:
+        print("Error: --presorted can't be combined with --numeric-threshold", file=sys.stderr)
+        sys.exit(1)
+    
+    headers, rows = open_csv_stream(source, header_mode, args.delimiter)
+    # Column types come from the first chunk, as the whole input isn't available
+    first_chunk = list(itertools.islice(rows, CHUNK_ROWS))
+    
+    conn = sqlite3.connect(':memory:')
+    register_aggregates(conn)
+    cursor = conn.cursor()
+    create_staging_table(cursor, args.table_name, headers, first_chunk)
+    
+    keys = [parse_field_with_alias(field) for field in split_expressions(args.command[1])]
+    aggregates = groupby_aggregates(args, keys, headers, first_chunk)
+    
+    try:
+        columns, results = iter_presorted_groups(
+            cursor, args.table_name, len(headers), itertools.chain(first_chunk, rows),
+            keys, aggregates
+        )
+    except sqlite3.Error as e:
+        raise ValueError(f"SQL Error: {e}")
+    
+    if args.pretty:
+        from .charts.table import format_cell, render_table
+        for line in render_table(columns, ([format_cell(v) for v in row] for row in results),
+                                 max_width=args.col_width):
+            print(line)
+    else:
+        writer = csv.writer(sys.stdout, lineterminator='\n')
+        writer.writerow(columns)
+        writer.writerows(results)
+    conn.close()
+
+
+def print_top_rows(cursor: sqlite3.Cursor, args, headers, raw_groupby_fields, timestamps=None):
+    """Print the best --top rows of every group, ranked by --by or the aggregate's field."""
+    from .query_builder import parse_aggregation
+    from .timeparse import display_expression
+    from .topk import top_rows_per_group
+    
+    keys = [parse_field_with_alias(field) for field in raw_groupby_fields]
+    key_exprs = [expr for expr, _ in keys]
+    
+    # "min(x)" ranks by x ascending; anything else keeps the largest values
+    agg_func, field_name = parse_aggregation(args.command[2]) if len(args.command) >= 3 else (None, None)
+    by_expr = args.by or (field_name if agg_func else None)
+    if not by_expr:
+        print("Error: --top in groupby needs --by EXPR or an aggregate such as \"max(latency)\"",
+              file=sys.stderr)
+        sys.exit(1)
+    largest = agg_func != 'min'
+    
+    # Group keys already lead the output, so plain key columns aren't repeated
+    columns = [col for col in headers if col not in key_exprs]
+    by_column = [] if by_expr in headers else [by_expr]
+    # Rows are ranked by the stored value; time expressions are shown as ISO-8601 text
+    shown = [display_expression(expr, timestamps) or expr for expr in key_exprs]
+    shown_columns = [display_expression(expr, timestamps) or expr for expr in by_column + columns]
+    query = (
+        f"SELECT {', '.join(shown)}, {by_expr}, {', '.join(shown_columns)} "
+        f"FROM {args.table_name}"
+    )
+    if args.verbose:
+        print(f"Generated query: {query}", file=sys.stderr)
+    
+    rows = (
+        list(group) + [rank] + list(row[len(keys) + 1:])
+        for group, rank, row in top_rows_per_group(
+            iter_query(cursor, query), len(keys), args.top, largest
+        )
+    )
+    output_headers = [alias or expr for expr, alias in keys] + ["rank"] + by_column + columns
+    if args.pretty:
+        from .charts.table import format_cell, render_table
+        for line in render_table(output_headers, ([format_cell(v) for v in row] for row in rows),
+                                 max_width=args.col_width):
+            print(line)
+    else:
+        print(format_output(list(rows), [(h,) for h in output_headers]), end='')
+
+
+# Options that decide how the input is loaded; a server or batch applies its own to every command
+LOAD_OPTIONS = ('delimiter', 'header', 'no_header', 'parse_times', 'dict_encode', 'numeric_threshold')
+
+
+def check_options(args):
+    """Exit with an error for option values no command accepts."""
+    if args.top is not None and args.top < 1:
+        print("Error: --top must be at least 1", file=sys.stderr)
+        sys.exit(1)
+
+
+def get_header_mode(args) -> str:
+    """'yes', 'no' or 'auto' from --header and --no-header."""
+    if args.header:
+        return 'yes'
+    if args.no_header:
+        return 'no'
+    return 'auto'
+
+
+def is_streaming(args) -> bool:
+    """Whether the command reads its input row by row instead of loading it into SQLite."""
+    return args.command[0] in ("describe", "top") or (
+        args.presorted and args.command[0] in ("groupby", "g")
+    )
+
+
+def streaming_command(args, source, header_mode: str):
+    """Run describe, top or presorted groupby over a CSV stream."""
+    if args.command[0] == "describe":
+        describe_command(args, source, header_mode)
+    elif args.command[0] == "top":
+        top_command(args, source, header_mode)
+    else:
+        presorted_groupby_command(args, source, header_mode)
+
+
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description='Execute SQL queries on CSV data from stdin or create terminal charts',
         epilog='Examples:\n'
@@ -17,11 +449,19 @@ def main():
                '  Filter rows (short): cat data.csv | uplt f "status = \'active\'"\n'
                '  Group by: cat data.csv | uplt groupby "category,region" "avg(price),sum(quantity)"\n'
                '  Group by (short): cat data.csv | uplt g category avg\n'
+               '  Profile columns: cat data.csv | uplt describe\n'
+               '  Most frequent values: cat data.csv | uplt top user_id -k 20\n'
                '  Heatmap: cat data.csv | uplt heatmap x_field y_field "avg(value)"\n'
                '  Heatmap (short): cat data.csv | uplt hm x_field y_field "avg(value)"\n'
                '  Comparison (2+ versions): cat data.csv | uplt mcmp versions metrics "avg(value)"\n'
-               '  Comparison (short): cat data.csv | uplt cmp versions metrics "avg(value)"\n',
-        formatter_class=argparse.RawDescriptionHelpFormatter
+               '  Comparison (short): cat data.csv | uplt cmp versions metrics "avg(value)"\n'
+               '  Serve a file: uplt serve --socket /tmp/uplt.sock data.csv\n'
+               '  Query the server: uplt --connect /tmp/uplt.sock q "SELECT * FROM data"\n'
+               '  Save a database: uplt -i data.csv --save-db data.db q "SELECT count(*) FROM data"\n'
+               '  Query it: uplt --db data.db g category avg\n'
+               '  Run a script: uplt -i data.csv run report.uplt\n'
+               '  Several commands: cat data.csv | uplt q "SELECT count(*) FROM data" ";;" g category avg\n',
+        formatter_class=HelpFormatter
     )
     
     # Make command positional but with nargs='*' to handle variable arguments
@@ -43,76 +483,313 @@ def main():
                        help='Display mode for comparison charts: value-percent (default), full, compact, value, diff, percent, value-diff')
     parser.add_argument('--baseline', '-b',
                        help='Baseline version for multi-comparison (defaults to first version)')
+    parser.add_argument('--stats', action='store_true',
+                       help="Add Welch's t-test confidence intervals to avg() comparison charts and mark differences that aren't significant")
+    parser.add_argument('--alpha', type=float, default=0.05,
+                       help='Significance level for --stats and the --ci bootstrap intervals (default: 0.05)')
+    parser.add_argument('--ci',
+                       help='Confidence intervals for comparison charts: bootstrap or bootstrap:N (N resamples, default 1000)')
+    parser.add_argument('--seed', type=int, default=0,
+                       help='Random seed for bootstrap resampling (default: 0)')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                       help='Number of worker processes for parallel work (default: 1)')
+    parser.add_argument('--sort-by', choices=['pct', 'diff', 'abs-pct'],
+                       help='Rank comparison rows by their largest change against the baseline')
+    parser.add_argument('--top', type=int,
+                       help='Only show the N highest ranked comparison rows, or the N best rows of each group in groupby')
+    parser.add_argument('--by', metavar='EXPR',
+                       help='Ranking expression for groupby --top (defaults to the field of the aggregate, e.g. latency for "max(latency)")')
+    parser.add_argument('--pairs',
+                       help='Compare pairs of versions from a single aggregation: all, or BASELINE:VERSION,... (e.g. A:B,B:C)')
+    parser.add_argument('--matrix', action='store_true',
+                       help='With --pairs, print a versions x versions summary of mean percentage changes')
+    parser.add_argument('--save-baseline', metavar='NAME',
+                       help='Save the per-metric aggregates of the baseline version for later comparisons instead of printing a chart')
+    parser.add_argument('--against-baseline', metavar='NAME',
+                       help='Compare the input against aggregates saved with --save-baseline')
+    parser.add_argument('--rollup', action='store_true',
+                       help='Add groupby subtotals for each prefix of the group by fields and a grand total')
+    parser.add_argument('--grouping-sets', metavar='SETS',
+                       help='Groupby levels to compute, separated by ";" (e.g. "model,n_depth;model;()")')
+    parser.add_argument('--input', '-i', metavar='FILE',
+                       help='Read CSV data from FILE instead of stdin')
+    parser.add_argument('-k', type=int, default=10,
+                       help='Number of most frequent values printed by top (default: 10)')
+    parser.add_argument('--exact', action='store_true',
+                       help='For top with --input: count the candidate values exactly in a second pass')
+    parser.add_argument('--presorted', action='store_true',
+                       help='Input is sorted by the groupby keys: aggregate while reading and print each group when it ends')
+    parser.add_argument('--pretty', '-p', action='store_true',
+                       help='Print query, groupby, describe and top results as an aligned table instead of CSV')
+    parser.add_argument('--col-width', type=int,
+                       help='Maximum column width for tables; wider cells are truncated with "…"')
+    parser.add_argument('--parse-times', action='store_true',
+                       help='Store ISO-8601 timestamp columns as epoch seconds, with a <table>_text view showing them as text')
+    parser.add_argument('--dict-encode', action='store_true',
+                       help='Store low-cardinality text columns as integer codes behind a view with the original columns')
+    parser.add_argument('--numeric-threshold', type=float, default=100.0, metavar='PCT',
+                       help='Treat a column as numeric when at least PCT%% of its non-empty values are numbers, storing the rest as NULL (default: 100)')
+    parser.add_argument('--socket', metavar='PATH',
+                       help='Unix socket the serve command listens on')
+    parser.add_argument('--idle-timeout', type=float, default=3600, metavar='SECONDS',
+                       help='Stop serving after SECONDS without requests (default: 3600, 0 to never stop)')
+    parser.add_argument('--connect', metavar='PATH',
+                       help='Send the command to the uplt serve process listening on PATH instead of reading input')
+    parser.add_argument('--db', metavar='PATH',
+                       help='Run the command on a table of the SQLite database PATH (e.g. saved with --save-db) instead of CSV input')
+    parser.add_argument('--save-db', metavar='PATH',
+                       help='Also save the table loaded from CSV to the SQLite database PATH for later --db runs')
+    parser.add_argument('--index', metavar='COLUMNS',
+                       help='With --save-db, index these columns before saving; indexes separated by ";" (e.g. "model;model,n_depth")')
+    parser.add_argument('--into', metavar='NAME',
+                       help='In a batch (run or ";;"), store the rows of add or filter as table NAME for the next commands')
     
-    args = parser.parse_args()
+    return parser
+
+
+def load_table(args, cursor: sqlite3.Cursor, csv_data: str, header_mode: str):
+    """
+    Create args.table_name from CSV text with the load options of args.
     
-    # Handle backward compatibility: if no command specified, treat as raw SQL
-    if not args.command:
-        print("Error: No command specified. Use 'query' for SQL or a chart type.", file=sys.stderr)
-        parser.print_help()
-        sys.exit(1)
+    Returns:
+        (headers, timestamps, dictionaries): the column names, the columns
+        stored as epoch seconds with --parse-times and the dictionary encoded
+        columns with --dict-encode (None without the option)
+    """
+    if args.verbose:
+        print(f"Creating table '{args.table_name}'...", file=sys.stderr)
+    
+    # Timestamp columns found with --parse-times, mapped to their display format
+    timestamps = {} if args.parse_times else None
+    # Dictionary encoded columns with --dict-encode, mapped to their values
+    dictionaries = {} if args.dict_encode else None
+    nulled = {}
+    headers = create_table_from_csv(cursor, csv_data, args.table_name, header_mode,
+                                    timestamps, dictionaries, args.numeric_threshold / 100, nulled)
+    
+    if args.verbose:
+        print(f"Table created with columns: {', '.join(headers)}", file=sys.stderr)
+        if timestamps:
+            print(f"Stored as epoch seconds: {', '.join(timestamps)}", file=sys.stderr)
+        for column, values in (dictionaries or {}).items():
+            print(f"Dictionary encoded {column}: {len(values)} distinct values", file=sys.stderr)
+        report_nulled(nulled)
+        cursor.execute(f"SELECT COUNT(*) FROM {args.table_name}")
+        count = cursor.fetchone()[0]
+        print(f"Loaded {count} rows", file=sys.stderr)
+    
+    return headers, timestamps, dictionaries
+
+
+def save_table(args, conn: sqlite3.Connection, headers, timestamps=None, dictionaries=None):
+    """Save the loaded table to the database file of --save-db, with the indexes of --index."""
+    from .database import parse_index_spec, save_database
+    
+    indexes = parse_index_spec(args.index) if args.index else None
+    save_database(conn, args.save_db, args.table_name, headers, timestamps, dictionaries, indexes)
+    if args.verbose:
+        print(f"Saved table '{args.table_name}' to {args.save_db}", file=sys.stderr)
+
+
+def database_command(args):
+    """Run a command on a table of the database file of --db."""
+    from .database import open_database
     
+    if is_streaming(args):
+        print("Error: describe, top and --presorted read CSV input; they can't be used with --db",
+              file=sys.stderr)
+        sys.exit(1)
     try:
-        # Read CSV data from stdin
-        if sys.stdin.isatty():
-            print("Error: No input data. Please pipe CSV data to this script.", file=sys.stderr)
-            print("Example: cat data.csv | uplt \"SELECT * FROM data\"", file=sys.stderr)
+        conn, headers, timestamps, dictionaries = open_database(args.db, args.table_name)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    try:
+        run_command(args, conn.cursor(), headers, timestamps, dictionaries)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+def run_command(args, cursor: sqlite3.Cursor, headers, timestamps=None, dictionaries=None):
+    """Run a query, add, filter, groupby or chart command against a loaded table."""
+    # Determine mode and execute
+    command_type = args.command[0]
+    
+    # Map short versions to full commands
+    # Note: 'cmp' and 'comparison' now both map to 'multi-comparison'
+    command_aliases = {
+        'q': 'query',
+        'a': 'add',
+        'f': 'filter',
+        'g': 'groupby',
+        'hm': 'heatmap',
+        'cmp': 'multi-comparison',  # Deprecated: now maps to multi-comparison
+        'comparison': 'multi-comparison',  # Deprecated: now maps to multi-comparison
+        'mcmp': 'multi-comparison'
+    }
+    command_type = command_aliases.get(command_type, command_type)
+    
+    if command_type == "query":
+        # Raw SQL mode
+        if len(args.command) < 2:
+            print("Error: SQL query required after 'query'", file=sys.stderr)
             sys.exit(1)
         
-        csv_data = sys.stdin.read().strip()
+        query = args.command[1]
         
-        if not csv_data:
-            print("Error: No input data received.", file=sys.stderr)
+        if args.pretty:
+            # Stream rows into an aligned table
+            iter_query(cursor, query)
+            if not print_table(cursor, args.col_width) and args.verbose:
+                print("Query returned no results.", file=sys.stderr)
+        else:
+            results = execute_query(cursor, query)
+            
+            # Output results as CSV
+            if results:
+                output = format_output(results, cursor.description)
+                print(output, end='')
+            elif args.verbose:
+                print("Query returned no results.", file=sys.stderr)
+    
+    elif command_type == "add":
+        # Add column mode
+        if len(args.command) < 2:
+            print("Error: Column expression required after 'add'", file=sys.stderr)
             sys.exit(1)
         
-        # Create in-memory SQLite database
-        conn = sqlite3.connect(':memory:')
-        cursor = conn.cursor()
+        column_expr = args.command[1]
+        
+        # Get original column names
+        original_columns = headers
+        
+        # Build query to select all columns plus the new ones
+        from .query_builder import added_column_names, build_add_query
+        query = build_add_query(args.table_name, headers, column_expr, timestamps)
         
-        # Create and populate table
         if args.verbose:
-            print(f"Creating table '{args.table_name}'...", file=sys.stderr)
+            print(f"Generated query: {query}", file=sys.stderr)
         
-        # Determine header mode
-        if args.header:
-            header_mode = 'yes'
-        elif args.no_header:
-            header_mode = 'no'
-        else:
-            header_mode = 'auto'
+        results = execute_query(cursor, query)
+        
+        # Output results as CSV with headers
+        if results:
+            # Output headers
+            all_headers = original_columns + added_column_names(column_expr, original_columns)
+            print(','.join(all_headers))
+            
+            # Output data
+            for row in results:
+                print(format_csv_row(row))
+        elif args.verbose:
+            print("Query returned no results.", file=sys.stderr)
+    
+    elif command_type == "filter":
+        # Filter rows mode
+        if len(args.command) < 2:
+            print("Error: Filter expression required after 'filter'", file=sys.stderr)
+            sys.exit(1)
+        
+        filter_expr = args.command[1]
         
-        headers = create_table_from_csv(cursor, csv_data, args.table_name, header_mode)
+        # Build query to select all rows that match the filter
+        from .query_builder import build_filter_query
+        query = build_filter_query(args.table_name, headers, filter_expr, timestamps)
         
         if args.verbose:
-            print(f"Table created with columns: {', '.join(headers)}", file=sys.stderr)
-            cursor.execute(f"SELECT COUNT(*) FROM {args.table_name}")
-            count = cursor.fetchone()[0]
-            print(f"Loaded {count} rows", file=sys.stderr)
+            print(f"Generated query: {query}", file=sys.stderr)
+        
+        results = execute_query(cursor, query)
+        
+        # Always output headers for filter command
+        print(','.join(headers))
         
-        # Determine mode and execute
-        command_type = args.command[0]
+        # Output data if any results
+        if results:
+            for row in results:
+                print(format_csv_row(row))
+        elif args.verbose:
+            print("Filter returned no matching rows.", file=sys.stderr)
+    
+    elif command_type == "groupby" and args.top is not None and len(args.command) >= 2:
+        # Best rows per group instead of aggregates
+        print_top_rows(cursor, args, headers, split_expressions(args.command[1]), timestamps)
+    
+    elif command_type == "groupby":
+        # Group by mode
+        from .query_builder import (
+            GROUPING_PARTIALS_TABLE,
+            aggregate_fields,
+            build_groupby_query,
+            build_grouping_sets_query,
+            is_aggregate_shortcut,
+            parse_grouping_sets,
+            rollup_sets,
+        )
+        
+        if len(args.command) < 2:
+            print("Error: Group by fields required after 'groupby'", file=sys.stderr)
+            sys.exit(1)
         
-        # Map short versions to full commands
-        # Note: 'cmp' and 'comparison' now both map to 'multi-comparison'
-        command_aliases = {
-            'q': 'query',
-            'a': 'add',
-            'f': 'filter',
-            'g': 'groupby',
-            'hm': 'heatmap',
-            'cmp': 'multi-comparison',  # Deprecated: now maps to multi-comparison
-            'comparison': 'multi-comparison',  # Deprecated: now maps to multi-comparison
-            'mcmp': 'multi-comparison'
-        }
-        command_type = command_aliases.get(command_type, command_type)
+        # Parse group by fields (comma-separated, respecting parentheses)
+        raw_groupby_fields = split_expressions(args.command[1])
+        groupby_expressions = [parse_field_with_alias(field)[0] for field in raw_groupby_fields]
         
-        if command_type == "query":
-            # Raw SQL mode
-            if len(args.command) < 2:
-                print("Error: SQL query required after 'query'", file=sys.stderr)
+        # Parse aggregations if provided; default to avg on all numeric columns
+        agg_spec = args.command[2] if len(args.command) >= 3 else 'avg'
+        numeric_columns = None
+        if is_aggregate_shortcut(agg_spec):
+            # Aggregate all numeric columns (excluding groupby fields) with the same function
+            candidates = [col for col in headers
+                          if col not in groupby_expressions and col not in (timestamps or {})]
+            numeric_columns = sample_numeric_columns(cursor, args.table_name, candidates)
+            if not numeric_columns:
+                print("Error: No numeric columns found to aggregate", file=sys.stderr)
                 sys.exit(1)
+        agg_expressions = aggregate_fields(agg_spec, numeric_columns)
+        
+        # Build the GROUP BY query
+        if args.rollup or args.grouping_sets:
+            key_names = [alias or expr for expr, alias in map(parse_field_with_alias, raw_groupby_fields)]
+            aggregates = [parse_field_with_alias(expr) for expr in agg_expressions]
+            if args.grouping_sets:
+                grouping_sets = parse_grouping_sets(args.grouping_sets, key_names)
+            else:
+                grouping_sets = rollup_sets(len(groupby_expressions))
             
-            query = args.command[1]
+            partials_query, query = build_grouping_sets_query(
+                args.table_name, groupby_expressions, key_names,
+                [expr for expr, _ in aggregates],
+                [alias or expr for expr, alias in aggregates],
+                grouping_sets
+            )
+            if partials_query:
+                # One scan computes the finest level; coarser levels merge its partials
+                partials_query = f"CREATE TEMP TABLE {GROUPING_PARTIALS_TABLE} AS {partials_query}"
+                if args.verbose:
+                    print(f"Generated query: {partials_query}", file=sys.stderr)
+                execute_query(cursor, f"DROP TABLE IF EXISTS temp.{GROUPING_PARTIALS_TABLE}")
+                execute_query(cursor, partials_query)
+            elif args.verbose:
+                print("Aggregates can't be merged across levels; each level scans the table",
+                      file=sys.stderr)
+        else:
+            query = build_groupby_query(args.table_name, raw_groupby_fields, agg_expressions,
+                                        timestamps, dictionaries)
+        
+        if args.verbose:
+            print(f"Generated query: {query}", file=sys.stderr)
+            print(f"Numeric columns found: {', '.join(numeric_columns) if numeric_columns else 'N/A'}", file=sys.stderr)
+        
+        if args.pretty:
+            # Stream groups into an aligned table
+            iter_query(cursor, query)
+            if not print_table(cursor, args.col_width) and args.verbose:
+                print("Query returned no results.", file=sys.stderr)
+        else:
             results = execute_query(cursor, query)
             
             # Output results as CSV
@@ -121,261 +798,216 @@ def main():
                 print(output, end='')
             elif args.verbose:
                 print("Query returned no results.", file=sys.stderr)
+    
+    else:
+        # Chart mode
+        from .query_builder import parse_chart_command
         
-        elif command_type == "add":
-            # Add column mode
-            if len(args.command) < 2:
-                print("Error: Column expression required after 'add'", file=sys.stderr)
-                sys.exit(1)
-            
-            column_expr = args.command[1]
+        try:
+            # Create modified command list with mapped chart type
+            mapped_command = [command_type] + args.command[1:]
+            chart_type, options = parse_chart_command(mapped_command)
             
-            # Get original column names
-            original_columns = headers
-            
-            # Build query to select all columns plus the new one
-            query = f"SELECT *, {column_expr} FROM {args.table_name}"
-            
-            if args.verbose:
-                print(f"Generated query: {query}", file=sys.stderr)
-            
-            results = execute_query(cursor, query)
-            
-            # Output results as CSV with headers
-            if results:
-                # Parse multiple column expressions (comma-separated, respecting parentheses)
-                raw_expressions = split_expressions(column_expr)
-                new_column_names = []
-                
-                for i, expr in enumerate(raw_expressions):
-                    expr_parsed, alias = parse_field_with_alias(expr)
-                    if alias:
-                        new_column_names.append(alias)
-                    else:
-                        # Default name if no alias provided
-                        new_column_names.append(f"expr_{len(original_columns)+i+1}")
+            # Build appropriate query based on chart type
+            if chart_type == "heatmap":
+                # Import here to avoid circular dependency
+                from .charts import create_heatmap
                 
-                # Output headers
-                all_headers = original_columns + new_column_names
-                print(','.join(all_headers))
+                chart = create_heatmap(
+                    cursor,
+                    options["x_field"],
+                    options["y_field"],
+                    options["value_field"],
+                    args.table_name,
+                    verbose=args.verbose,
+                    x_time=is_time_expression(options["x_field"], timestamps),
+                    y_time=is_time_expression(options["y_field"], timestamps)
+                )
                 
-                # Output data
-                for row in results:
-                    # Format each value appropriately
-                    formatted_values = []
-                    for val in row:
-                        if val is None:
-                            formatted_values.append('')
-                        elif isinstance(val, str) and (',' in val or '"' in val or '\n' in val):
-                            # Escape quotes and wrap in quotes if needed
-                            escaped = val.replace('"', '""')
-                            formatted_values.append(f'"{escaped}"')
-                        else:
-                            formatted_values.append(str(val))
-                    print(','.join(formatted_values))
-            elif args.verbose:
-                print("Query returned no results.", file=sys.stderr)
-        
-        elif command_type == "filter":
-            # Filter rows mode
-            if len(args.command) < 2:
-                print("Error: Filter expression required after 'filter'", file=sys.stderr)
-                sys.exit(1)
-            
-            filter_expr = args.command[1]
-            
-            # Build query to select all rows that match the filter
-            query = f"SELECT * FROM {args.table_name} WHERE {filter_expr}"
-            
-            if args.verbose:
-                print(f"Generated query: {query}", file=sys.stderr)
-            
-            results = execute_query(cursor, query)
-            
-            # Always output headers for filter command
-            print(','.join(headers))
-            
-            # Output data if any results
-            if results:
-                for row in results:
-                    # Format each value appropriately
-                    formatted_values = []
-                    for val in row:
-                        if val is None:
-                            formatted_values.append('')
-                        elif isinstance(val, str) and (',' in val or '"' in val or '\n' in val):
-                            # Escape quotes and wrap in quotes if needed
-                            escaped = val.replace('"', '""')
-                            formatted_values.append(f'"{escaped}"')
-                        else:
-                            formatted_values.append(str(val))
-                    print(','.join(formatted_values))
-            elif args.verbose:
-                print("Filter returned no matching rows.", file=sys.stderr)
-        
-        elif command_type == "groupby":
-            # Group by mode
-            if len(args.command) < 2:
-                print("Error: Group by fields required after 'groupby'", file=sys.stderr)
-                sys.exit(1)
-            
-            # Parse group by fields (comma-separated, respecting parentheses)
-            raw_groupby_fields = split_expressions(args.command[1])
-            
-            # Parse each field for potential aliases
-            groupby_fields = []
-            groupby_expressions = []
-            for field in raw_groupby_fields:
-                expr, alias = parse_field_with_alias(field)
-                groupby_expressions.append(expr)
-                if alias:
-                    groupby_fields.append(f"{expr} as {alias}")
+                if chart:
+                    print(chart)
                 else:
-                    groupby_fields.append(expr)
-            
-            # Parse aggregations if provided
-            if len(args.command) >= 3:
-                agg_spec = args.command[2]
+                    print("No data to plot.", file=sys.stderr)
+            elif chart_type == "multi-comparison":
+                # Import here to avoid circular dependency
+                from .charts import iter_multi_comparison
                 
-                # Check if it's a shortcut (single function name like 'avg', 'sum', etc.)
-                if agg_spec.lower() in ['avg', 'sum', 'min', 'max', 'count']:
-                    # Aggregate all numeric columns with the same function
-                    agg_func = agg_spec.lower()
-                    
-                    # Find numeric columns (excluding groupby fields)
-                    numeric_columns = []
-                    for col in headers:
-                        if col not in groupby_expressions:
-                            # Check if column has numeric values
-                            check_query = f"SELECT {col} FROM {args.table_name} WHERE {col} IS NOT NULL LIMIT 10"
-                            sample_results = execute_query(cursor, check_query)
-                            if sample_results:
-                                # Check if values are numeric
-                                is_numeric = True
-                                for row in sample_results:
-                                    try:
-                                        float(row[0])
-                                    except (ValueError, TypeError):
-                                        is_numeric = False
-                                        break
-                                if is_numeric:
-                                    numeric_columns.append(col)
-                    
-                    if not numeric_columns:
-                        print("Error: No numeric columns found to aggregate", file=sys.stderr)
-                        sys.exit(1)
-                    
-                    # Build aggregation expressions
-                    agg_expressions = [f"{agg_func}({col}) as {col}_{agg_func}" for col in numeric_columns]
-                else:
-                    # Full syntax: parse comma-separated aggregation expressions
-                    raw_agg_expressions = split_expressions(agg_spec)
-                    # Parse each aggregation expression for potential aliases
-                    agg_expressions = []
-                    for agg_expr in raw_agg_expressions:
-                        expr, alias = parse_field_with_alias(agg_expr)
-                        if alias:
-                            agg_expressions.append(f"{expr} as {alias}")
-                        else:
-                            agg_expressions.append(expr)
-            else:
-                # No aggregation specified - default to avg on all numeric columns
-                agg_func = 'avg'
+                # Show time versions and metrics as ISO-8601 text, which sorts chronologically
+                for field in ("versions_field", "metrics_field"):
+                    options[field] = display_expression(options[field], timestamps) or options[field]
                 
-                # Find numeric columns (excluding groupby fields)
-                numeric_columns = []
-                for col in headers:
-                    if col not in groupby_expressions:
-                        # Check if column has numeric values
-                        check_query = f"SELECT {col} FROM {args.table_name} WHERE {col} IS NOT NULL LIMIT 10"
-                        sample_results = execute_query(cursor, check_query)
-                        if sample_results:
-                            # Check if values are numeric
-                            is_numeric = True
-                            for row in sample_results:
-                                try:
-                                    float(row[0])
-                                except (ValueError, TypeError):
-                                    is_numeric = False
-                                    break
-                            if is_numeric:
-                                numeric_columns.append(col)
+                # Print lines as they are produced instead of building the whole chart
+                printed = False
+                for line in iter_multi_comparison(
+                    cursor,
+                    options["versions_field"],
+                    options["metrics_field"],
+                    options["value_field"],
+                    args.table_name,
+                    verbose=args.verbose,
+                    display_mode=args.display_mode,
+                    baseline=args.baseline,
+                    max_width=args.col_width,
+                    stats=args.stats,
+                    alpha=args.alpha,
+                    ci=args.ci,
+                    seed=args.seed,
+                    jobs=args.jobs,
+                    sort_by=args.sort_by,
+                    top=args.top,
+                    pairs=args.pairs,
+                    matrix=args.matrix,
+                    save_baseline=args.save_baseline,
+                    against_baseline=args.against_baseline
+                ):
+                    print(line)
+                    printed = True
                 
-                if not numeric_columns:
-                    print("Error: No numeric columns found to aggregate", file=sys.stderr)
-                    sys.exit(1)
+                if not printed:
+                    print("No data to compare.", file=sys.stderr)
+            else:
+                print(f"Chart type '{chart_type}' not yet implemented", file=sys.stderr)
+                sys.exit(1)
                 
-                # Build aggregation expressions
-                agg_expressions = [f"{agg_func}({col}) as {col}_{agg_func}" for col in numeric_columns]
-            
-            # Build the GROUP BY query
-            select_parts = groupby_fields + agg_expressions
-            query = f"SELECT {', '.join(select_parts)} FROM {args.table_name} GROUP BY {', '.join(groupby_expressions)} ORDER BY {', '.join(groupby_expressions)}"
-            
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+
+
+def main():
+    parser = build_parser()
+    argv = sys.argv[1:]
+    # Commands separated by ";;" run as a batch; options of the first one apply to all
+    batch = ';;' in argv
+    if batch:
+        from .batch import split_commands
+        segments = split_commands(argv)
+        args = parser.parse_intermixed_args(segments[0])
+    else:
+        segments = [argv]
+        args = parser.parse_intermixed_args(argv)
+    
+    # Handle backward compatibility: if no command specified, treat as raw SQL
+    if not args.command:
+        print("Error: No command specified. Use 'query' for SQL or a chart type.", file=sys.stderr)
+        parser.print_help()
+        sys.exit(1)
+    
+    batch = batch or args.command[0] == "run"
+    if args.connect and batch:
+        print("Error: Batches can't be sent to a server; send each command with --connect", file=sys.stderr)
+        sys.exit(1)
+    if args.into and not batch:
+        print("Error: --into only applies to commands of a batch (run or \";;\")", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.connect:
+        # The server has the data loaded; it validates and runs the command
+        from .server import send_command
+        sys.exit(send_command(args.connect, sys.argv[1:]))
+    
+    if not 0 < args.numeric_threshold <= 100:
+        print("Error: --numeric-threshold must be greater than 0 and at most 100", file=sys.stderr)
+        sys.exit(1)
+    check_options(args)
+    
+    if args.command[0] == "serve":
+        if args.db:
+            print("Error: serve loads CSV files; --db can't be combined with it", file=sys.stderr)
+            sys.exit(1)
+        from .server import serve
+        try:
+            serve(args, args.command[1:] or ([args.input] if args.input else []))
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+    
+    if args.db:
+        if args.input or args.save_db:
+            print("Error: --db can't be combined with --input or --save-db", file=sys.stderr)
+            sys.exit(1)
+        if not batch:
+            database_command(args)
+            return
+    if args.index and not args.save_db:
+        print("Error: --index only applies with --save-db", file=sys.stderr)
+        sys.exit(1)
+    
+    if batch:
+        from .batch import run_batch
+        try:
+            run_batch(parser, args, segments)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+    
+    try:
+        # Read CSV data from --input or stdin
+        if not args.input and sys.stdin.isatty():
+            print("Error: No input data. Please pipe CSV data to this script.", file=sys.stderr)
+            print("Example: cat data.csv | uplt \"SELECT * FROM data\"", file=sys.stderr)
+            sys.exit(1)
+        
+        header_mode = get_header_mode(args)
+        source = open(args.input, newline='') if args.input else sys.stdin
+        
+        # Streaming commands read the input row by row instead of loading it into SQLite;
+        # with --save-db every command loads the table so it can be saved
+        streaming = is_streaming(args) and not args.save_db
+        # Row-local add/filter over a file can run in chunks across processes
+        chunked = (
+            args.input and not args.save_db and args.jobs > 1 and args.command[0] in ("add", "a", "filter", "f")
+            and len(args.command) >= 2 and not args.parse_times and args.numeric_threshold == 100
+        )
+        if chunked:
+            from .query_builder import is_row_local
+            chunked = is_row_local(args.command[1])
+        if streaming or chunked:
+            with source:
+                if chunked:
+                    parallel_rows_command(args, source, header_mode)
+                else:
+                    streaming_command(args, source, header_mode)
+            return
+        
+        with source:
+            csv_data = source.read().strip()
+        
+        if not csv_data:
+            print("Error: No input data received.", file=sys.stderr)
+            sys.exit(1)
+        
+        # Create in-memory SQLite database
+        conn = sqlite3.connect(':memory:')
+        register_aggregates(conn)
+        cursor = conn.cursor()
+        
+        # Groupby with --jobs aggregates partitions of the rows in worker processes
+        if (args.jobs > 1 and not args.save_db and args.command[0] in ("groupby", "g")
+                and len(args.command) >= 2 and not (args.rollup or args.grouping_sets or args.top is not None or args.parse_times)):
+            if parallel_groupby_command(args, cursor, csv_data, header_mode):
+                conn.close()
+                return
             if args.verbose:
-                print(f"Generated query: {query}", file=sys.stderr)
-                print(f"Numeric columns found: {', '.join(numeric_columns) if 'numeric_columns' in locals() else 'N/A'}", file=sys.stderr)
-            
-            results = execute_query(cursor, query)
-            
-            # Output results as CSV
-            if results:
-                output = format_output(results, cursor.description)
-                print(output, end='')
-            elif args.verbose:
-                print("Query returned no results.", file=sys.stderr)
+                print("Aggregates can't be split into partials; grouping in one process",
+                      file=sys.stderr)
         
+        # Simple add/filter expressions are evaluated in Python without loading SQLite
+        if (args.command[0] in ("add", "a", "filter", "f") and len(args.command) >= 2
+                and not args.parse_times and not args.save_db and compiled_rows_command(args, csv_data, header_mode)):
+            conn.close()
+            return
+        
+        headers, timestamps, dictionaries = load_table(args, cursor, csv_data, header_mode)
+        if args.save_db:
+            save_table(args, conn, headers, timestamps, dictionaries)
+        if is_streaming(args):
+            import io
+            streaming_command(args, io.StringIO(csv_data), header_mode)
         else:
-            # Chart mode
-            try:
-                # Create modified command list with mapped chart type
-                mapped_command = [command_type] + args.command[1:]
-                chart_type, options = parse_chart_command(mapped_command)
-                
-                # Build appropriate query based on chart type
-                if chart_type == "heatmap":
-                    # Import here to avoid circular dependency
-                    from .charts import create_heatmap
-                    
-                    chart = create_heatmap(
-                        cursor,
-                        options["x_field"],
-                        options["y_field"],
-                        options["value_field"],
-                        args.table_name,
-                        verbose=args.verbose
-                    )
-                    
-                    if chart:
-                        print(chart)
-                    else:
-                        print("No data to plot.", file=sys.stderr)
-                elif chart_type == "multi-comparison":
-                    # Import here to avoid circular dependency
-                    from .charts import create_multi_comparison
-                    
-                    chart = create_multi_comparison(
-                        cursor,
-                        options["versions_field"],
-                        options["metrics_field"],
-                        options["value_field"],
-                        args.table_name,
-                        verbose=args.verbose,
-                        display_mode=args.display_mode,
-                        baseline=args.baseline
-                    )
-                    
-                    if chart:
-                        print(chart)
-                    else:
-                        print("No data to compare.", file=sys.stderr)
-                else:
-                    print(f"Chart type '{chart_type}' not yet implemented", file=sys.stderr)
-                    sys.exit(1)
-                    
-            except ValueError as e:
-                print(f"Error: {e}", file=sys.stderr)
-                sys.exit(1)
+            run_command(args, cursor, headers, timestamps, dictionaries)
         
         conn.close()
         
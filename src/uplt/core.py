@@ -1,8 +1,21 @@
+from __future__ import annotations
+
 import sqlite3
 import csv
 import io
+import itertools
 import re
-from typing import List, Any, Optional, Tuple
+
+# typing costs more to import than the rest of this module; annotations are
+# only evaluated by type checkers
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Dict, Iterable, Iterator, List, Any, Optional, TextIO, Tuple
+
+# ' as ' between an expression and its alias
+_ALIAS_SEPARATOR = re.compile(r'\s+[aA][sS]\s+', re.IGNORECASE)
+
+_NON_WORD = re.compile(r'[^\w]')
 
 
 def split_expressions(expr_string: str) -> List[str]:
@@ -63,12 +76,8 @@ def parse_field_with_alias(field_expr: str) -> Tuple[str, Optional[str]]:
     Returns:
         Tuple of (expression, alias) where alias is None if not specified
     """
-    # Case-insensitive match for ' as ' or ' AS '
-    # Use negative lookbehind to avoid matching 'as' within function names
-    as_pattern = re.compile(r'\s+[aA][sS]\s+', re.IGNORECASE)
-    
     # Find the last occurrence of ' as ' to handle cases where AS might appear in the expression
-    matches = list(as_pattern.finditer(field_expr))
+    matches = list(_ALIAS_SEPARATOR.finditer(field_expr))
     
     if matches:
         # Use the last match to split
@@ -104,7 +113,7 @@ def detect_delimiter(sample: str) -> str:
 def sanitize_column_name(name: str) -> str:
     """Sanitize column names to be valid SQL identifiers."""
     # Replace spaces and special characters with underscores
-    sanitized = re.sub(r'[^\w]', '_', str(name).strip())
+    sanitized = _NON_WORD.sub('_', str(name).strip())
     # Ensure it doesn't start with a number
     if sanitized and sanitized[0].isdigit():
         sanitized = 'col_' + sanitized
@@ -114,8 +123,15 @@ def sanitize_column_name(name: str) -> str:
     return sanitized
 
 
-def infer_column_type(values: List[Any]) -> str:
-    """Infer the SQL column type based on the values."""
+def infer_column_type(values: List[Any], numeric_threshold: float = 1.0) -> str:
+    """Infer the SQL column type based on the values.
+    
+    Args:
+        values: Column values
+        numeric_threshold: Share of non-empty values (0-1] that must be numbers
+            for the column to be numeric; the rest are stray values that
+            null_stray_values turns into NULL
+    """
     # Remove None/empty values for type inference
     non_empty_values = [v for v in values if v is not None and str(v).strip()]
     
@@ -138,6 +154,24 @@ def infer_column_type(values: List[Any]) -> str:
     except ValueError:
         pass
     
+    if numeric_threshold < 1.0:
+        # Mostly numeric: the type of the numbers, ignoring stray tokens
+        numbers = 0
+        integers = True
+        for val in non_empty_values:
+            try:
+                float(str(val))
+            except ValueError:
+                continue
+            numbers += 1
+            if integers:
+                try:
+                    int(str(val))
+                except ValueError:
+                    integers = False
+        if numbers and numbers >= numeric_threshold * len(non_empty_values):
+            return 'INTEGER' if integers else 'REAL'
+    
     return 'TEXT'
 
 
@@ -188,77 +222,152 @@ def auto_detect_headers(rows: List[List[str]]) -> bool:
     return first_numeric_count < second_numeric_count
 
 
-def create_table_from_csv(cursor: sqlite3.Cursor, csv_data: str, table_name: str = 'data', header_mode: Optional[str] = None) -> List[str]:
-    """Create and populate an SQLite table from CSV data.
+def parse_csv(csv_data: str, header_mode: Optional[str] = None) -> Tuple[List[str], List[List[str]]]:
+    """Parse CSV text into column names and data rows.
     
     Args:
-        cursor: SQLite cursor
         csv_data: CSV data as string
-        table_name: Name for the created table
         header_mode: 'auto' (default), 'yes', or 'no' for header detection
     
     Returns:
-        List of column names
+        Tuple of (column names, data rows)
     """
-    
     # Detect delimiter
     delimiter = detect_delimiter(csv_data)
     
     # Parse CSV
     csv_reader = csv.reader(io.StringIO(csv_data), delimiter=delimiter)
     
+    # Read all rows first
+    all_rows = list(csv_reader)
+    
+    if not all_rows:
+        raise ValueError("No data found in CSV")
+    
+    # Determine headers and data rows
+    if header_mode is None or header_mode == 'auto':
+        # Auto-detect headers
+        has_headers = auto_detect_headers(all_rows)
+    elif header_mode == 'yes':
+        has_headers = True
+    elif header_mode == 'no':
+        has_headers = False
+    else:
+        raise ValueError(f"Invalid header_mode: {header_mode}")
+    
+    if not has_headers:
+        # Generate column names f1, f2, ..., fn
+        num_columns = len(all_rows[0])
+        headers = [f"f{i+1}" for i in range(num_columns)]
+        rows = all_rows
+    else:
+        # First row contains headers
+        headers = [sanitize_column_name(h) for h in all_rows[0]]
+        rows = all_rows[1:]
+    
+    if not rows:
+        raise ValueError("No data rows found in CSV")
+    
+    return headers, rows
+
+
+def infer_column_types(headers: List[str], rows: List[List[str]], numeric_threshold: float = 1.0) -> List[str]:
+    """Infer the SQL type of every column from all of its values."""
+    return [
+        infer_column_type([row[i] if i < len(row) else None for row in rows], numeric_threshold)
+        for i in range(len(headers))
+    ]
+
+
+def null_stray_values(rows: List[List[str]], types: List[str]) -> Dict[int, int]:
+    """Replace values of numeric columns that aren't numbers with None, in place.
+    
+    Returns:
+        Number of values nulled per column index, for columns that had any
+    """
+    nulled = {}
+    for i, col_type in enumerate(types):
+        if col_type not in ('INTEGER', 'REAL'):
+            continue
+        count = 0
+        for row in rows:
+            if i < len(row) and row[i] is not None and row[i].strip():
+                try:
+                    float(row[i])
+                except ValueError:
+                    row[i] = None
+                    count += 1
+        if count:
+            nulled[i] = count
+    return nulled
+
+
+def insert_rows(cursor: sqlite3.Cursor, table_name: str, width: int, rows: Iterable[List[str]]):
+    """Insert CSV rows, padding short rows with NULL and truncating long ones."""
+    placeholders = ', '.join(['?' for _ in range(width)])
+    cursor.executemany(
+        f"INSERT INTO {table_name} VALUES ({placeholders})",
+        ((row + [None] * (width - len(row)))[:width] for row in rows)
+    )
+
+
+def create_table_from_csv(cursor: sqlite3.Cursor, csv_data: str, table_name: str = 'data', header_mode: Optional[str] = None,
+                          timestamps: Optional[Dict[str, str]] = None,
+                          dictionaries: Optional[Dict[str, List[str]]] = None,
+                          numeric_threshold: float = 1.0,
+                          nulled: Optional[Dict[str, int]] = None) -> List[str]:
+    """Create and populate an SQLite table from CSV data.
+    
+    Args:
+        cursor: SQLite cursor
+        csv_data: CSV data as string
+        table_name: Name for the created table
+        header_mode: 'auto' (default), 'yes', or 'no' for header detection
+        timestamps: If given, ISO-8601 columns are stored as epoch seconds,
+            a {table_name}_text view shows them as text, and each converted
+            column is added to this dict with its strftime() display format
+        dictionaries: If given, low-cardinality TEXT columns are stored as
+            integer codes behind a {table_name} view (see uplt.dictionary),
+            and each encoded column is added to this dict with its values
+        numeric_threshold: Share of numbers that makes a column numeric (see
+            infer_column_type); stray values in such columns are stored as NULL
+        nulled: If given, receives the number of stray values nulled per column
+    
+    Returns:
+        List of column names
+    """
     try:
-        # Read all rows first
-        all_rows = list(csv_reader)
-        
-        if not all_rows:
-            raise ValueError("No data found in CSV")
-        
-        # Determine headers and data rows
-        if header_mode is None or header_mode == 'auto':
-            # Auto-detect headers
-            has_headers = auto_detect_headers(all_rows)
-        elif header_mode == 'yes':
-            has_headers = True
-        elif header_mode == 'no':
-            has_headers = False
-        else:
-            raise ValueError(f"Invalid header_mode: {header_mode}")
-        
-        if not has_headers:
-            # Generate column names f1, f2, ..., fn
-            num_columns = len(all_rows[0])
-            headers = [f"f{i+1}" for i in range(num_columns)]
-            rows = all_rows
-        else:
-            # First row contains headers
-            headers = [sanitize_column_name(h) for h in all_rows[0]]
-            rows = all_rows[1:]
-        
-        if not rows:
-            raise ValueError("No data rows found in CSV")
-        
-        # Infer column types
-        column_types = []
-        for i, header in enumerate(headers):
-            column_values = [row[i] if i < len(row) else None for row in rows]
-            col_type = infer_column_type(column_values)
-            column_types.append(f"{header} {col_type}")
+        headers, rows = parse_csv(csv_data, header_mode)
         
         # Create table
-        create_sql = f"CREATE TABLE {table_name} ({', '.join(column_types)})"
-        cursor.execute(create_sql)
-        
-        # Insert data
-        placeholders = ', '.join(['?' for _ in headers])
-        insert_sql = f"INSERT INTO {table_name} VALUES ({placeholders})"
+        column_types = infer_column_types(headers, rows, numeric_threshold)
+        if numeric_threshold < 1.0:
+            strays = null_stray_values(rows, column_types)
+            if nulled is not None:
+                nulled.update((headers[i], count) for i, count in strays.items())
+        if timestamps is not None:
+            from .timeparse import convert_timestamp_columns
+            formats = convert_timestamp_columns(rows, column_types)
+            timestamps.update((headers[i], fmt) for i, fmt in formats.items())
+        if dictionaries is not None:
+            from .dictionary import codes_table, create_encoded_table, encode_columns
+            encoded = encode_columns(rows, column_types)
+            dictionaries.update((headers[i], values) for i, values in encoded.items())
+            create_encoded_table(cursor, table_name, headers, column_types, encoded)
+            insert_rows(cursor, codes_table(table_name), len(headers), rows)
+        else:
+            columns = ', '.join(f"{header} {col_type}" for header, col_type in zip(headers, column_types))
+            cursor.execute(f"CREATE TABLE {table_name} ({columns})")
+            
+            # Insert data
+            insert_rows(cursor, table_name, len(headers), rows)
         
-        for row in rows:
-            # Pad row with None if it has fewer columns than headers
-            padded_row = row + [None] * (len(headers) - len(row))
-            # Truncate row if it has more columns than headers
-            padded_row = padded_row[:len(headers)]
-            cursor.execute(insert_sql, padded_row)
+        if timestamps is not None:
+            from .timeparse import display_columns
+            cursor.execute(
+                f"CREATE VIEW {table_name}_text AS "
+                f"SELECT {display_columns(headers, timestamps)} FROM {table_name}"
+            )
         
         return headers
         
@@ -266,6 +375,50 @@ def create_table_from_csv(cursor: sqlite3.Cursor, csv_data: str, table_name: str
         raise ValueError(f"Error parsing CSV: {e}")
 
 
+def open_csv_stream(stream: TextIO, header_mode: Optional[str] = None,
+                    delimiter: Optional[str] = None) -> Tuple[List[str], Iterator[List[str]]]:
+    """Read CSV rows lazily from a text stream.
+    
+    Delimiter and header detection follow create_table_from_csv but only look
+    at the first few lines, so the input is never held in memory at once.
+    Blank lines are skipped.
+    
+    Args:
+        stream: Text stream such as sys.stdin or an open file
+        header_mode: 'auto' (default), 'yes', or 'no' for header detection
+        delimiter: Optional delimiter; detected from the first lines if not given
+    
+    Returns:
+        Tuple of (column names, iterator over the remaining data rows)
+    """
+    sample = list(itertools.islice(stream, 5))
+    if not delimiter:
+        delimiter = detect_delimiter(''.join(sample))
+    
+    reader = csv.reader(itertools.chain(sample, stream), delimiter=delimiter)
+    rows = (row for row in reader if row)
+    peeked = list(itertools.islice(rows, 2))
+    if not peeked:
+        raise ValueError("No data found in CSV")
+    
+    if header_mode is None or header_mode == 'auto':
+        has_headers = auto_detect_headers(peeked)
+    elif header_mode == 'yes':
+        has_headers = True
+    elif header_mode == 'no':
+        has_headers = False
+    else:
+        raise ValueError(f"Invalid header_mode: {header_mode}")
+    
+    if has_headers:
+        headers = [sanitize_column_name(h) for h in peeked[0]]
+        peeked = peeked[1:]
+    else:
+        headers = [f"f{i+1}" for i in range(len(peeked[0]))]
+    
+    return headers, itertools.chain(peeked, rows)
+
+
 def execute_query(cursor: sqlite3.Cursor, query: str) -> List[Tuple]:
     """Execute SQL query and return results."""
     try:
@@ -275,6 +428,64 @@ def execute_query(cursor: sqlite3.Cursor, query: str) -> List[Tuple]:
         raise ValueError(f"SQL Error: {e}")
 
 
+def is_numeric_sample(values: Iterable[Any], sample_size: int = 10) -> bool:
+    """Whether the first sample_size non-NULL values are all numbers; False without any."""
+    sample = list(itertools.islice((value for value in values if value is not None), sample_size))
+    if not sample:
+        return False
+    try:
+        for value in sample:
+            float(value)
+    except (ValueError, TypeError):
+        return False
+    return True
+
+
+def sample_numeric_columns(cursor: sqlite3.Cursor, table_name: str, columns: Iterable[str],
+                           sample_size: int = 10) -> List[str]:
+    """Columns whose first sample_size non-NULL values are all numbers."""
+    return [
+        col for col in columns
+        if is_numeric_sample((row[0] for row in execute_query(
+            cursor, f"SELECT {col} FROM {table_name} WHERE {col} IS NOT NULL LIMIT {sample_size}"
+        )), sample_size)
+    ]
+
+
+def sample_numeric_row_columns(headers: List[str], rows: List[List[str]], columns: Iterable[str],
+                               sample_size: int = 10) -> List[str]:
+    """Columns of CSV rows that sample_numeric_columns would pick once the rows are loaded."""
+    numeric_columns = []
+    for col in columns:
+        i = headers.index(col)
+        if is_numeric_sample((row[i] if i < len(row) else None for row in rows), sample_size):
+            numeric_columns.append(col)
+    return numeric_columns
+
+
+def iter_query(cursor: sqlite3.Cursor, query: str) -> sqlite3.Cursor:
+    """Execute SQL query and return the cursor for streaming its rows."""
+    try:
+        return cursor.execute(query)
+    except sqlite3.Error as e:
+        raise ValueError(f"SQL Error: {e}")
+
+
+def format_csv_row(row: Iterable[Any]) -> str:
+    """Format one result row as a CSV line, quoting text that needs it."""
+    formatted_values = []
+    for val in row:
+        if val is None:
+            formatted_values.append('')
+        elif isinstance(val, str) and (',' in val or '"' in val or '\n' in val):
+            # Escape quotes and wrap in quotes if needed
+            escaped = val.replace('"', '""')
+            formatted_values.append(f'"{escaped}"')
+        else:
+            formatted_values.append(str(val))
+    return ','.join(formatted_values)
+
+
 def format_output(results: List[Tuple], description: List[Tuple]) -> str:
     """Format query results as CSV."""
     if not results:
@@ -0,0 +1,140 @@
+"""SQLite database files as uplt input and output.
+
+--save-db copies the in-memory database built from CSV input to a file with
+SQLite's online backup, optionally indexing columns first. --db runs
+commands on such a file (or any SQLite database) directly, opened read-only
+and memory-mapped, so large inputs are converted from CSV once.
+
+The uplt_tables table of a saved file records which columns were stored as
+epoch seconds (--parse-times) or as dictionary codes (--dict-encode), so a
+later --db run treats them as the CSV run did.
+"""
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+import sqlite3
+
+from .aggregates import register_aggregates
+from .dictionary import codes_table, dictionary_table
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Dict, List, Optional, Tuple
+
+_META = "uplt_tables"
+
+# Upper bound of the memory map; SQLite also caps it (2 GB by default)
+MAX_MMAP_SIZE = 1 << 40
+
+
+def parse_index_spec(spec: str) -> List[List[str]]:
+    """Column lists of --index: indexes separated by ';', columns by ','."""
+    indexes = []
+    for part in spec.split(';'):
+        columns = [column.strip() for column in part.split(',') if column.strip()]
+        if not columns:
+            raise ValueError(f"Empty index in --index '{spec}'")
+        indexes.append(columns)
+    return indexes
+
+
+def save_database(conn: sqlite3.Connection, path: str, table_name: str, headers: List[str],
+                  timestamps: Optional[Dict[str, str]] = None,
+                  dictionaries: Optional[Dict[str, List[str]]] = None,
+                  indexes: Optional[List[List[str]]] = None):
+    """
+    Write the database of conn to path, replacing the file's contents.
+
+    Args:
+        conn: Connection holding the table loaded from CSV
+        path: Database file to write
+        table_name: Name of the loaded table
+        headers: Its column names
+        timestamps, dictionaries: As returned by the load (see uplt.core.create_table_from_csv)
+        indexes: Column lists to index before saving; dictionary encoded
+            tables are indexed on their codes
+    """
+    cursor = conn.cursor()
+    stored = codes_table(table_name) if dictionaries is not None else table_name
+    for columns in indexes or []:
+        missing = [c for c in columns if c not in headers]
+        if missing:
+            raise ValueError(f"Unknown column(s) to index: {', '.join(missing)}. "
+                             f"Available: {', '.join(headers)}")
+        name = f"{stored}_{'_'.join(columns)}_idx"
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {stored} ({', '.join(columns)})")
+    if indexes:
+        cursor.execute("ANALYZE")
+
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {_META} "
+                   "(name TEXT PRIMARY KEY, timestamps TEXT, dictionaries TEXT)")
+    cursor.execute(
+        f"INSERT OR REPLACE INTO {_META} VALUES (?, ?, ?)",
+        (table_name,
+         json.dumps(timestamps) if timestamps is not None else None,
+         json.dumps(list(dictionaries)) if dictionaries is not None else None)
+    )
+    conn.commit()
+
+    target = sqlite3.connect(path)
+    try:
+        conn.backup(target)
+    finally:
+        target.close()
+
+
+def open_database(path: str, table_name: str) -> Tuple[sqlite3.Connection, List[str],
+                                                       Optional[Dict[str, str]],
+                                                       Optional[Dict[str, List[str]]]]:
+    """
+    Open a database file read-only with a memory map.
+
+    Returns:
+        (connection, headers, timestamps, dictionaries) of table_name, with
+        the column details saved by save_database (None for other files)
+
+    Raises:
+        ValueError: If the file or the table doesn't exist
+    """
+    if not os.path.isfile(path):
+        raise ValueError(f"Database not found: {path}")
+    uri = pathlib.Path(path).resolve().as_uri() + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True)
+    try:
+        register_aggregates(conn)
+        cursor = conn.cursor()
+        cursor.execute(f"PRAGMA mmap_size = {min(os.path.getsize(path), MAX_MMAP_SIZE)}")
+
+        headers = [row[1] for row in cursor.execute(f"PRAGMA table_info({table_name})")]
+        if not headers:
+            tables = [name for name, in cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') "
+                "AND name NOT LIKE 'sqlite_%' AND name != ? ORDER BY name", (_META,))]
+            raise ValueError(f"Table '{table_name}' doesn't exist in {path} "
+                             f"(tables: {', '.join(tables) or 'none'})")
+
+        timestamps = dictionaries = None
+        try:
+            cursor.execute(f"SELECT timestamps, dictionaries FROM {_META} WHERE name = ?",
+                           (table_name,))
+            meta = cursor.fetchone()
+        except sqlite3.Error:
+            meta = None
+        if meta:
+            if meta[0] is not None:
+                timestamps = json.loads(meta[0])
+            if meta[1] is not None:
+                dictionaries = {
+                    column: [value for value, in cursor.execute(
+                        f"SELECT value FROM {dictionary_table(table_name, column)} ORDER BY code")]
+                    for column in json.loads(meta[1])
+                }
+    except sqlite3.Error as e:
+        conn.close()
+        raise ValueError(f"Can't read {path}: {e}")
+    except ValueError:
+        conn.close()
+        raise
+    return conn, headers, timestamps, dictionaries
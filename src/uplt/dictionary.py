@@ -0,0 +1,152 @@
+"""Dictionary encoding of low-cardinality TEXT columns.
+
+Benchmark logs repeat the same long strings (CPU and GPU descriptions, model
+file names) on every row. With --dict-encode, TEXT columns with few distinct
+values are stored as integer codes:
+
+    <table>_codes          the rows, with encoded columns holding codes
+    <table>_dict_<column>  code INTEGER PRIMARY KEY, value TEXT
+    <table>                view joining the dictionaries back in, with the
+                           original column names and order
+
+Codes are assigned in sorted order of the values, so comparing or ordering
+codes gives the same result as comparing the text. groupby on encoded
+columns groups the codes and decodes only one value per group.
+"""
+from __future__ import annotations
+
+import re
+import sqlite3
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Dict, List, Optional, Sequence, Tuple
+
+# A column is encoded when its distinct values are at most this share of its values
+MAX_DISTINCT_RATIO = 0.5
+
+
+def codes_table(table_name: str) -> str:
+    return f"{table_name}_codes"
+
+
+def dictionary_table(table_name: str, column: str) -> str:
+    return f"{table_name}_dict_{column}"
+
+
+def encode_columns(rows: List[List[str]], types: List[str],
+                   max_ratio: float = MAX_DISTINCT_RATIO) -> Dict[int, List[str]]:
+    """Replace the values of low-cardinality TEXT columns with integer codes.
+
+    Rows are converted in place and the matching entries of types become
+    INTEGER. Missing cells stay NULL.
+
+    Returns:
+        Mapping of encoded column index to its values, where code N is the
+        value at position N - 1
+    """
+    dictionaries = {}
+    for i, col_type in enumerate(types):
+        if col_type != 'TEXT':
+            continue
+        values = set()
+        count = 0
+        for row in rows:
+            if i < len(row):
+                values.add(row[i])
+                count += 1
+        if not values or len(values) > count * max_ratio:
+            continue
+
+        ordered = sorted(values)
+        codes = {value: code for code, value in enumerate(ordered, 1)}
+        for row in rows:
+            if i < len(row):
+                row[i] = codes[row[i]]
+        types[i] = 'INTEGER'
+        dictionaries[i] = ordered
+    return dictionaries
+
+
+def create_encoded_table(cursor: sqlite3.Cursor, table_name: str, headers: Sequence[str],
+                         types: Sequence[str], dictionaries: Dict[int, List[str]]):
+    """Create the codes table, one dictionary table per encoded column and the decoding view.
+
+    The rows are inserted into codes_table(table_name) by the caller.
+    """
+    columns = ', '.join(f"{header} {col_type}" for header, col_type in zip(headers, types))
+    cursor.execute(f"CREATE TABLE {codes_table(table_name)} ({columns})")
+
+    select_parts = []
+    joins = []
+    for i, header in enumerate(headers):
+        if i not in dictionaries:
+            select_parts.append(f"c.{header} AS {header}")
+            continue
+        dictionary = dictionary_table(table_name, header)
+        cursor.execute(f"CREATE TABLE {dictionary} (code INTEGER PRIMARY KEY, value TEXT)")
+        cursor.executemany(f"INSERT INTO {dictionary} VALUES (?, ?)",
+                           enumerate(dictionaries[i], 1))
+        select_parts.append(f"d{i}.value AS {header}")
+        joins.append(f"LEFT JOIN {dictionary} d{i} ON d{i}.code = c.{header}")
+
+    cursor.execute(
+        f"CREATE VIEW {table_name} AS SELECT {', '.join(select_parts)} "
+        f"FROM {codes_table(table_name)} c {' '.join(joins)}"
+    )
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def build_code_groupby_query(
+    table_name: str,
+    encoded: Sequence[str],
+    keys: Sequence[Tuple[str, Optional[str]]],
+    aggregates: Sequence[Tuple[str, Optional[str]]]
+) -> Optional[str]:
+    """GROUP BY over the codes table that decodes each group's keys once.
+
+    Args:
+        table_name: Name of the decoding view
+        encoded: Names of the dictionary encoded columns
+        keys: (expression, alias) of each group key
+        aggregates: (expression, alias) of each aggregate
+
+    Returns:
+        The query, or None when it can't be answered from the codes: some key
+        isn't a plain column, none is encoded, or an aggregate reads an
+        encoded column
+    """
+    columns = {name.lower(): name for name in encoded}
+    if not all(re.fullmatch(r'\w+', expr.strip()) for expr, _ in keys):
+        return None
+    if not any(expr.strip().lower() in columns for expr, _ in keys):
+        return None
+    for expr, _ in aggregates:
+        words = {word.lower() for word in re.findall(r'\w+', re.sub(r"'[^']*'", '', expr))}
+        if words & columns.keys():
+            return None
+
+    key_names = [alias or expr.strip() for expr, alias in keys]
+    inner = [f"{expr.strip()} AS k{i}" for i, (expr, _) in enumerate(keys)]
+    inner += [f"{expr} AS a{i}" for i, (expr, _) in enumerate(aggregates)]
+    group_by = ', '.join(expr.strip() for expr, _ in keys)
+    order_by = ', '.join(f"g.k{i}" for i in range(len(keys)))
+
+    outer = []
+    for i, ((expr, _), name) in enumerate(zip(keys, key_names)):
+        column = columns.get(expr.strip().lower())
+        if column:
+            outer.append(f"(SELECT value FROM {dictionary_table(table_name, column)} "
+                         f"WHERE code = g.k{i}) AS {_quote(name)}")
+        else:
+            outer.append(f"g.k{i} AS {_quote(name)}")
+    outer += [f"g.a{i} AS {_quote(alias or expr)}" for i, (expr, alias) in enumerate(aggregates)]
+
+    return (
+        f"SELECT {', '.join(outer)} FROM ("
+        f"SELECT {', '.join(inner)} FROM {codes_table(table_name)} GROUP BY {group_by}"
+        f") g ORDER BY {order_by}"
+    )
@@ -0,0 +1,1018 @@
+"""Compile simple SQL expressions to Python closures for add and filter.
+
+Expressions such as "price * quantity" or "latency > 1000" don't need a
+database: they are parsed here and evaluated directly on the parsed CSV
+rows, following SQLite's rules for types, affinity, NULL and integer
+arithmetic so the output is the same as with SQLite.
+
+Supported:
+    literals, columns, unary + and -, * / % + - ||,
+    < <= > >= = == != <> IS [NOT], [NOT] IN (...), [NOT] BETWEEN, [NOT] LIKE,
+    ISNULL, NOTNULL, NOT, AND, OR, CASE, iif(),
+    abs, coalesce, ifnull, instr, length, lower, ltrim, max, min, nullif,
+    replace, rtrim, substr, substring, trim, upper
+
+Anything else raises Unsupported when compiling. The few values SQLite
+handles in ways that aren't replicated (a real number on a rounding tie
+turned into text, abs() overflow, ambiguous numeric text) raise
+Unsupported while evaluating. In both cases the caller falls back to SQLite.
+"""
+from __future__ import annotations
+
+import operator
+import re
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+    Evaluator = Callable[[Sequence], Any]
+
+INT64_MIN = -(1 << 63)
+INT64_MAX = (1 << 63) - 1
+
+_SPACE = ' \t\n\f\r\v'
+_INTEGER_TEXT = re.compile(rf'[{_SPACE}]*[+-]?[0-9]+[{_SPACE}]*\Z')
+_REAL_TEXT = re.compile(
+    rf'[{_SPACE}]*[+-]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][+-]?[0-9]+)?[{_SPACE}]*\Z'
+)
+_INTEGER_PREFIX = re.compile(rf'[{_SPACE}]*([+-]?[0-9]+)')
+_NUMERIC_PREFIX = re.compile(rf'[{_SPACE}]*([+-]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][+-]?[0-9]+)?)')
+
+# SQLite folds case for ASCII letters only
+_ASCII_LOWER = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+_ASCII_UPPER = str.maketrans('abcdefghijklmnopqrstuvwxyz', 'ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+
+_NUMERIC = ('INTEGER', 'REAL')
+
+_INFINITY = float('inf')
+
+# SQLITE_MAX_LENGTH
+_MAX_LENGTH = 1_000_000_000
+
+
+class Unsupported(Exception):
+    """The expression or a value needs SQLite to be evaluated exactly."""
+
+
+class _Literal:
+    """Evaluator of a constant; operators check for it to do their work up front."""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __call__(self, row):
+        return self.value
+
+
+def _fold(evaluate: Evaluator, *operands: Evaluator) -> Evaluator:
+    """Evaluate once when compiling if every operand is a constant."""
+    if all(isinstance(operand, _Literal) for operand in operands):
+        return _Literal(evaluate(None))
+    return evaluate
+
+
+# Values --------------------------------------------------------------------
+
+def _numeric_text(text: str):
+    """Number a text value becomes under NUMERIC affinity, or the text itself."""
+    if _INTEGER_TEXT.match(text):
+        number = int(text)
+        return number if INT64_MIN <= number <= INT64_MAX else float(number)
+    if _REAL_TEXT.match(text):
+        number = float(text)
+        if number.is_integer() and INT64_MIN <= number <= INT64_MAX:
+            return int(number)
+        return number
+    try:
+        float(text)
+    except ValueError:
+        return text
+    # inf, nan, 1_000 and the like: Python parses them, SQLite keeps text
+    raise Unsupported(f"ambiguous numeric text {text!r}")
+
+
+def _real_text(text: str):
+    if _INTEGER_TEXT.match(text) or _REAL_TEXT.match(text):
+        # Whole reals are stored as integers, which loses the sign of -0.0
+        return float(text) or 0.0
+    return _numeric_text(text)
+
+
+def _convert_integer(value: Optional[str]):
+    if value is None:
+        return None
+    if value.isdigit() and value.isascii() and len(value) < 19:
+        return int(value)
+    return _numeric_text(value)
+
+
+def _convert_real(value: Optional[str]):
+    if value is None:
+        return None
+    unsigned = value[1:] if value[:1] == '-' else value
+    if unsigned.replace('.', '', 1).isdigit() and unsigned.isascii():
+        # Plain decimals; anything unusual goes through the full rules
+        return float(value) or 0.0
+    return _real_text(value)
+
+
+def _convert_text(value: Optional[str]):
+    return value
+
+
+_CONVERTERS = {'INTEGER': _convert_integer, 'REAL': _convert_real, 'TEXT': _convert_text}
+
+
+def row_converter(types: List[str]) -> Callable[[List[str]], tuple]:
+    """
+    Function turning a raw CSV row into the values SQLite stores for it.
+
+    Short rows are padded with NULL and long rows truncated, as on insert.
+    """
+    # TEXT values are stored as they are
+    converters = [(i, _CONVERTERS[col_type]) for i, col_type in enumerate(types)
+                  if col_type != 'TEXT']
+    width = len(types)
+
+    def convert(row: List[str]) -> tuple:
+        if len(row) != width:
+            row = (row + [None] * (width - len(row)))[:width]
+        values = list(row)
+        for i, convert_value in converters:
+            values[i] = convert_value(values[i])
+        return tuple(values)
+
+    return convert
+
+
+def _apply_numeric(value):
+    return _numeric_text(value) if isinstance(value, str) else value
+
+
+def _real_to_text(value: float) -> str:
+    """Text SQLite renders for a real number ("%!.15g")."""
+    if value == 0:
+        return '0.0'
+    if value != value:
+        raise Unsupported("NaN converted to text")
+    if value in (_INFINITY, -_INFINITY):
+        return 'Inf' if value > 0 else '-Inf'
+    digits = repr(abs(value)).partition('e')[0].replace('.', '').strip('0')
+    if len(digits) > 15 and digits[15] == '5':
+        # SQLite rounds ties with extended precision; not replicated
+        raise Unsupported("real number on a rounding tie converted to text")
+    mantissa, e, exponent = f"{value:.15g}".partition('e')
+    if '.' not in mantissa:
+        mantissa += '.0'
+    return mantissa + e + exponent
+
+
+def _apply_text(value):
+    if isinstance(value, float):
+        return _real_to_text(value)
+    if isinstance(value, int):
+        return str(value)
+    return value
+
+
+def _as_text(value):
+    """Text of a function argument; NULL stays NULL."""
+    return None if value is None else _apply_text(value)
+
+
+def _text_as_number(text: str):
+    """Number SQLite reads from text in arithmetic: its numeric prefix, or 0."""
+    match = _NUMERIC_PREFIX.match(text)
+    if not match:
+        return 0
+    prefix = match.group(1)
+    if _INTEGER_TEXT.match(prefix):
+        number = int(prefix)
+        return number if INT64_MIN <= number <= INT64_MAX else float(number)
+    return float(prefix)
+
+
+def _as_number(value):
+    return _text_as_number(value) if isinstance(value, str) else value
+
+
+def _truth(value) -> Optional[bool]:
+    if type(value) is int:
+        return value != 0
+    if value is None:
+        return None
+    if type(value) is str:
+        value = _text_as_number(value)
+    return value != 0
+
+
+def _int64(value):
+    return value if INT64_MIN <= value <= INT64_MAX else None
+
+
+def _sort_class(value) -> int:
+    return 1 if isinstance(value, (int, float)) else 2
+
+
+def _compare(a, b) -> int:
+    """Three-way comparison of two non-NULL values: numbers sort before text."""
+    class_a, class_b = _sort_class(a), _sort_class(b)
+    if class_a != class_b:
+        return -1 if class_a < class_b else 1
+    return (a > b) - (a < b)
+
+
+# Operators -----------------------------------------------------------------
+
+def _add(a, b):
+    result = a + b
+    if type(result) is int and not INT64_MIN <= result <= INT64_MAX:
+        return float(a) + float(b)
+    return result
+
+
+def _subtract(a, b):
+    result = a - b
+    if type(result) is int and not INT64_MIN <= result <= INT64_MAX:
+        return float(a) - float(b)
+    return result
+
+
+def _multiply(a, b):
+    result = a * b
+    if type(result) is int and not INT64_MIN <= result <= INT64_MAX:
+        return float(a) * float(b)
+    return result
+
+
+def _divide(a, b):
+    if b == 0:
+        return None
+    if type(a) is int and type(b) is int:
+        quotient = abs(a) // abs(b)
+        quotient = quotient if (a < 0) == (b < 0) else -quotient
+        # Only INT64_MIN / -1 overflows; SQLite answers with a real
+        return quotient if _int64(quotient) is not None else float(quotient)
+    return a / b
+
+
+def _integer_value(value) -> int:
+    """sqlite3VdbeIntValue: integer prefix of text, reals truncated and clamped."""
+    if isinstance(value, str):
+        match = _INTEGER_PREFIX.match(value)
+        number = int(match.group(1)) if match else 0
+    elif isinstance(value, float):
+        if value != value:
+            raise Unsupported("NaN converted to an integer")
+        number = int(value) if abs(value) < 2.0 ** 63 else (INT64_MAX if value > 0 else INT64_MIN)
+    else:
+        return value
+    return min(max(number, INT64_MIN), INT64_MAX)
+
+
+def _remainder(a, b):
+    """a % b on the values as they are, since reals and text are truncated to integers."""
+    x, y = _as_number(a), _as_number(b)
+    if type(x) is int and type(y) is int:
+        if y == 0:
+            return None
+        # C remainder: the sign follows the dividend
+        result = abs(x) % abs(y)
+        return -result if x < 0 else result
+    x, y = _integer_value(a), _integer_value(b)
+    if y == 0:
+        return None
+    result = abs(x) % abs(y)
+    return float(-result if x < 0 else result)
+
+
+_ARITHMETIC = {'+': _add, '-': _subtract, '*': _multiply, '/': _divide, '%': _remainder}
+
+_COMPARISONS = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+    '=': operator.eq, '==': operator.eq, '!=': operator.ne, '<>': operator.ne,
+}
+
+
+def _affinity_converters(left: Optional[str], right: Optional[str]):
+    """Conversions SQLite applies to the operands of a comparison before comparing."""
+    if left in _NUMERIC and right not in _NUMERIC:
+        return None, _apply_numeric
+    if right in _NUMERIC and left not in _NUMERIC:
+        return _apply_numeric, None
+    if left == 'TEXT' and right is None:
+        return None, _apply_text
+    if right == 'TEXT' and left is None:
+        return _apply_text, None
+    return None, None
+
+
+def _comparer(op: str, convert_left, convert_right):
+    """Function comparing two evaluated operands: 1, 0, or None if either is NULL."""
+    test = _COMPARISONS[op]
+
+    def compare(a, b):
+        if a is None or b is None:
+            return None
+        if convert_left:
+            a = convert_left(a)
+        if convert_right:
+            b = convert_right(b)
+        if type(a) is not type(b):
+            class_a, class_b = _sort_class(a), _sort_class(b)
+            if class_a != class_b:
+                # Numbers sort before text
+                return int(test(class_a, class_b))
+        return int(test(a, b))
+
+    return compare
+
+
+def _against(op: str, node, other) -> Tuple[Callable[[Any], Any], Optional[Evaluator]]:
+    """
+    Comparison of node's value with another operand, converting a constant up front.
+
+    Returns:
+        (function of node's value and the other value, evaluator of the other
+        operand or None when it is a constant already bound into the function)
+    """
+    convert_left, convert_right = _affinity_converters(node[1], other[1])
+    other_fn = other[0]
+    if not isinstance(other_fn, _Literal):
+        return _comparer(op, convert_left, convert_right), other_fn
+    constant = other_fn.value
+    if constant is None:
+        return (lambda value: None), None
+    if convert_right:
+        constant = convert_right(constant)
+    test = _COMPARISONS[op]
+    constant_class = _sort_class(constant)
+
+    def compare(value):
+        if value is None:
+            return None
+        if convert_left:
+            value = convert_left(value)
+        if type(value) is not type(constant):
+            value_class = _sort_class(value)
+            if value_class != constant_class:
+                return int(test(value_class, constant_class))
+        return int(test(value, constant))
+
+    return compare, None
+
+
+def _comparison(op: str, left, right) -> Tuple[Evaluator, None]:
+    left_fn = left[0]
+    compare, right_fn = _against(op, left, right)
+    if right_fn is None:
+        evaluate = lambda row: compare(left_fn(row))
+    else:
+        evaluate = lambda row: compare(left_fn(row), right_fn(row))
+    return _fold(evaluate, left_fn, right[0]), None
+
+
+def _is(left, right, negate: bool) -> Tuple[Evaluator, None]:
+    left_fn, left_affinity = left
+    right_fn, right_affinity = right
+    convert_left, convert_right = _affinity_converters(left_affinity, right_affinity)
+
+    def is_(row):
+        a = left_fn(row)
+        b = right_fn(row)
+        if a is None or b is None:
+            same = a is None and b is None
+        else:
+            if convert_left:
+                a = convert_left(a)
+            if convert_right:
+                b = convert_right(b)
+            same = _compare(a, b) == 0
+        return int(same != negate)
+
+    return _fold(is_, left_fn, right_fn), None
+
+
+# AND, OR and IN evaluate every operand like SQLite's bytecode, so a value only
+# SQLite can handle (see Unsupported) is never skipped by short-circuiting
+
+def _both(a: Optional[bool], b: Optional[bool]):
+    if a is False or b is False:
+        return 0
+    return None if a is None or b is None else 1
+
+
+def _and(left: Evaluator, right: Evaluator) -> Evaluator:
+    return _fold(lambda row: _both(_truth(left(row)), _truth(right(row))), left, right)
+
+
+def _or(left: Evaluator, right: Evaluator) -> Evaluator:
+    def or_(row):
+        a = _truth(left(row))
+        b = _truth(right(row))
+        if a or b:
+            return 1
+        return None if a is None or b is None else 0
+    return _fold(or_, left, right)
+
+
+def _not(operand: Evaluator) -> Evaluator:
+    def not_(row):
+        value = _truth(operand(row))
+        return None if value is None else int(not value)
+    return _fold(not_, operand)
+
+
+def _like_pattern(pattern: str):
+    parts = []
+    for char in pattern:
+        if char == '%':
+            parts.append('.*')
+        elif char == '_':
+            parts.append('.')
+        elif char.isascii() and char.isalpha():
+            parts.append(f'[{char.lower()}{char.upper()}]')
+        else:
+            parts.append(re.escape(char))
+    return re.compile(''.join(parts), re.DOTALL)
+
+
+def _like(value: Evaluator, pattern: Evaluator) -> Evaluator:
+    if isinstance(pattern, _Literal) and pattern.value is not None:
+        constant = _like_pattern(_apply_text(pattern.value))
+
+        def like_constant(row):
+            text = _as_text(value(row))
+            return None if text is None else int(constant.fullmatch(text) is not None)
+
+        return _fold(like_constant, value)
+
+    cache = {}
+
+    def like(row):
+        text = _as_text(value(row))
+        pattern_text = _as_text(pattern(row))
+        if text is None or pattern_text is None:
+            return None
+        compiled = cache.get(pattern_text)
+        if compiled is None:
+            compiled = cache[pattern_text] = _like_pattern(pattern_text)
+        return int(compiled.fullmatch(text) is not None)
+
+    return _fold(like, value, pattern)
+
+
+# Functions -----------------------------------------------------------------
+
+def _null_if_any_null(func):
+    def call(*args):
+        return None if None in args else func(*args)
+    return call
+
+
+def _abs(value):
+    if isinstance(value, str):
+        # Text goes through sqlite3_value_double
+        return abs(float(_text_as_number(value)))
+    if value == INT64_MIN and type(value) is int:
+        raise Unsupported("integer overflow in abs()")
+    return abs(value)
+
+
+def _length(value):
+    return len(_apply_text(value))
+
+
+def _substr(value, start, length=None):
+    text = _apply_text(value)
+    for argument in (start, length):
+        if argument is not None and (type(argument) is not int or abs(argument) >= 1 << 31):
+            raise Unsupported("substr() position that isn't a small integer")
+    negative = False
+    if length is None:
+        # SQLite's default length is the maximum string length
+        length = _MAX_LENGTH
+    elif length < 0:
+        length = -length
+        negative = True
+    if start < 0:
+        start += len(text)
+        if start < 0:
+            length += start
+            if length < 0:
+                length = 0
+            start = 0
+    elif start > 0:
+        start -= 1
+    elif length > 0:
+        length -= 1
+    if negative:
+        start -= length
+        if start < 0:
+            length += start
+            start = 0
+    return text[start:start + length]
+
+
+def _trim(strip: str):
+    def trim(value, characters=' '):
+        return getattr(_apply_text(value), strip)(_apply_text(characters))
+    return trim
+
+
+def _instr(haystack, needle):
+    return _apply_text(haystack).find(_apply_text(needle)) + 1
+
+
+def _replace(value, old, new):
+    if value is None or old is None:
+        return None
+    old = _apply_text(old)
+    if old == '':
+        if not isinstance(value, str):
+            # SQLite returns the number with its text form attached, which
+            # changes how later comparisons treat it
+            raise Unsupported("replace() of a number with an empty pattern")
+        return value
+    if new is None:
+        return None
+    return _apply_text(value).replace(old, _apply_text(new))
+
+
+def _coalesce(*args):
+    for arg in args:
+        if arg is not None:
+            return arg
+    return None
+
+
+def _nullif(a, b):
+    if a is not None and b is not None and _compare(a, b) == 0:
+        return None
+    return a
+
+
+def _scalar_min(*args):
+    if any(arg is None for arg in args):
+        return None
+    best = args[0]
+    for arg in args[1:]:
+        # Later arguments win ties, as in SQLite
+        if _compare(best, arg) >= 0:
+            best = arg
+    return best
+
+
+def _scalar_max(*args):
+    if any(arg is None for arg in args):
+        return None
+    best = args[0]
+    for arg in args[1:]:
+        if _compare(best, arg) < 0:
+            best = arg
+    return best
+
+
+# name: (implementation, minimum arguments, maximum arguments or None)
+_FUNCTIONS = {
+    'abs': (_null_if_any_null(_abs), 1, 1),
+    'coalesce': (_coalesce, 2, None),
+    'ifnull': (_coalesce, 2, 2),
+    'instr': (_null_if_any_null(_instr), 2, 2),
+    'length': (_null_if_any_null(_length), 1, 1),
+    'lower': (_null_if_any_null(lambda v: _apply_text(v).translate(_ASCII_LOWER)), 1, 1),
+    'ltrim': (_null_if_any_null(_trim('lstrip')), 1, 2),
+    'max': (_scalar_max, 2, None),
+    'min': (_scalar_min, 2, None),
+    'nullif': (_nullif, 2, 2),
+    'replace': (_replace, 3, 3),
+    'rtrim': (_null_if_any_null(_trim('rstrip')), 1, 2),
+    'substr': (_null_if_any_null(_substr), 2, 3),
+    'substring': (_null_if_any_null(_substr), 2, 3),
+    'trim': (_null_if_any_null(_trim('strip')), 1, 2),
+    'upper': (_null_if_any_null(lambda v: _apply_text(v).translate(_ASCII_UPPER)), 1, 1),
+}
+
+
+# Parser --------------------------------------------------------------------
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<number>(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?(?![A-Za-z_0-9.]))
+      | (?P<string>'(?:[^']|'')*')
+      | (?P<quoted>"(?:[^"]|"")*")
+      | (?P<name>[A-Za-z_][A-Za-z_0-9]*)
+      | (?P<op>\|\||<=|>=|==|!=|<>|[-+*/%<>=(),])
+    )""", re.VERBOSE)
+
+_KEYWORDS = {
+    'and', 'or', 'not', 'in', 'is', 'null', 'between', 'like', 'case', 'when', 'then',
+    'else', 'end', 'true', 'false', 'isnull', 'notnull',
+}
+
+
+def _tokenize(expr: str) -> List[Tuple[str, str]]:
+    tokens = []
+    position = 0
+    expr = expr.rstrip()
+    while position < len(expr):
+        match = _TOKEN.match(expr, position)
+        if not match:
+            raise Unsupported(f"unsupported syntax at {expr[position:].strip()[:20]!r}")
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == 'name' and text.lower() in _KEYWORDS:
+            kind, text = 'keyword', text.lower()
+        tokens.append((kind, text))
+        position = match.end()
+    tokens.append(('end', ''))
+    return tokens
+
+
+class _Parser:
+    """Recursive descent over SQLite's operator precedence, building closures."""
+
+    def __init__(self, expr: str, headers: List[str], types: List[str]):
+        self.tokens = _tokenize(expr)
+        self.position = 0
+        self.columns = {name.lower(): (i, col_type) for i, (name, col_type)
+                        in enumerate(zip(headers, types))}
+
+    def peek(self, offset: int = 0) -> Tuple[str, str]:
+        return self.tokens[self.position + offset]
+
+    def take(self) -> Tuple[str, str]:
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def accept(self, kind: str, text: str) -> bool:
+        if self.peek() == (kind, text):
+            self.position += 1
+            return True
+        return False
+
+    def expect(self, kind: str, text: str):
+        if not self.accept(kind, text):
+            raise Unsupported(f"expected {text!r}")
+
+    def parse(self):
+        node = self.parse_or()
+        if self.peek()[0] != 'end':
+            raise Unsupported(f"unsupported syntax at {self.peek()[1]!r}")
+        return node
+
+    def parse_or(self):
+        node = self.parse_and()
+        while self.accept('keyword', 'or'):
+            node = (_or(node[0], self.parse_and()[0]), None)
+        return node
+
+    def parse_and(self):
+        node = self.parse_not()
+        while self.accept('keyword', 'and'):
+            node = (_and(node[0], self.parse_not()[0]), None)
+        return node
+
+    def parse_not(self):
+        if self.accept('keyword', 'not'):
+            return _not(self.parse_not()[0]), None
+        return self.parse_equality()
+
+    def parse_equality(self):
+        node = self.parse_relational()
+        while True:
+            kind, text = self.peek()
+            if kind == 'op' and text in ('=', '==', '!=', '<>'):
+                self.take()
+                node = _comparison(text, node, self.parse_relational())
+                continue
+            if kind != 'keyword':
+                return node
+            if text in ('isnull', 'notnull'):
+                self.take()
+                node = _is(node, (_Literal(None), None), negate=text == 'notnull')
+                continue
+            if text == 'is':
+                self.take()
+                negate = self.accept('keyword', 'not')
+                node = _is(node, self.parse_relational(), negate)
+                continue
+            negate = False
+            if text == 'not' and self.peek(1)[0] == 'keyword' and \
+                    self.peek(1)[1] in ('in', 'between', 'like', 'null'):
+                self.take()
+                negate = True
+                text = self.peek()[1]
+            if text == 'null' and negate:
+                self.take()
+                node = _is(node, (_Literal(None), None), negate=True)
+            elif text == 'in':
+                self.take()
+                node = self.parse_in(node, negate)
+            elif text == 'between':
+                self.take()
+                low = self.parse_relational()
+                self.expect('keyword', 'and')
+                high = self.parse_relational()
+                within = self._between(node, low, high)
+                node = (_not(within) if negate else within), None
+            elif text == 'like':
+                self.take()
+                like = _like(node[0], self.parse_relational()[0])
+                node = (_not(like) if negate else like), None
+            else:
+                return node
+
+    def parse_in(self, node, negate: bool):
+        self.expect('op', '(')
+        if self.peek() == ('op', ')'):
+            raise Unsupported("IN with an empty list")
+        values = [self.parse_or()]
+        while self.accept('op', ','):
+            values.append(self.parse_or())
+        self.expect('op', ')')
+        # a IN (x, y) is a = +x OR a = +y: the list values have no affinity
+        value_fn = node[0]
+        item_fns = [item_fn for item_fn, _ in values]
+        if all(isinstance(item_fn, _Literal) for item_fn in item_fns):
+            return _fold(self._in_constants(node, item_fns, negate), value_fn, *item_fns), None
+        tests = [_against('=', node, (item_fn, None)) for item_fn in item_fns]
+
+        def in_(row):
+            value = value_fn(row)
+            results = [equals(value) if item_fn is None else equals(value, item_fn(row))
+                       for equals, item_fn in tests]
+            if value is None:
+                return None
+            if any(results):
+                return int(not negate)
+            return None if None in results else int(negate)
+
+        return _fold(in_, value_fn, *item_fns), None
+
+    @staticmethod
+    def _in_constants(node, items: List[_Literal], negate: bool) -> Evaluator:
+        """IN over a list of constants as a set lookup; 1 = 1.0 hashes alike in Python too."""
+        value_fn = node[0]
+        convert_left, convert_right = _affinity_converters(node[1], None)
+        constants = [item.value for item in items if item.value is not None]
+        if convert_right:
+            constants = [convert_right(constant) for constant in constants]
+        members = frozenset(constants)
+        # Not found among the values: NULL if the list has a NULL, else false
+        missing = None if len(constants) < len(items) else int(negate)
+
+        def in_(row):
+            value = value_fn(row)
+            if value is None:
+                return None
+            if convert_left:
+                value = convert_left(value)
+            return int(not negate) if value in members else missing
+
+        return in_
+
+    @staticmethod
+    def _between(node, low, high) -> Evaluator:
+        """x BETWEEN a AND b is x >= a AND x <= b, evaluating x once."""
+        value_fn = node[0]
+        above, low_fn = _against('>=', node, low)
+        below, high_fn = _against('<=', node, high)
+
+        def bound(compare, bound_fn):
+            if bound_fn is None:
+                return lambda value, row: _truth(compare(value))
+            return lambda value, row: _truth(compare(value, bound_fn(row)))
+
+        above, below = bound(above, low_fn), bound(below, high_fn)
+
+        def between(row):
+            value = value_fn(row)
+            return _both(above(value, row), below(value, row))
+
+        return _fold(between, value_fn, low[0], high[0])
+
+    def parse_relational(self):
+        node = self.parse_additive()
+        while self.peek()[0] == 'op' and self.peek()[1] in ('<', '<=', '>', '>='):
+            op = self.take()[1]
+            node = _comparison(op, node, self.parse_additive())
+        return node
+
+    def parse_additive(self):
+        node = self.parse_multiplicative()
+        while self.peek()[0] == 'op' and self.peek()[1] in ('+', '-'):
+            node = self._arithmetic(self.take()[1], node, self.parse_multiplicative())
+        return node
+
+    def parse_multiplicative(self):
+        node = self.parse_concat()
+        while self.peek()[0] == 'op' and self.peek()[1] in ('*', '/', '%'):
+            node = self._arithmetic(self.take()[1], node, self.parse_concat())
+        return node
+
+    def parse_concat(self):
+        node = self.parse_unary()
+        while self.accept('op', '||'):
+            left, right = node[0], self.parse_unary()[0]
+
+            def concat(row, left=left, right=right):
+                a = left(row)
+                b = right(row)
+                if a is None or b is None:
+                    return None
+                return _apply_text(a) + _apply_text(b)
+
+            node = _fold(concat, left, right), None
+        return node
+
+    @staticmethod
+    def _arithmetic(op: str, left, right):
+        left_fn, right_fn = left[0], right[0]
+        operation = _ARITHMETIC[op]
+
+        if op == '%':
+            # Remainder truncates the operands as they are, see _remainder
+            def remainder(row):
+                a = left_fn(row)
+                b = right_fn(row)
+                return None if a is None or b is None else _remainder(a, b)
+
+            return _fold(remainder, left_fn, right_fn), None
+
+        if isinstance(right_fn, _Literal) and right_fn.value is not None:
+            constant = _as_number(right_fn.value)
+
+            def arithmetic_constant(row):
+                a = left_fn(row)
+                if a is None:
+                    return None
+                if type(a) is str:
+                    a = _text_as_number(a)
+                result = operation(a, constant)
+                return None if result != result else result
+
+            return _fold(arithmetic_constant, left_fn), None
+
+        def arithmetic(row):
+            a = left_fn(row)
+            b = right_fn(row)
+            if a is None or b is None:
+                return None
+            if type(a) is str:
+                a = _text_as_number(a)
+            if type(b) is str:
+                b = _text_as_number(b)
+            result = operation(a, b)
+            # SQLite turns NaN (inf - inf and the like) into NULL
+            return None if result != result else result
+
+        return _fold(arithmetic, left_fn, right_fn), None
+
+    def parse_unary(self):
+        if self.accept('op', '-'):
+            operand = self.parse_unary()[0]
+
+            def negative(row):
+                value = operand(row)
+                if value is None:
+                    return None
+                value = _as_number(value)
+                if type(value) is int and value == INT64_MIN:
+                    return -float(value)
+                return -value
+
+            return _fold(negative, operand), None
+        if self.accept('op', '+'):
+            # Unary plus keeps the value but drops the column affinity
+            return self.parse_unary()[0], None
+        return self.parse_primary()
+
+    def parse_primary(self):
+        kind, text = self.take()
+        if kind == 'number':
+            if re.fullmatch(r'[0-9]+', text):
+                value = int(text)
+                if value > INT64_MAX:
+                    raise Unsupported("integer literal out of range")
+            else:
+                value = float(text)
+            return _Literal(value), None
+        if kind == 'string':
+            return _Literal(text[1:-1].replace("''", "'")), None
+        if kind == 'keyword':
+            if text == 'null':
+                return _Literal(None), None
+            if text in ('true', 'false'):
+                return _Literal(int(text == 'true')), None
+            if text == 'case':
+                return self.parse_case()
+            raise Unsupported(f"unexpected {text.upper()}")
+        if kind == 'op' and text == '(':
+            node = self.parse_or()
+            self.expect('op', ')')
+            return node
+        if kind == 'name' and self.peek() == ('op', '('):
+            return self.parse_function(text.lower())
+        if kind in ('name', 'quoted'):
+            name = text[1:-1].replace('""', '"') if kind == 'quoted' else text
+            column = self.columns.get(name.lower())
+            if column is None:
+                raise Unsupported(f"unknown column {name!r}")
+            index, col_type = column
+            convert = _CONVERTERS[col_type]
+
+            # Only the columns an expression uses are converted
+            def column_value(row):
+                try:
+                    return convert(row[index])
+                except IndexError:
+                    # Short rows are padded with NULL
+                    return None
+
+            return column_value, col_type
+        raise Unsupported(f"unexpected {text!r}")
+
+    def parse_function(self, name: str):
+        self.expect('op', '(')
+        args = []
+        if not self.accept('op', ')'):
+            args.append(self.parse_or())
+            while self.accept('op', ','):
+                args.append(self.parse_or())
+            self.expect('op', ')')
+
+        if name == 'iif':
+            if len(args) != 3:
+                raise Unsupported("iif() takes 3 arguments")
+            return self._case([(args[0][0], args[1][0])], args[2][0])
+        if name not in _FUNCTIONS:
+            raise Unsupported(f"function {name}() is not compiled")
+        func, least, most = _FUNCTIONS[name]
+        if len(args) < least or (most is not None and len(args) > most):
+            raise Unsupported(f"wrong number of arguments to {name}()")
+        arg_fns = [fn for fn, _ in args]
+        if all(isinstance(fn, _Literal) for fn in arg_fns[1:]):
+            # Usually only the first argument depends on the row: substr(name, 1, 3)
+            arg_fn = arg_fns[0]
+            constants = [fn.value for fn in arg_fns[1:]]
+            call = lambda row: func(arg_fn(row), *constants)
+        else:
+            call = lambda row: func(*[fn(row) for fn in arg_fns])
+        return _fold(call, *arg_fns), None
+
+    def parse_case(self):
+        base = None
+        if self.peek() != ('keyword', 'when'):
+            base = self.parse_or()
+        branches = []
+        while self.accept('keyword', 'when'):
+            condition = self.parse_or()
+            if base is not None:
+                condition = _comparison('=', base, condition)
+            self.expect('keyword', 'then')
+            branches.append((condition[0], self.parse_or()[0]))
+        if not branches:
+            raise Unsupported("CASE without WHEN")
+        default = _Literal(None)
+        if self.accept('keyword', 'else'):
+            default = self.parse_or()[0]
+        self.expect('keyword', 'end')
+        return self._case(branches, default)
+
+    @staticmethod
+    def _case(branches, default):
+        def case(row):
+            for condition, result in branches:
+                if _truth(condition(row)):
+                    return result(row)
+            return default(row)
+        return case, None
+
+
+def compile_expression(expr: str, headers: List[str], types: List[str]) -> Evaluator:
+    """
+    Compile an SQL expression over the columns of a CSV table.
+
+    Args:
+        expr: Expression as it would appear in a SELECT list or WHERE clause
+        headers: Column names
+        types: SQL type of every column (INTEGER, REAL or TEXT)
+
+    Returns:
+        Function of a raw CSV row returning the value
+
+    Raises:
+        Unsupported: If the expression uses syntax or functions not compiled here
+    """
+    return _Parser(expr, headers, types).parse()[0]
+
+
+def compile_condition(expr: str, headers: List[str], types: List[str]) -> Callable[[Sequence], bool]:
+    """Compile a WHERE condition: True for rows where it is true, not false or NULL."""
+    evaluate = compile_expression(expr, headers, types)
+    return lambda row: bool(_truth(evaluate(row)))
@@ -0,0 +1,44 @@
+"""Process pool helpers for parallel execution modes."""
+import collections
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+def ordered_map(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    jobs: int = 1,
+    max_pending: Optional[int] = None
+) -> Iterator[R]:
+    """
+    Apply func to every item across worker processes, yielding results in input order.
+
+    Items are consumed lazily and at most `max_pending` of them are in flight
+    at any time, which bounds the reorder buffer. With jobs <= 1 everything
+    runs in the current process.
+
+    Args:
+        func: Module-level (picklable) function to apply
+        items: Iterable of picklable arguments
+        jobs: Number of worker processes
+        max_pending: Maximum number of submitted but unconsumed items
+            (defaults to 4 per worker)
+    """
+    if jobs <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    max_pending = max_pending or jobs * 4
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = collections.deque()
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
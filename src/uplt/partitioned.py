@@ -0,0 +1,175 @@
+"""Parallel groupby: rows partitioned across worker processes, partial aggregates merged.
+
+Each worker loads its share of the rows into its own in-memory SQLite and
+computes partial aggregates per group (see query_builder.decompose_aggregate).
+The coordinator merges the partials with the same SQL that merges rollup
+levels, so results match the serial GROUP BY.
+
+When every group by key is a plain column, rows are hash-partitioned by key
+so each group is aggregated by exactly one worker and merging is cheap even
+with many groups. Keys computed from expressions can't be hashed before
+SQLite evaluates them, so rows are split evenly instead and groups seen by
+several workers are merged.
+"""
+from __future__ import annotations
+
+import sqlite3
+
+from .query_builder import decompose_aggregate, quote_identifier
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import List, Optional, Sequence, Tuple
+
+_PARTIALS_TABLE = "uplt_parallel_partials"
+
+# Partitions per worker; several keep workers busy when partitions are uneven
+PARTITIONS_PER_JOB = 2
+
+
+def partial_plan(aggregates: List[str]) -> Optional[Tuple[List[str], List[str]]]:
+    """
+    Partial aggregate expressions and merge expressions for a list of aggregates.
+
+    Partial columns are named p0, p1, ...; merge expressions refer to them.
+
+    Returns:
+        (partial expressions, merge expressions), or None when some aggregate
+        can't be decomposed, such as median or any DISTINCT aggregate
+    """
+    partials = []
+    merges = []
+    for expr in aggregates:
+        decomposed = decompose_aggregate(expr)
+        if decomposed is None:
+            return None
+        names = []
+        for partial in decomposed[0]:
+            names.append(f"p{len(partials)}")
+            partials.append(partial)
+        merges.append(decomposed[1].format(*names))
+    return partials, merges
+
+
+def _partition_value(value, numeric: bool):
+    """Hashable form of a raw key so that values SQLite stores as equal collide."""
+    if numeric and value is not None:
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    return value
+
+
+def partition_rows(rows: Sequence[List[str]], key_indices: Optional[List[int]],
+                   numeric: Sequence[bool], partitions: int) -> List[List[List[str]]]:
+    """
+    Split rows into partitions, by hash of the key columns when their indices are known.
+
+    Args:
+        rows: Parsed CSV rows
+        key_indices: Column index of every group key, or None to split rows evenly
+        numeric: Whether each column has INTEGER or REAL affinity
+        partitions: Number of partitions
+    """
+    if key_indices is None:
+        size = -(-len(rows) // partitions)
+        return [list(rows[i:i + size]) for i in range(0, len(rows), size)]
+
+    parts: List[List[List[str]]] = [[] for _ in range(partitions)]
+    for row in rows:
+        key = tuple(
+            _partition_value(row[i] if i < len(row) else None, numeric[i]) for i in key_indices
+        )
+        parts[hash(key) % partitions].append(row)
+    return [part for part in parts if part]
+
+
+def _aggregate_partition(task) -> List[tuple]:
+    """Worker entry point: load one partition and compute its partial aggregates."""
+    from .aggregates import register_aggregates
+    from .core import insert_rows
+
+    table, headers, types, rows, query = task
+    conn = sqlite3.connect(':memory:')
+    register_aggregates(conn)
+    cursor = conn.cursor()
+    columns = ', '.join(f"{name} {col_type}" for name, col_type in zip(headers, types))
+    cursor.execute(f"CREATE TABLE {table} ({columns})")
+    insert_rows(cursor, table, len(headers), rows)
+    try:
+        return cursor.execute(query).fetchall()
+    finally:
+        conn.close()
+
+
+def parallel_groupby(
+    cursor: sqlite3.Cursor,
+    table: str,
+    headers: List[str],
+    types: List[str],
+    rows: Sequence[List[str]],
+    keys: List[Tuple[str, Optional[str]]],
+    aggregates: List[Tuple[str, Optional[str]]],
+    jobs: int
+) -> Optional[Tuple[List[str], List[tuple]]]:
+    """
+    Group rows across worker processes and merge their partial aggregates.
+
+    Args:
+        cursor: Coordinator cursor used to merge the partials
+        table: Table name the expressions refer to
+        headers: Column names
+        types: SQL type of every column
+        rows: Parsed CSV rows
+        keys: Group by (expression, alias) pairs
+        aggregates: Aggregate (expression, alias) pairs
+        jobs: Number of worker processes
+
+    Returns:
+        Tuple of (column names, result rows ordered by the keys), or None if
+        some aggregate can't be decomposed and the serial path must be used
+    """
+    from .parallel import ordered_map
+
+    plan = partial_plan([expr for expr, _ in aggregates])
+    if plan is None:
+        return None
+    partials, merges = plan
+
+    key_exprs = [expr for expr, _ in keys]
+    lowered = [name.lower() for name in headers]
+    if all(expr.lower() in lowered for expr in key_exprs):
+        key_indices = [lowered.index(expr.lower()) for expr in key_exprs]
+    else:
+        key_indices = None
+    numeric = [col_type in ('INTEGER', 'REAL') for col_type in types]
+    parts = partition_rows(rows, key_indices, numeric, jobs * PARTITIONS_PER_JOB)
+
+    key_names = [f"k{i}" for i in range(len(keys))]
+    partial_query = (
+        f"SELECT {', '.join(f'{expr} AS {name}' for expr, name in zip(key_exprs, key_names))}, "
+        f"{', '.join(f'{expr} AS p{i}' for i, expr in enumerate(partials))} "
+        f"FROM {table} GROUP BY {', '.join(key_exprs)}"
+    )
+    cursor.execute(f"DROP TABLE IF EXISTS temp.{_PARTIALS_TABLE}")
+    cursor.execute(
+        f"CREATE TEMP TABLE {_PARTIALS_TABLE} "
+        f"({', '.join(key_names + [f'p{i}' for i in range(len(partials))])})"
+    )
+    store = f"INSERT INTO {_PARTIALS_TABLE} VALUES ({', '.join('?' * (len(keys) + len(partials)))})"
+    tasks = ((table, headers, types, part, partial_query) for part in parts)
+    for partial_rows in ordered_map(_aggregate_partition, tasks, jobs=jobs):
+        cursor.executemany(store, partial_rows)
+
+    columns = [alias or expr for expr, alias in keys + aggregates]
+    select = [f"{name} AS {quote_identifier(column)}" for name, column in zip(key_names, columns)]
+    select += [f"{merge} AS {quote_identifier(column)}"
+               for merge, column in zip(merges, columns[len(keys):])]
+    query = (
+        f"SELECT {', '.join(select)} FROM {_PARTIALS_TABLE} "
+        f"GROUP BY {', '.join(key_names)} ORDER BY {', '.join(key_names)}"
+    )
+    results = cursor.execute(query).fetchall()
+    cursor.execute(f"DROP TABLE temp.{_PARTIALS_TABLE}")
+    return columns, results
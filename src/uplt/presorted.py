@@ -0,0 +1,217 @@
+"""Streaming groupby for input that is already sorted by the group keys.
+
+Rows are loaded into a small staging table a chunk at a time. Each group is
+aggregated by SQLite (so every SQL expression and aggregate keeps working)
+and printed as soon as a later key shows that it is complete; the staging
+table is then emptied.
+
+When every aggregate can be split into partials (avg, sum, count, min, max,
+variance, stddev) a group spanning several chunks is carried as one row of
+partials per chunk, so memory is bounded by the chunk size. Other aggregates such as median
+need all values of a group, so the rows of the unfinished group stay in the
+staging table until it ends.
+
+Keys are checked as they arrive: a key that sorts before the previous one,
+or a group that reappears after another, raises ValueError.
+"""
+from __future__ import annotations
+
+import itertools
+import sqlite3
+
+from .core import infer_column_types, iter_query
+from .query_builder import decompose_aggregate
+from .topk import sqlite_sort_key
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Rows inserted into the staging table between flushes
+CHUNK_ROWS = 10_000
+
+_PARTIALS_TABLE = "uplt_presorted_partials"
+
+
+def create_staging_table(cursor: sqlite3.Cursor, table: str, headers: List[str],
+                         sample: Sequence[Sequence[str]]) -> List[str]:
+    """
+    Create the staging table with column types inferred from a sample of rows.
+
+    Returns:
+        The SQL type of every column
+    """
+    types = infer_column_types(headers, sample)
+    columns = ', '.join(f"{name} {sql_type}" for name, sql_type in zip(headers, types))
+    cursor.execute(f"CREATE TABLE {table} ({columns})")
+    return types
+
+
+def _sort_key(key: Sequence) -> list:
+    return [sqlite_sort_key(value) for value in key]
+
+
+def _describe_key(key: Sequence) -> str:
+    return ', '.join('NULL' if value is None else str(value) for value in key)
+
+
+class _OrderCheck:
+    """Track the current group key and reject keys that break the sort order."""
+
+    def __init__(self, key_names: List[str]):
+        self.key_names = key_names
+        self.key = None
+
+    def advance(self, key: Tuple, first_row: int, rows: int, last_row: int) -> bool:
+        """
+        Check the next group of a chunk, listed in order of first appearance.
+
+        Returns:
+            True if the group continues the current key from the previous chunk
+        """
+        if rows != last_row - first_row + 1:
+            raise ValueError(
+                f"Input is not sorted by {', '.join(self.key_names)}: group "
+                f"({_describe_key(key)}) appears again at data row {last_row}. "
+                f"Sort the input or drop --presorted"
+            )
+        if self.key is not None:
+            if key == self.key:
+                return True
+            if _sort_key(key) < _sort_key(self.key):
+                raise ValueError(
+                    f"Input is not sorted by {', '.join(self.key_names)}: "
+                    f"({_describe_key(key)}) comes after ({_describe_key(self.key)}) "
+                    f"at data row {first_row}. Sort the input or drop --presorted"
+                )
+        self.key = key
+        return False
+
+
+def iter_presorted_groups(
+    cursor: sqlite3.Cursor,
+    table: str,
+    width: int,
+    rows: Iterable[Sequence[str]],
+    keys: List[Tuple[str, Optional[str]]],
+    aggregates: List[Tuple[str, Optional[str]]],
+    chunk_rows: int = CHUNK_ROWS
+) -> Tuple[List[str], Iterator[tuple]]:
+    """
+    Aggregate rows sorted by the group keys, one chunk at a time.
+
+    Args:
+        cursor: Cursor of a connection holding the staging table
+        table: Staging table created with create_staging_table
+        width: Number of columns of the staging table
+        rows: Data rows, in group key order
+        keys: Group by (expression, alias) pairs
+        aggregates: Aggregate (expression, alias) pairs
+        chunk_rows: Rows inserted between flushes
+
+    Returns:
+        Tuple of (column names, iterator over result rows in key order)
+    """
+    key_exprs = [expr for expr, _ in keys]
+    select = ', '.join(
+        f"{expr} as {alias}" if alias else expr for expr, alias in keys + aggregates
+    )
+    group_by = ', '.join(key_exprs)
+    cursor.execute(f"SELECT {select} FROM {table} LIMIT 0")
+    columns = [desc[0] for desc in cursor.description]
+
+    # None for median, DISTINCT and other aggregates that need all values of a group
+    decomposed = [decompose_aggregate(expr) for expr, _ in aggregates]
+    mergeable = all(decomposed)
+    order = _OrderCheck([alias or expr for expr, alias in keys])
+    # Rowids are data row numbers, used for error messages and group order
+    table_columns = [info[1] for info in cursor.execute(f"PRAGMA table_info({table})")]
+    insert = (f"INSERT INTO {table} (rowid, {', '.join(table_columns)}) "
+              f"VALUES ({', '.join('?' * (width + 1))})")
+    key_columns = ', '.join(f"{expr} AS k{i}" for i, expr in enumerate(key_exprs))
+
+    def load(chunk: List[Sequence[str]], offset: int):
+        cursor.executemany(insert, (
+            [offset + n] + list(itertools.islice(itertools.chain(row, itertools.repeat(None)), width))
+            for n, row in enumerate(chunk, start=1)
+        ))
+
+    def chunks():
+        offset = 0
+        iterator = iter(rows)
+        while True:
+            chunk = list(itertools.islice(iterator, chunk_rows))
+            if not chunk:
+                return
+            load(chunk, offset)
+            offset += len(chunk)
+            yield
+
+    def merged_groups() -> Iterator[tuple]:
+        partial_columns = []
+        merge_columns = []
+        for partials, merge in decomposed:
+            names = []
+            for partial in partials:
+                names.append(f"p{len(partial_columns)}")
+                partial_columns.append(f"{partial} AS {names[-1]}")
+            merge_columns.append(merge.format(*names))
+        key_names = [f"k{i}" for i in range(len(keys))]
+        cursor.execute(f"DROP TABLE IF EXISTS temp.{_PARTIALS_TABLE}")
+        cursor.execute(
+            f"CREATE TEMP TABLE {_PARTIALS_TABLE} AS SELECT {key_columns}, "
+            f"{', '.join(partial_columns)}, 0 AS seq FROM {table} LIMIT 0"
+        )
+        partials_query = (
+            f"SELECT {key_columns}, {', '.join(partial_columns)}, "
+            f"MIN(rowid), COUNT(*), MAX(rowid) FROM {table} GROUP BY {group_by} ORDER BY MIN(rowid)"
+        )
+        merge_query = (
+            f"SELECT {', '.join(key_names + merge_columns)} FROM {_PARTIALS_TABLE} "
+            f"GROUP BY {', '.join(key_names)} ORDER BY MIN(seq)"
+        )
+        store = (f"INSERT INTO {_PARTIALS_TABLE} VALUES "
+                 f"({', '.join('?' * (len(keys) + len(partial_columns) + 1))})")
+
+        def flush(finished: List[tuple]):
+            cursor.executemany(store, finished)
+            merged = cursor.execute(merge_query).fetchall()
+            cursor.execute(f"DELETE FROM {_PARTIALS_TABLE}")
+            return merged
+
+        open_group: List[tuple] = []
+        for _ in chunks():
+            finished = []
+            groups = cursor.execute(partials_query).fetchall()
+            cursor.execute(f"DELETE FROM {table}")
+            for group in groups:
+                key = group[:len(keys)]
+                if not order.advance(key, *group[-3:]) and open_group:
+                    finished.extend(open_group)
+                    open_group = []
+                open_group.append(group[:-3] + (group[-3],))
+            if finished:
+                yield from flush(finished)
+        if open_group:
+            yield from flush(open_group)
+
+    def retained_groups() -> Iterator[tuple]:
+        groups_query = (
+            f"SELECT {key_columns}, MIN(rowid), COUNT(*), MAX(rowid) FROM {table} "
+            f"GROUP BY {group_by} ORDER BY MIN(rowid)"
+        )
+        final_query = (
+            f"SELECT {select} FROM {table} WHERE rowid < ? "
+            f"GROUP BY {group_by} ORDER BY MIN(rowid)"
+        )
+        for _ in chunks():
+            groups = cursor.execute(groups_query).fetchall()
+            for group in groups:
+                order.advance(group[:len(keys)], *group[-3:])
+            # The last group may continue in the next chunk; everything before it is done
+            boundary = groups[-1][-3]
+            yield from cursor.execute(final_query, (boundary,)).fetchall()
+            cursor.execute(f"DELETE FROM {table} WHERE rowid < ?", (boundary,))
+        yield from iter_query(cursor, f"SELECT {select} FROM {table} GROUP BY {group_by}")
+
+    return columns, merged_groups() if mergeable else retained_groups()
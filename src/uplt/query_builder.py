@@ -1,6 +1,78 @@
-"""SQL query builder for chart commands."""
+"""SQL query builders for the chart, groupby, add and filter commands."""
+from __future__ import annotations
+
 import re
-from typing import List, Optional, Tuple
+
+from .aggregates import shortcut_percentile
+from .core import parse_field_with_alias, split_expressions
+from .timeparse import (
+    convert_time_literals,
+    display_columns,
+    display_expression,
+    is_time_expression,
+)
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import List, Optional, Tuple
+
+_SUBQUERY_OR_WINDOW = re.compile(r'\b(select|over)\b')
+# Row ids restart in every chunk of a parallel run
+_ROWID = re.compile(r'\b(rowid|_rowid_|oid)\b')
+_FUNCTION_CALL = re.compile(r'([a-z_][a-z0-9_]*)\s*\(')
+_AGGREGATION = re.compile(r'^(\w+)\((.+)\)$')
+
+
+# Aggregations recognized in value specs; median, percentile, pNN and the
+# approx_* sketches are registered on the connection by uplt.aggregates
+AGGREGATE_FUNCTIONS = [
+    'avg', 'sum', 'min', 'max', 'count', 'variance', 'stddev', 'median', 'percentile',
+    'approx_percentile', 'approx_count_distinct',
+]
+
+# Aggregations that take the percentile as a second argument
+_TWO_ARGUMENT_FUNCTIONS = ['percentile', 'approx_percentile']
+
+
+# SQLite's own aggregate and window functions
+_SQLITE_AGGREGATES = [
+    'total', 'group_concat', 'string_agg', 'row_number', 'rank', 'dense_rank',
+    'percent_rank', 'cume_dist', 'ntile', 'lag', 'lead', 'first_value',
+    'last_value', 'nth_value',
+]
+
+# Functions that give a different result on every call or depend on the connection
+_NON_DETERMINISTIC = [
+    'random', 'randomblob', 'changes', 'total_changes', 'last_insert_rowid',
+]
+
+
+def is_row_local(expr: str) -> bool:
+    """
+    Check whether an expression only looks at the current row.
+    
+    Aggregates, window functions and subqueries see other rows, and rowid
+    restarts in each chunk, so they give different results when rows are
+    processed in separate chunks; so do non-deterministic functions such as
+    random(). The check is conservative: scalar max(a, b) is treated as an
+    aggregate too.
+    """
+    lowered = expr.lower()
+    if _SUBQUERY_OR_WINDOW.search(lowered) or _ROWID.search(lowered):
+        return False
+    for name in _FUNCTION_CALL.findall(lowered):
+        if (name in AGGREGATE_FUNCTIONS or name in _SQLITE_AGGREGATES or name in _NON_DETERMINISTIC
+                or name.startswith('uplt_') or shortcut_percentile(name) is not None):
+            return False
+    return True
+
+
+def is_aggregate_shortcut(spec: str) -> bool:
+    """Check whether a groupby spec is a bare function applied to every numeric column."""
+    name = spec.strip().lower()
+    if name in _TWO_ARGUMENT_FUNCTIONS:
+        return False
+    return name in AGGREGATE_FUNCTIONS or shortcut_percentile(name) is not None
 
 
 def parse_aggregation(field: str) -> Tuple[Optional[str], str]:
@@ -11,21 +83,37 @@ def parse_aggregation(field: str) -> Tuple[Optional[str], str]:
     Examples:
         "avg(price)" -> ("avg", "price")
         "sum(total)" -> ("sum", "total")
+        "p99(latency)" -> ("p99", "latency")
         "price" -> (None, "price")
     """
     # Match patterns like avg(field), sum(field), etc.
-    match = re.match(r'^(\w+)\((.+)\)$', field.strip())
+    match = _AGGREGATION.match(field.strip())
     if match:
         func, field_name = match.groups()
         # Validate known aggregation functions
-        valid_funcs = ['avg', 'sum', 'min', 'max', 'count']
-        if func.lower() in valid_funcs:
+        if func.lower() in AGGREGATE_FUNCTIONS or shortcut_percentile(func) is not None:
             return func.lower(), field_name.strip()
     
     # No aggregation function found
     return None, field.strip()
 
 
+def sql_literal(value) -> str:
+    """
+    Render a Python value as an SQL literal.
+    
+    Examples:
+        "it's" -> "'it''s'"
+        42 -> "42"
+        None -> "NULL"
+    """
+    if value is None:
+        return "NULL"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
 def parse_chart_command(args: List[str]) -> Tuple[str, dict]:
     """
     Parse chart command arguments.
@@ -75,3 +163,251 @@ def parse_chart_command(args: List[str]) -> Tuple[str, dict]:
     
     # Add more chart types here in the future
     raise ValueError(f"Unknown chart type: {chart_type}")
+
+
+# Marker shown in place of a key that was rolled up into a subtotal
+ALL_MARKER = "(all)"
+
+# Temporary table holding the finest-level partial aggregates for grouping sets
+GROUPING_PARTIALS_TABLE = "uplt_grouping_partials"
+
+
+def quote_identifier(name: str) -> str:
+    """Quote a column name for use as an SQL identifier."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def decompose_aggregate(expr: str) -> Optional[Tuple[List[str], str]]:
+    """
+    Split an aggregate into partial aggregates and the expression merging them.
+    
+    Partials are computed once per finest-level group; the merge expression
+    combines them for any coarser group. The merge template refers to the
+    partial columns as {0}, {1}, ...
+    
+    Examples:
+        "avg(x)" -> (["SUM(x)", "COUNT(x)"], "SUM({0}) * 1.0 / SUM({1})")
+        "count(*)" -> (["COUNT(*)"], "SUM({0})")
+        "stddev(x)" -> (["uplt_moments(x)"], "uplt_merge_stddev({0})")
+        "median(x)" -> None (not decomposable)
+        "count(distinct x)" -> None (values seen in several partials would count twice)
+    """
+    func, field_name = parse_aggregation(expr)
+    if re.match(r'distinct\b', field_name.strip(), re.IGNORECASE):
+        return None
+    # parse_aggregation also matches "sum(a) / count(b)"; only a single call decomposes
+    depth = 0
+    for char in field_name:
+        depth += {'(': 1, ')': -1}.get(char, 0)
+        if depth < 0:
+            return None
+    if func == 'avg':
+        return [f"SUM({field_name})", f"COUNT({field_name})"], "SUM({0}) * 1.0 / SUM({1})"
+    if func == 'sum':
+        return [f"SUM({field_name})"], "SUM({0})"
+    if func == 'count':
+        return [f"COUNT({field_name})"], "SUM({0})"
+    if func in ('min', 'max'):
+        return [f"{func.upper()}({field_name})"], f"{func.upper()}({{0}})"
+    if func in ('variance', 'stddev'):
+        return [f"uplt_moments({field_name})"], f"uplt_merge_{func}({{0}})"
+    return None
+
+
+def rollup_sets(key_count: int) -> List[Tuple[int, ...]]:
+    """
+    Grouping sets of a ROLLUP over the given number of keys, finest first.
+    
+    Example:
+        2 -> [(0, 1), (0,), ()]
+    """
+    return [tuple(range(n)) for n in range(key_count, -1, -1)]
+
+
+def parse_grouping_sets(spec: str, key_names: List[str]) -> List[Tuple[int, ...]]:
+    """
+    Parse a --grouping-sets specification into tuples of key indices.
+    
+    Sets are separated by ';' and list group by keys (by name or alias)
+    separated by ','; an empty set or "()" is the grand total.
+    
+    Example:
+        "model,n_depth; model; ()" with keys [model, n_depth] -> [(0, 1), (0,), ()]
+    """
+    sets = []
+    for item in spec.split(';'):
+        item = item.strip()
+        if item in ('', '()'):
+            sets.append(())
+            continue
+        indices = []
+        for name in item.strip('()').split(','):
+            name = name.strip()
+            if name not in key_names:
+                raise ValueError(
+                    f"Grouping set key '{name}' is not a group by field. "
+                    f"Available: {', '.join(key_names)}"
+                )
+            indices.append(key_names.index(name))
+        sets.append(tuple(sorted(set(indices))))
+    return sets
+
+
+def build_grouping_sets_query(
+    table_name: str,
+    key_exprs: List[str],
+    key_names: List[str],
+    agg_exprs: List[str],
+    agg_names: List[str],
+    grouping_sets: List[Tuple[int, ...]]
+) -> Tuple[Optional[str], str]:
+    """
+    Build queries computing several grouping levels from one aggregation pass.
+    
+    When every aggregate decomposes into partials (avg, sum, count, min, max),
+    the first query computes them per finest-level group and should be stored
+    in GROUPING_PARTIALS_TABLE; the second merges those partials upward into
+    every requested level, so the input table is scanned once. Otherwise the
+    first query is None and each level aggregates the input table directly.
+    
+    Rolled up keys are shown as ALL_MARKER and each subtotal follows the
+    groups it summarizes.
+    
+    Returns:
+        Tuple of (partials query or None, final query)
+    """
+    decomposed = [decompose_aggregate(expr) for expr in agg_exprs]
+    key_count = len(key_exprs)
+    
+    if all(decomposed):
+        partial_columns = [f"{expr} AS k{i}" for i, expr in enumerate(key_exprs)]
+        merge_exprs = []
+        for partials, merge in decomposed:
+            names = []
+            for partial in partials:
+                names.append(f"p{len(partial_columns) - key_count}")
+                partial_columns.append(f"{partial} AS {names[-1]}")
+            merge_exprs.append(merge.format(*names))
+        partials_query = (
+            f"SELECT {', '.join(partial_columns)} FROM {table_name} "
+            f"GROUP BY {', '.join(key_exprs)}"
+        )
+        source = GROUPING_PARTIALS_TABLE
+        level_keys = [f"k{i}" for i in range(key_count)]
+    else:
+        partials_query = None
+        source = table_name
+        merge_exprs = list(agg_exprs)
+        level_keys = list(key_exprs)
+    
+    levels = []
+    for grouping_set in grouping_sets:
+        columns = []
+        for i, key in enumerate(level_keys):
+            grouped = i in grouping_set
+            columns.append(f"{key if grouped else 'NULL'} AS k{i}")
+            columns.append(f"{0 if grouped else 1} AS g{i}")
+        columns += [f"{expr} AS a{j}" for j, expr in enumerate(merge_exprs)]
+        group_by = f" GROUP BY {', '.join(level_keys[i] for i in grouping_set)}" if grouping_set else ""
+        levels.append(f"SELECT {', '.join(columns)} FROM {source}{group_by}")
+    
+    display = [
+        f"CASE WHEN g{i} THEN '{ALL_MARKER}' ELSE k{i} END AS {quote_identifier(name)}"
+        for i, name in enumerate(key_names)
+    ] + [f"a{j} AS {quote_identifier(name)}" for j, name in enumerate(agg_names)]
+    order_by = ", ".join(f"g{i}, k{i}" for i in range(key_count))
+    final_query = (
+        f"SELECT {', '.join(display)} FROM ({' UNION ALL '.join(levels)}) "
+        f"ORDER BY {order_by}"
+    )
+    return partials_query, final_query
+
+
+def added_column_names(column_expr: str, original_columns) -> list:
+    """Names of the columns an add expression creates: aliases, or expr_N by position."""
+    # Parse multiple column expressions (comma-separated, respecting parentheses)
+    new_column_names = []
+    for i, expr in enumerate(split_expressions(column_expr)):
+        _, alias = parse_field_with_alias(expr)
+        if alias:
+            new_column_names.append(alias)
+        else:
+            # Default name if no alias provided
+            new_column_names.append(f"expr_{len(original_columns)+i+1}")
+    return new_column_names
+
+
+def added_columns(column_expr: str, timestamps=None) -> str:
+    """SELECT list of an add expression, with time expressions shown as ISO-8601 text."""
+    columns = []
+    for field in split_expressions(column_expr):
+        expr, alias = parse_field_with_alias(field)
+        display = display_expression(expr, timestamps)
+        if display:
+            columns.append(f"{display} AS {alias}" if alias else display)
+        else:
+            columns.append(convert_time_literals(field, timestamps))
+    return ', '.join(columns)
+
+
+def build_add_query(table_name: str, headers: List[str], column_expr: str, timestamps=None) -> str:
+    """Query of the add command: every column followed by the added ones."""
+    return f"SELECT {display_columns(headers, timestamps)}, {added_columns(column_expr, timestamps)} FROM {table_name}"
+
+
+def build_filter_query(table_name: str, headers: List[str], condition: str, timestamps=None) -> str:
+    """Query of the filter command: the rows matching condition."""
+    condition = convert_time_literals(condition, timestamps)
+    return f"SELECT {display_columns(headers, timestamps)} FROM {table_name} WHERE {condition}"
+
+
+def aggregate_fields(agg_spec: str, numeric_columns: Optional[List[str]] = None) -> List[str]:
+    """
+    SELECT fields of a groupby aggregation spec.
+    
+    A shortcut such as 'avg' or 'p99' applies to each of numeric_columns,
+    named <column>_<function>; otherwise the spec is a comma-separated list
+    of aggregate expressions with optional aliases.
+    """
+    if is_aggregate_shortcut(agg_spec):
+        agg_func = agg_spec.lower()
+        return [f"{agg_func}({col}) as {col}_{agg_func}" for col in numeric_columns or []]
+    fields = []
+    for agg_expr in split_expressions(agg_spec):
+        expr, alias = parse_field_with_alias(agg_expr)
+        fields.append(f"{expr} as {alias}" if alias else expr)
+    return fields
+
+
+def build_groupby_query(table_name: str, raw_fields: List[str], agg_fields: List[str],
+                        timestamps=None, dictionaries=None) -> str:
+    """
+    GROUP BY query over the key fields (with optional aliases) and aggregate fields.
+    
+    Time keys are grouped as epoch seconds but shown as ISO-8601 text. When
+    keys are dictionary encoded, the codes are grouped instead (see
+    uplt.dictionary.build_code_groupby_query).
+    """
+    keys = [parse_field_with_alias(field) for field in raw_fields]
+    expressions = [expr for expr, _ in keys]
+    if dictionaries and not any(is_time_expression(expr, timestamps) for expr in expressions):
+        # Group the integer codes and decode one value per group
+        from .dictionary import build_code_groupby_query
+        query = build_code_groupby_query(table_name, list(dictionaries), keys,
+                                         [parse_field_with_alias(expr) for expr in agg_fields])
+        if query is not None:
+            return query
+    
+    select_parts = []
+    for expr, alias in keys:
+        display = display_expression(expr, timestamps)
+        if display:
+            name = alias or '"' + expr.replace('"', '""') + '"'
+            select_parts.append(f"{display} as {name}")
+        elif alias:
+            select_parts.append(f"{expr} as {alias}")
+        else:
+            select_parts.append(expr)
+    select_parts += agg_fields
+    group_by = ', '.join(expressions)
+    return f"SELECT {', '.join(select_parts)} FROM {table_name} GROUP BY {group_by} ORDER BY {group_by}"
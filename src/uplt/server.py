@@ -0,0 +1,422 @@
+"""Resident server: load CSV files once and answer commands over a Unix socket.
+
+    uplt serve --socket /tmp/uplt.sock results.csv
+    uplt --connect /tmp/uplt.sock cmp model metric "avg(latency)"
+
+`serve` loads its files into a shared in-memory SQLite database, one table
+per file, and listens on the socket. A client sends its command line and
+gets the command's output back as if it had loaded the data itself. Load
+options (--delimiter, --header/--no-header, --parse-times, --dict-encode,
+--numeric-threshold) are the server's; clients pick a table with -t.
+
+Each request runs in its own thread on its own connection, so clients are
+served concurrently. Request connections can't change the loaded tables,
+only create temporary ones. Before a request the files are checked, and when
+one has changed since loading, all of them are loaded into a fresh database
+that later requests use; requests already running finish on the old one.
+The server exits after --idle-timeout seconds without requests.
+
+Protocol: the client sends {"argv": [...]} as one JSON line. The server
+answers with frames of a channel byte (o for stdout, e for stderr, x for the
+exit status), a 4-byte big-endian length and the payload.
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from .aggregates import register_aggregates
+from .cli import (
+    LOAD_OPTIONS,
+    build_parser,
+    check_options,
+    get_header_mode,
+    is_streaming,
+    load_table,
+    run_command,
+    streaming_command,
+)
+from .core import sanitize_column_name
+
+# Client options the server can't honor: files are read and written on the
+# server's side, and clients can't attach databases
+CLIENT_REJECTED_OPTIONS = (
+    ('input', '--input'),
+    ('save_baseline', '--save-baseline'),
+    ('against_baseline', '--against-baseline'),
+    ('db', '--db'),
+    ('save_db', '--save-db'),
+    ('index', '--index'),
+)
+
+# Bytes of stdout collected before a frame is sent
+FRAME_SIZE = 64 * 1024
+
+_FRAME_HEADER = struct.Struct('>cI')
+
+# Authorizer actions that change a database; request connections may only change temp
+_WRITES = frozenset((
+    sqlite3.SQLITE_INSERT, sqlite3.SQLITE_UPDATE, sqlite3.SQLITE_DELETE,
+    sqlite3.SQLITE_CREATE_TABLE, sqlite3.SQLITE_CREATE_VIEW, sqlite3.SQLITE_CREATE_INDEX,
+    sqlite3.SQLITE_CREATE_TRIGGER, sqlite3.SQLITE_DROP_TABLE, sqlite3.SQLITE_DROP_VIEW,
+    sqlite3.SQLITE_DROP_INDEX, sqlite3.SQLITE_DROP_TRIGGER, sqlite3.SQLITE_ALTER_TABLE,
+))
+
+
+def _read_only(action, arg1, arg2, database, trigger):
+    """Authorizer keeping request connections away from the loaded tables."""
+    if action in (sqlite3.SQLITE_ATTACH, sqlite3.SQLITE_DETACH):
+        return sqlite3.SQLITE_DENY
+    if action in _WRITES and database not in (None, 'temp'):
+        return sqlite3.SQLITE_DENY
+    return sqlite3.SQLITE_OK
+
+
+class _Channel:
+    """Text stream sending what is written to it as frames of one channel."""
+
+    def __init__(self, wfile, kind: bytes, buffered: bool, before=None):
+        self.wfile = wfile
+        self.kind = kind
+        self.buffered = buffered
+        # Channel flushed first, so stdout and stderr keep their relative order
+        self.before = before
+        self._pending = []
+        self._size = 0
+
+    def write(self, text: str) -> int:
+        if self.before is not None:
+            self.before.flush()
+        self._pending.append(text)
+        self._size += len(text)
+        if not self.buffered or self._size >= FRAME_SIZE:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        if self._pending:
+            data = ''.join(self._pending).encode('utf-8', 'surrogateescape')
+            self._pending = []
+            self._size = 0
+            send_frame(self.wfile, self.kind, data)
+
+    def isatty(self) -> bool:
+        return False
+
+
+class _ThreadStream:
+    """Stand-in for sys.stdout or sys.stderr writing to the current request's channel.
+
+    Commands print to sys.stdout and sys.stderr; with requests in several
+    threads, each thread redirects only its own output.
+    """
+
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    def redirect(self, target):
+        """Send this thread's output to target (None for the process's stream); returns the previous one."""
+        previous = getattr(self._local, 'target', None)
+        self._local.target = target
+        return previous
+
+    def _target(self):
+        return getattr(self._local, 'target', None) or self._default
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self._target(), name)
+
+
+@contextmanager
+def _server_output():
+    """Print to the server's own stdout and stderr instead of the current client's."""
+    streams = [stream for stream in (sys.stdout, sys.stderr) if isinstance(stream, _ThreadStream)]
+    targets = [stream.redirect(None) for stream in streams]
+    try:
+        yield
+    finally:
+        for stream, target in zip(streams, targets):
+            stream.redirect(target)
+
+
+def send_frame(wfile, kind: bytes, data: bytes):
+    wfile.write(_FRAME_HEADER.pack(kind, len(data)) + data)
+
+
+def read_frame(rfile):
+    """(kind, payload) of the next frame, or None when the connection closed."""
+    header = rfile.read(_FRAME_HEADER.size)
+    if len(header) < _FRAME_HEADER.size:
+        return None
+    kind, size = _FRAME_HEADER.unpack(header)
+    data = rfile.read(size)
+    if len(data) < size:
+        return None
+    return kind, data
+
+
+class Dataset:
+    """A served file and the table it is loaded into."""
+
+    def __init__(self, path: str, table_name: str):
+        self.path = path
+        self.table_name = table_name
+        # File modification time and size when it was loaded
+        self.signature = None
+
+    def file_signature(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+
+class Server:
+    """Datasets loaded into a shared in-memory database and the requests run against them."""
+
+    def __init__(self, args, files):
+        self.args = args
+        if len(files) == 1:
+            names = [args.table_name]
+        else:
+            names = [sanitize_column_name(os.path.splitext(os.path.basename(path))[0])
+                     for path in files]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"Several files would be served as table {duplicates[0]}")
+        self.datasets = {name.lower(): Dataset(path, name) for path, name in zip(files, names)}
+        # URI of the current database and the (headers, timestamps, dictionaries)
+        # of each of its tables, replaced together on reload
+        self.loaded = None
+        self._conn = None
+        self._generation = 0
+        self._reload_lock = threading.Lock()
+        self._activity_lock = threading.Lock()
+        self._active = 0
+        self._last_request = time.monotonic()
+
+    def load(self):
+        """Load every file into a new database, which requests use from then on."""
+        self._generation += 1
+        uri = f"file:uplt-serve-{os.getpid()}-{self._generation}?mode=memory&cache=shared"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        try:
+            register_aggregates(conn)
+            cursor = conn.cursor()
+            tables = {}
+            for key, dataset in self.datasets.items():
+                signature = dataset.file_signature()
+                with open(dataset.path, newline='') as source:
+                    csv_data = source.read().strip()
+                if not csv_data:
+                    raise ValueError(f"No input data in {dataset.path}")
+                load_args = argparse.Namespace(**vars(self.args))
+                load_args.table_name = dataset.table_name
+                tables[key] = load_table(load_args, cursor, csv_data, get_header_mode(self.args))
+                dataset.signature = signature
+            # Other connections only see committed rows
+            conn.commit()
+        except BaseException:
+            conn.close()
+            raise
+        # The old database lives on until the requests still using it close their connections
+        old, self._conn, self.loaded = self._conn, conn, (uri, tables)
+        if old is not None:
+            old.close()
+
+    def refresh(self):
+        """Load the files again if any of them changed."""
+        with self._reload_lock:
+            changed = [dataset.path for dataset in self.datasets.values()
+                       if dataset.file_signature() != dataset.signature]
+            if changed:
+                with _server_output():
+                    if self.args.verbose:
+                        print(f"Reloading after changes to {', '.join(changed)}", file=sys.stderr)
+                    self.load()
+
+    def execute(self, argv):
+        """Run one client command line; output goes to this thread's sys.stdout and sys.stderr."""
+        args = build_parser().parse_intermixed_args(argv)
+        if not args.command:
+            print("Error: No command specified. Use 'query' for SQL or a chart type.", file=sys.stderr)
+            sys.exit(1)
+        if args.command[0] in ("serve", "run") or ';;' in argv or args.into:
+            print("Error: serve and batches can't be sent to a server", file=sys.stderr)
+            sys.exit(1)
+        rejected = [flag for option, flag in CLIENT_REJECTED_OPTIONS if getattr(args, option)]
+        if rejected:
+            print(f"Error: {', '.join(rejected)} can't be used with --connect; "
+                  "run the command without a server", file=sys.stderr)
+            sys.exit(1)
+        check_options(args)
+        for option in LOAD_OPTIONS:
+            setattr(args, option, getattr(self.args, option))
+
+        dataset = self.datasets.get(args.table_name.lower())
+        if dataset is None:
+            tables = ', '.join(d.table_name for d in self.datasets.values())
+            print(f"Error: Table '{args.table_name}' is not served (tables: {tables})", file=sys.stderr)
+            sys.exit(1)
+        self.refresh()
+        uri, tables = self.loaded
+
+        if is_streaming(args):
+            # describe, top and presorted groupby read the file itself
+            args.input = dataset.path
+            with open(dataset.path, newline='') as source:
+                streaming_command(args, source, get_header_mode(args))
+            return
+
+        conn = sqlite3.connect(uri, uri=True)
+        try:
+            register_aggregates(conn)
+            conn.set_authorizer(_read_only)
+            run_command(args, conn.cursor(), *tables[args.table_name.lower()])
+        finally:
+            conn.close()
+
+    def begin_request(self):
+        with self._activity_lock:
+            self._active += 1
+
+    def end_request(self):
+        with self._activity_lock:
+            self._active -= 1
+            self._last_request = time.monotonic()
+
+    def idle_for(self) -> float:
+        """Seconds since the last request finished, 0 while one is running."""
+        with self._activity_lock:
+            return 0.0 if self._active else time.monotonic() - self._last_request
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server.uplt
+        server.begin_request()
+        try:
+            line = self.rfile.readline()
+            if not line:
+                return
+            stdout = _Channel(self.wfile, b'o', buffered=True)
+            stderr = _Channel(self.wfile, b'e', buffered=False, before=stdout)
+            sys.stdout.redirect(stdout)
+            sys.stderr.redirect(stderr)
+            try:
+                try:
+                    server.execute(json.loads(line)['argv'])
+                    status = 0
+                except SystemExit as e:
+                    status = e.code if isinstance(e.code, int) else int(e.code is not None)
+                except (BrokenPipeError, ConnectionResetError):
+                    return
+                except Exception as e:
+                    print(f"Error: {e}", file=sys.stderr)
+                    status = 1
+                stdout.flush()
+                send_frame(self.wfile, b'x', str(status).encode())
+            except OSError:
+                # The client went away
+                pass
+            finally:
+                sys.stdout.redirect(None)
+                sys.stderr.redirect(None)
+        finally:
+            server.end_request()
+
+
+class _SocketServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _listening(path: str) -> bool:
+    """Whether something accepts connections on a Unix socket."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError:
+            return False
+        return True
+
+
+def serve(args, files):
+    """Load files and answer requests on args.socket until idle for args.idle_timeout seconds."""
+    if not args.socket:
+        print("Error: serve requires --socket PATH", file=sys.stderr)
+        sys.exit(1)
+    if not files:
+        print("Error: serve requires at least one CSV file", file=sys.stderr)
+        sys.exit(1)
+    if os.path.exists(args.socket):
+        if _listening(args.socket):
+            print(f"Error: A server is already listening on {args.socket}", file=sys.stderr)
+            sys.exit(1)
+        os.unlink(args.socket)
+
+    server = Server(args, files)
+    server.load()
+
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = _ThreadStream(stdout), _ThreadStream(stderr)
+    listener = _SocketServer(args.socket, _RequestHandler)
+    listener.uplt = server
+    listener.timeout = 0.5
+    try:
+        if args.verbose:
+            tables = ', '.join(d.table_name for d in server.datasets.values())
+            print(f"Serving {tables} on {args.socket}", file=sys.stderr)
+        while not args.idle_timeout or server.idle_for() < args.idle_timeout:
+            listener.handle_request()
+        if args.verbose:
+            print(f"No requests for {args.idle_timeout:g} seconds, exiting", file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.server_close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+        sys.stdout, sys.stderr = stdout, stderr
+
+
+def send_command(path: str, argv) -> int:
+    """Run a command line on the server listening on path, copying its output here.
+
+    Returns:
+        The command's exit status
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError as e:
+            print(f"Error: Can't connect to {path}: {e.strerror}", file=sys.stderr)
+            return 1
+        sock.sendall(json.dumps({'argv': list(argv)}).encode() + b'\n')
+        outputs = {b'o': sys.stdout.buffer, b'e': sys.stderr.buffer}
+        with sock.makefile('rb') as rfile:
+            while True:
+                frame = read_frame(rfile)
+                if frame is None:
+                    print("Error: The server closed the connection", file=sys.stderr)
+                    return 1
+                kind, data = frame
+                if kind == b'x':
+                    sys.stdout.flush()
+                    return int(data)
+                if kind == b'e':
+                    sys.stdout.flush()
+                outputs[kind].write(data)
+                if kind == b'e':
+                    outputs[kind].flush()
@@ -0,0 +1,185 @@
+"""In-process API: load CSV data once and run many uplt commands on it.
+
+    from uplt import Session
+
+    with Session() as session:
+        session.load("results.csv")
+        for model, latency in session.groupby("model", "avg(latency)"):
+            ...
+        print(session.heatmap("n_depth", "model", "avg(latency)"))
+        for line in session.compare("model", "metric", "avg(latency)"):
+            print(line)
+
+A Session wraps one SQLite connection, so each file is parsed once however
+many analyses run on it. query(), add(), filter() and groupby() return
+sqlite3 cursors: iterators over the result rows, with the column names in
+their description. compare() yields the chart's lines as they are produced.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+
+from .aggregates import register_aggregates
+from .core import (
+    create_table_from_csv,
+    iter_query,
+    parse_field_with_alias,
+    sample_numeric_columns,
+    split_expressions,
+)
+from .query_builder import (
+    aggregate_fields,
+    build_add_query,
+    build_filter_query,
+    build_groupby_query,
+    is_aggregate_shortcut,
+)
+from .timeparse import display_expression, is_time_expression
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Iterator, List, Optional, Sequence, Union
+
+
+class Session:
+    """One in-memory SQLite database with CSV tables loaded into it."""
+
+    def __init__(self):
+        self.conn = sqlite3.connect(':memory:')
+        register_aggregates(self.conn)
+        # (headers, timestamps, dictionaries) of each loaded table, by lowercase name
+        self._tables = {}
+        self._names = []
+
+    def __enter__(self) -> Session:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def load(
+        self,
+        source,
+        table: str = 'data',
+        header: Optional[bool] = None,
+        parse_times: bool = False,
+        dict_encode: bool = False,
+        numeric_threshold: float = 100.0
+    ) -> List[str]:
+        """
+        Load CSV data into a new table.
+
+        Args:
+            source: Path of a CSV file, or a text stream to read it from
+            table: Name of the table
+            header: Whether the first row holds the column names; detected when None
+            parse_times: Store ISO-8601 timestamp columns as epoch seconds (--parse-times)
+            dict_encode: Store low-cardinality text columns as codes (--dict-encode)
+            numeric_threshold: Percentage of numbers that makes a column numeric
+                (--numeric-threshold)
+
+        Returns:
+            The column names
+        """
+        if table.lower() in self._tables:
+            raise ValueError(f"Table '{table}' is already loaded")
+        if not 0 < numeric_threshold <= 100:
+            raise ValueError("numeric_threshold must be greater than 0 and at most 100")
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, newline='') as stream:
+                csv_data = stream.read().strip()
+        else:
+            csv_data = source.read().strip()
+        if not csv_data:
+            raise ValueError("No input data received.")
+
+        header_mode = 'auto' if header is None else ('yes' if header else 'no')
+        timestamps = {} if parse_times else None
+        dictionaries = {} if dict_encode else None
+        headers = create_table_from_csv(self.conn.cursor(), csv_data, table, header_mode,
+                                        timestamps, dictionaries, numeric_threshold / 100)
+        self._tables[table.lower()] = (headers, timestamps, dictionaries)
+        self._names.append(table)
+        return headers
+
+    def columns(self, table: str = 'data') -> List[str]:
+        """Column names of a loaded table."""
+        return list(self._table(table)[0])
+
+    def query(self, sql: str, parameters: Sequence = ()) -> sqlite3.Cursor:
+        """Run any SQL statement; ? placeholders take their values from parameters."""
+        try:
+            return self.conn.cursor().execute(sql, parameters)
+        except sqlite3.Error as e:
+            raise ValueError(f"SQL Error: {e}")
+
+    def add(self, expressions: str, table: str = 'data') -> sqlite3.Cursor:
+        """Rows with columns computed from comma-separated expressions appended."""
+        headers, timestamps, _ = self._table(table)
+        return iter_query(self.conn.cursor(), build_add_query(table, headers, expressions, timestamps))
+
+    def filter(self, condition: str, table: str = 'data') -> sqlite3.Cursor:
+        """Rows matching a SQL condition."""
+        headers, timestamps, _ = self._table(table)
+        return iter_query(self.conn.cursor(), build_filter_query(table, headers, condition, timestamps))
+
+    def groupby(self, keys: Union[str, Sequence[str]], aggregates: str = 'avg',
+                table: str = 'data') -> sqlite3.Cursor:
+        """
+        Aggregates per group, ordered by the keys.
+
+        Args:
+            keys: Group by fields, comma-separated or as a list, with optional aliases
+            aggregates: Comma-separated aggregate expressions, or a function
+                such as 'avg' or 'p99' applied to every numeric column
+            table: Name of the table
+        """
+        headers, timestamps, dictionaries = self._table(table)
+        raw_fields = split_expressions(keys) if isinstance(keys, str) else list(keys)
+        numeric_columns = None
+        if is_aggregate_shortcut(aggregates):
+            key_exprs = [parse_field_with_alias(field)[0] for field in raw_fields]
+            candidates = [col for col in headers
+                          if col not in key_exprs and col not in (timestamps or {})]
+            numeric_columns = sample_numeric_columns(self.conn.cursor(), table, candidates)
+            if not numeric_columns:
+                raise ValueError("No numeric columns found to aggregate")
+        query = build_groupby_query(table, raw_fields, aggregate_fields(aggregates, numeric_columns),
+                                    timestamps, dictionaries)
+        return iter_query(self.conn.cursor(), query)
+
+    def heatmap(self, x: str, y: str, value: Optional[str] = None, table: str = 'data',
+                width: Optional[int] = None, height: Optional[int] = None) -> Optional[str]:
+        """Heatmap of y against x, counting rows or aggregating value; None without data."""
+        from .charts import create_heatmap
+
+        _, timestamps, _ = self._table(table)
+        return create_heatmap(self.conn.cursor(), x, y, value, table, width=width, height=height,
+                              x_time=is_time_expression(x, timestamps),
+                              y_time=is_time_expression(y, timestamps))
+
+    def compare(self, versions: str, metrics: str, value: Optional[str] = None,
+                table: str = 'data', **options) -> Iterator[str]:
+        """
+        Lines of a comparison chart of the versions for each metric.
+
+        options are the keyword arguments of uplt.charts.create_multi_comparison,
+        such as display_mode, baseline, stats, ci or sort_by.
+        """
+        from .charts import iter_multi_comparison
+
+        _, timestamps, _ = self._table(table)
+        versions = display_expression(versions, timestamps) or versions
+        metrics = display_expression(metrics, timestamps) or metrics
+        return iter_multi_comparison(self.conn.cursor(), versions, metrics, value, table, **options)
+
+    def _table(self, table: str):
+        try:
+            return self._tables[table.lower()]
+        except KeyError:
+            loaded = ', '.join(self._names) or 'none'
+            raise ValueError(f"Table '{table}' is not loaded (loaded: {loaded})") from None
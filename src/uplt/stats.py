@@ -0,0 +1,141 @@
+"""Statistical helpers for comparison charts.
+
+Everything here works from summary moments (count, sum, sum of squares), so
+callers can collect them in SQL and never pull raw values into Python.
+"""
+import math
+from typing import NamedTuple, Optional, Tuple
+
+
+class WelchResult(NamedTuple):
+    """Result of Welch's two-sample t-test on the difference of means."""
+    diff: float        # mean(b) - mean(a)
+    t: float           # t statistic
+    df: float          # Welch-Satterthwaite degrees of freedom
+    p_value: float     # two-sided p-value
+    half_width: float  # half-width of the confidence interval for diff
+
+
+def moments_to_mean_var(n: int, total: float, total_sq: float) -> Tuple[float, float]:
+    """Convert count, sum and sum of squares to mean and sample variance."""
+    mean = total / n
+    if n < 2:
+        return mean, 0.0
+    # Clamp tiny negative values caused by floating point cancellation
+    variance = max((total_sq - total * total / n) / (n - 1), 0.0)
+    return mean, variance
+
+
+def _beta_continued_fraction(x: float, a: float, b: float) -> float:
+    """Continued fraction for the incomplete beta function (modified Lentz)."""
+    tiny = 1e-300
+    qab = a + b
+    qap = a + 1.0
+    qam = a - 1.0
+    c = 1.0
+    d = 1.0 - qab * x / qap
+    if abs(d) < tiny:
+        d = tiny
+    d = 1.0 / d
+    h = d
+    for m in range(1, 300):
+        m2 = 2 * m
+        aa = m * (b - m) * x / ((qam + m2) * (a + m2))
+        d = 1.0 + aa * d
+        if abs(d) < tiny:
+            d = tiny
+        c = 1.0 + aa / c
+        if abs(c) < tiny:
+            c = tiny
+        d = 1.0 / d
+        h *= d * c
+        aa = -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))
+        d = 1.0 + aa * d
+        if abs(d) < tiny:
+            d = tiny
+        c = 1.0 + aa / c
+        if abs(c) < tiny:
+            c = tiny
+        d = 1.0 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1.0) < 3e-16:
+            break
+    return h
+
+
+def regularized_incomplete_beta(x: float, a: float, b: float) -> float:
+    """Regularized incomplete beta function I_x(a, b)."""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    log_front = (
+        math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+        + a * math.log(x) + b * math.log1p(-x)
+    )
+    front = math.exp(log_front)
+    # Use the symmetry relation where the continued fraction converges fastest
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * _beta_continued_fraction(x, a, b) / a
+    return 1.0 - front * _beta_continued_fraction(1.0 - x, b, a) / b
+
+
+def student_t_two_sided_p(t: float, df: float) -> float:
+    """Two-sided p-value of Student's t distribution."""
+    if math.isinf(t):
+        return 0.0
+    return regularized_incomplete_beta(df / (df + t * t), df / 2.0, 0.5)
+
+
+def student_t_quantile(confidence: float, df: float) -> float:
+    """Critical value t such that P(|T| <= t) equals the given confidence."""
+    alpha = 1.0 - confidence
+    low, high = 0.0, 1.0
+    # Grow the bracket until it contains the quantile
+    while student_t_two_sided_p(high, df) > alpha:
+        high *= 2.0
+    for _ in range(100):
+        mid = (low + high) / 2.0
+        if student_t_two_sided_p(mid, df) > alpha:
+            low = mid
+        else:
+            high = mid
+    return (low + high) / 2.0
+
+
+def welch_test(
+    a: Tuple[int, float, float],
+    b: Tuple[int, float, float],
+    confidence: float = 0.95
+) -> Optional[WelchResult]:
+    """
+    Run Welch's t-test on two samples given as (count, sum, sum of squares).
+
+    Returns:
+        WelchResult, or None when either sample has fewer than 2 values
+    """
+    n_a, sum_a, sq_a = a
+    n_b, sum_b, sq_b = b
+    if not n_a or not n_b or n_a < 2 or n_b < 2:
+        return None
+
+    mean_a, var_a = moments_to_mean_var(n_a, sum_a, sq_a)
+    mean_b, var_b = moments_to_mean_var(n_b, sum_b, sq_b)
+    diff = mean_b - mean_a
+
+    se_a = var_a / n_a
+    se_b = var_b / n_b
+    se_sq = se_a + se_b
+    if se_sq == 0:
+        # No spread at all: any difference is exact
+        p_value = 1.0 if diff == 0 else 0.0
+        return WelchResult(diff, math.copysign(math.inf, diff) if diff else 0.0,
+                           float(n_a + n_b - 2), p_value, 0.0)
+
+    se = math.sqrt(se_sq)
+    t = diff / se
+    df = se_sq * se_sq / (se_a * se_a / (n_a - 1) + se_b * se_b / (n_b - 1))
+    p_value = student_t_two_sided_p(t, df)
+    half_width = student_t_quantile(confidence, df) * se
+    return WelchResult(diff, t, df, p_value, half_width)
@@ -0,0 +1,293 @@
+"""ISO-8601 timestamp detection, epoch storage and time bucketing.
+
+With --parse-times, TEXT columns whose every non-empty value is an ISO-8601
+date or timestamp are stored as epoch seconds (UTC), so ranges, ordering and
+binning compare integers instead of strings:
+
+    2025-05-26                  date, midnight UTC
+    2025-05-26T13:11:48Z        'T' or ' ' separator, optional seconds
+    2025-05-26 13:11:48.250     fractional seconds make the column REAL
+    2025-05-26T15:11:48+02:00   offsets are normalized to UTC
+
+Values without an offset are taken to be UTC. A companion view,
+<table>_text, shows the converted columns as ISO-8601 text again.
+
+Two scalar SQL functions are registered on uplt connections:
+
+    time_bucket(width, t)   start of the width-sized bucket containing t, in
+                            epoch seconds. width is a count and a unit, e.g.
+                            '30s', '5m', '1h', '1d' or '1w' (a bare number is
+                            seconds). t can be epoch seconds or ISO-8601 text,
+                            so it works on columns that weren't converted too.
+    epoch(t)                t as epoch seconds; ISO-8601 text is parsed and
+                            numbers are returned unchanged.
+
+An INTEGER column compares as less than any text in SQLite, so in filter and
+add expressions ISO-8601 literals compared with a converted column
+(ts > '2025-05-26T12:00:00Z', ts BETWEEN '...' AND '...') are rewritten to
+epoch seconds. Elsewhere, such as in query, wrap them in epoch().
+
+Buckets are aligned to the epoch, so daily buckets start at midnight UTC.
+"""
+from __future__ import annotations
+
+import math
+import re
+import sqlite3
+import time
+from functools import lru_cache
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+_TIMESTAMP = re.compile(
+    r'(\d{4})-(\d{2})-(\d{2})'
+    r'(?:[T ](\d{2}):(\d{2})(?::(\d{2})(\.\d+)?)?'
+    r'\s*(Z|[+-]\d{2}(?::?\d{2})?)?)?'
+)
+_LITERAL = r"'((?:[^']|'')*)'"
+_COMPARISON = r'(?:==|=|!=|<>|<=|>=|<|>|\bis\s+not\b|\bis\b)'
+_WIDTH = re.compile(r'(\d+)\s*([smhdw]?)')
+_UNITS = {'': 1, 's': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+_DAYS_IN_MONTH = (31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+# strftime() formats of the text view, by what the column's values contain
+DATE_FORMAT = '%Y-%m-%d'
+SECONDS_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+FRACTION_FORMAT = '%Y-%m-%dT%H:%M:%fZ'
+
+# Heatmap steps for time axes, in seconds
+_TIME_STEPS = (1, 2, 5, 10, 15, 30, 60, 120, 300, 600, 900, 1800, 3600, 7200, 10800,
+               21600, 43200, 86400, 172800, 604800)
+
+
+def _days_from_civil(year: int, month: int, day: int) -> int:
+    """Days since 1970-01-01 of a proleptic Gregorian date."""
+    year -= month <= 2
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def _match_timestamp(text: str) -> Optional[Tuple[int, float, bool]]:
+    """Split an ISO-8601 value into whole epoch seconds, a fraction and whether it has a time."""
+    match = _TIMESTAMP.fullmatch(text.strip())
+    if not match:
+        return None
+    year, month, day, hour, minute, second, fraction, zone = match.groups()
+    year, month, day = int(year), int(month), int(day)
+    if not 1 <= month <= 12 or not 1 <= day <= _DAYS_IN_MONTH[month - 1]:
+        return None
+    if month == 2 and day == 29 and (year % 4 or (year % 100 == 0 and year % 400)):
+        return None
+    seconds = _days_from_civil(year, month, day) * 86400
+    if hour is None:
+        return seconds, 0.0, False
+    hour, minute, second = int(hour), int(minute), int(second or 0)
+    if hour > 23 or minute > 59 or second > 60:
+        return None
+    seconds += hour * 3600 + minute * 60 + second
+    if zone and zone != 'Z':
+        offset = int(zone[1:3]) * 3600 + int(zone[-2:] if len(zone) > 3 else 0) * 60
+        seconds -= offset if zone[0] == '+' else -offset
+    return seconds, float(fraction) if fraction else 0.0, True
+
+
+def parse_timestamp(text: str) -> Optional[Union[int, float]]:
+    """Convert ISO-8601 text to epoch seconds; None if it isn't a timestamp.
+
+    Whole seconds are returned as int, values with a fraction as float.
+    """
+    parts = _match_timestamp(text)
+    if parts is None:
+        return None
+    seconds, fraction, _ = parts
+    return seconds + fraction if fraction else seconds
+
+
+def convert_timestamp_columns(rows: List[List[str]], types: List[str]) -> Dict[int, str]:
+    """Store ISO-8601 TEXT columns as epoch seconds.
+
+    Rows are converted in place and the matching entries of types become
+    INTEGER, or REAL when some value has fractional seconds. Empty values
+    become NULL.
+
+    Returns:
+        Mapping of converted column index to its strftime() display format
+    """
+    formats = {}
+    for i, col_type in enumerate(types):
+        if col_type != 'TEXT':
+            continue
+
+        parsed = []
+        has_time = has_fraction = False
+        for row in rows:
+            value = row[i] if i < len(row) else None
+            if value is None or not value.strip():
+                parsed.append(None)
+                continue
+            parts = _match_timestamp(value)
+            if parts is None:
+                break
+            seconds, fraction, with_time = parts
+            has_time = has_time or with_time
+            has_fraction = has_fraction or bool(fraction)
+            parsed.append(seconds + fraction if fraction else seconds)
+        else:
+            if all(value is None for value in parsed):
+                continue
+            for row, value in zip(rows, parsed):
+                if i < len(row):
+                    row[i] = value
+            types[i] = 'REAL' if has_fraction else 'INTEGER'
+            if has_fraction:
+                formats[i] = FRACTION_FORMAT
+            else:
+                formats[i] = SECONDS_FORMAT if has_time else DATE_FORMAT
+    return formats
+
+
+def is_time_expression(expr: str, timestamps: Optional[Dict[str, str]] = None) -> bool:
+    """Whether an expression yields epoch seconds: a converted column or a time_bucket() call."""
+    expr = expr.strip()
+    if timestamps and expr.lower() in (name.lower() for name in timestamps):
+        return True
+    return re.match(r'time_bucket\s*\(', expr, re.IGNORECASE) is not None
+
+
+def display_expression(expr: str, timestamps: Optional[Dict[str, str]] = None) -> Optional[str]:
+    """SQL rendering a time expression as ISO-8601 text, or None for other expressions."""
+    if not is_time_expression(expr, timestamps):
+        return None
+    formats = {name.lower(): fmt for name, fmt in (timestamps or {}).items()}
+    fmt = formats.get(expr.strip().lower(), SECONDS_FORMAT)
+    return f"strftime('{fmt}', {expr}, 'unixepoch')"
+
+
+def convert_time_literals(expr: str, timestamps: Optional[Dict[str, str]] = None) -> str:
+    """Rewrite ISO-8601 literals compared with converted columns as epoch seconds.
+
+    "ts > '2025-05-26T12:00:00Z'" -> "ts > 1748260800"; literals that aren't
+    timestamps, or are compared with other expressions, are left alone.
+    """
+    if not timestamps or "'" not in expr:
+        return expr
+    names = '|'.join(re.escape(name) for name in sorted(timestamps, key=len, reverse=True))
+    column = rf'(?<![\w."])"?(?:{names})"?(?![\w"(])'
+    patterns = [
+        rf'{column}\s*{_COMPARISON}\s*{_LITERAL}',
+        rf'{_LITERAL}\s*{_COMPARISON}\s*{column}',
+        rf'{column}\s+(?:not\s+)?between\s+{_LITERAL}\s+and\s+{_LITERAL}',
+    ]
+
+    def replace(match: re.Match) -> str:
+        text = match.group(0)
+        # Literals are replaced from the right so earlier offsets stay valid
+        for group in range(match.re.groups, 0, -1):
+            seconds = parse_timestamp(match.group(group).replace("''", "'"))
+            if seconds is not None:
+                # Offsets within the match, including the quotes
+                start = match.start(group) - 1 - match.start()
+                end = match.end(group) + 1 - match.start()
+                text = text[:start] + str(seconds) + text[end:]
+        return text
+
+    for pattern in patterns:
+        expr = re.sub(pattern, replace, expr, flags=re.IGNORECASE)
+    return expr
+
+
+def display_columns(headers: Sequence[str], timestamps: Optional[Dict[str, str]] = None) -> str:
+    """SELECT list of all columns with the converted ones shown as ISO-8601 text."""
+    if not timestamps:
+        return '*'
+    return ', '.join(
+        f"{display_expression(header, timestamps)} AS {header}" if header in timestamps else header
+        for header in headers
+    )
+
+
+@lru_cache(maxsize=64)
+def parse_width(width: Union[str, int]) -> int:
+    """Bucket width in seconds from '30s', '5m', '1h', '1d', '1w' or a number of seconds."""
+    match = _WIDTH.fullmatch(str(width).strip().lower())
+    if not match or int(match.group(1)) <= 0:
+        raise ValueError(f"Invalid time bucket width: {width!r} (expected e.g. '30s', '5m', '1h', '1d')")
+    return int(match.group(1)) * _UNITS[match.group(2)]
+
+
+def time_bucket(width: Union[str, int], value) -> Optional[int]:
+    """Start of the bucket containing value, in epoch seconds."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        parsed = parse_timestamp(value)
+        if parsed is None:
+            try:
+                parsed = float(value)
+            except ValueError:
+                return None
+        value = parsed
+    seconds = parse_width(width)
+    if not isinstance(value, int):
+        if not math.isfinite(value):
+            return None
+        value = math.floor(value)
+    return value - value % seconds
+
+
+def create_time_scale(min_val: float, max_val: float, target_steps: int = 10) -> List[int]:
+    """Axis scale for epoch seconds with steps of whole seconds, minutes, hours or days."""
+    range_val = max(max_val - min_val, 1)
+    raw_step = range_val / target_steps
+    step = next((s for s in _TIME_STEPS if s >= raw_step), None)
+    if step is None:
+        step = math.ceil(raw_step / 86400) * 86400
+    start = math.floor(min_val / step) * step
+    end = math.ceil(max_val / step) * step
+    if end == start:
+        end += step
+    return list(range(start, end + 1, step))
+
+
+def time_label_format(scale: Sequence[float]) -> str:
+    """strftime() format short enough for heatmap labels but precise enough for the scale."""
+    step = scale[1] - scale[0] if len(scale) > 1 else 86400
+    first, last = scale[0], scale[-1]
+    if step % 86400 == 0:
+        same_year = time.gmtime(first).tm_year == time.gmtime(last).tm_year
+        return '%m-%d' if same_year else '%Y-%m-%d'
+    time_format = '%H:%M' if step % 60 == 0 else '%H:%M:%S'
+    if first // 86400 == last // 86400 or (last - first <= 86400 and last % 86400 == 0):
+        return time_format
+    return f'%m-%d {time_format}'
+
+
+def format_epoch(seconds: float, fmt: str = SECONDS_FORMAT) -> str:
+    """Render epoch seconds with a strftime() format, in UTC."""
+    return time.strftime(fmt, time.gmtime(seconds))
+
+
+def epoch(value) -> Optional[Union[int, float]]:
+    """Epoch seconds of ISO-8601 text; numbers are returned unchanged."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, bytes):
+        return None
+    parsed = parse_timestamp(value)
+    if parsed is None:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return parsed
+
+
+def register_time_functions(conn: sqlite3.Connection):
+    """Register time_bucket() and epoch() on a connection."""
+    conn.create_function("time_bucket", 2, time_bucket, deterministic=True)
+    conn.create_function("epoch", 1, epoch, deterministic=True)
@@ -0,0 +1,148 @@
+"""Bounded-memory top-K selection over streamed rows."""
+from __future__ import annotations
+
+import heapq
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+# Space-Saving counters kept per requested value; more counters tighten the
+# error bounds at the cost of memory
+COUNTERS_PER_VALUE = 10
+
+
+def sqlite_sort_key(value) -> Tuple[int, Any]:
+    """Sort key ordering mixed values like SQLite: NULL, numbers, text, blobs."""
+    if value is None:
+        return (0, 0)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    return (3, bytes(value))
+
+
+class _Descending:
+    """Wrap a sort key so the heap keeps the smallest values instead of the largest."""
+
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+
+def top_rows_per_group(
+    rows: Iterable[Sequence],
+    key_count: int,
+    k: int,
+    largest: bool = True
+) -> Iterator[Tuple[Tuple, int, Sequence]]:
+    """
+    Keep the k best rows of every group from a stream of rows.
+
+    Each input row starts with `key_count` group key values followed by the
+    ranking value; rows whose ranking value is NULL or empty are skipped. A heap of at
+    most k rows is kept per group, so memory is O(groups x k) and the input
+    is never sorted. Ties keep the earlier row.
+
+    Yields:
+        (group key, rank, row) in group key order, best row first (rank 1)
+    """
+    heaps: Dict[Tuple, List] = {}
+    wrap = (lambda key: key) if largest else _Descending
+    for sequence, row in enumerate(rows):
+        value = row[key_count]
+        if value is None or value == '':
+            continue
+        group = tuple(row[:key_count])
+        # Later rows lose ties: the heap evicts its smallest entry first
+        entry = (wrap(sqlite_sort_key(value)), -sequence, row)
+        heap = heaps.setdefault(group, [])
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif heap[0] < entry:
+            heapq.heapreplace(heap, entry)
+
+    for group in sorted(heaps, key=lambda g: [sqlite_sort_key(v) for v in g]):
+        best_first = sorted(heaps[group], reverse=True)
+        for rank, (_, _, row) in enumerate(best_first, start=1):
+            yield group, rank, row
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy hitters (Metwally et al. 2005) with a fixed number of counters.
+
+    When a new value arrives and every counter is taken, the smallest counter
+    is reassigned to it and keeps its count as the new value's error bound.
+    Any value occurring more than N / capacity times is guaranteed to be
+    tracked, and each reported count overestimates the true count by at most
+    its error.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.total = 0
+        self.counts: Dict[Any, int] = {}
+        self.errors: Dict[Any, int] = {}
+        # Holds one (count, value) entry per tracked value; counts only grow,
+        # so stale entries are refreshed lazily when they reach the top
+        self._heap: List[Tuple[int, Any]] = []
+
+    def update(self, value):
+        """Count one occurrence of a value."""
+        self.total += 1
+        counts = self.counts
+        if value in counts:
+            counts[value] += 1
+            return
+        if len(counts) < self.capacity:
+            counts[value] = 1
+            self.errors[value] = 0
+            heapq.heappush(self._heap, (1, value))
+            return
+
+        heap = self._heap
+        while True:
+            count, victim = heap[0]
+            if counts[victim] == count:
+                break
+            heapq.heapreplace(heap, (counts[victim], victim))
+        del counts[victim]
+        del self.errors[victim]
+        counts[value] = count + 1
+        self.errors[value] = count
+        heapq.heapreplace(heap, (count + 1, value))
+
+    def top(self, k: int) -> List[Tuple[Any, int, int]]:
+        """The k values with the highest counts as (value, count, error)."""
+        ranked = heapq.nsmallest(
+            k, self.counts.items(), key=lambda item: (-item[1], sqlite_sort_key(item[0]))
+        )
+        return [(value, count, self.errors[value]) for value, count in ranked]
+
+
+def heavy_hitters(values: Iterable, k: int,
+                  counters_per_value: int = COUNTERS_PER_VALUE) -> SpaceSaving:
+    """Count a stream of values with k x counters_per_value Space-Saving counters."""
+    summary = SpaceSaving(max(k, 1) * counters_per_value)
+    update = summary.update
+    for value in values:
+        update(value)
+    return summary
+
+
+def exact_counts(values: Iterable, candidates: Iterable) -> Dict[Any, int]:
+    """Count only the candidate values in a second pass over the stream."""
+    counts = dict.fromkeys(candidates, 0)
+    for value in values:
+        if value in counts:
+            counts[value] += 1
+    return counts
@@ -0,0 +1,108 @@
+import random
+import sqlite3
+
+import pytest
+
+from uplt import aggregates
+from uplt.aggregates import percentile_of, register_aggregates, shortcut_percentile
+
+
+def sorted_percentile(values, q):
+    """Reference percentile with linear interpolation."""
+    ordered = sorted(values)
+    position = q / 100.0 * (len(ordered) - 1)
+    k = int(position)
+    upper = ordered[min(k + 1, len(ordered) - 1)]
+    return ordered[k] + (upper - ordered[k]) * (position - k)
+
+
+@pytest.fixture(params=["python", "numpy"])
+def backend(request, monkeypatch):
+    """Run a test with the pure Python selection and, if installed, NumPy."""
+    if request.param == "numpy":
+        if not aggregates._get_numpy():
+            pytest.skip("NumPy not installed")
+    else:
+        monkeypatch.setattr(aggregates, "_numpy", False)
+    return request.param
+
+
+class TestPercentileOf:
+    """Test exact percentile selection."""
+    
+    def test_matches_sorting(self, backend):
+        rng = random.Random(1)
+        for size in (1, 2, 3, 100, 1025, 5000):
+            values = [rng.choice([rng.random(), 0.5, 1.0]) for _ in range(size)]
+            for q in (0, 1, 25, 50, 90, 99, 100):
+                assert percentile_of(values, q) == pytest.approx(sorted_percentile(values, q))
+    
+    def test_many_duplicates(self, backend):
+        values = [1.0] * 3000 + [2.0] * 3000
+        assert percentile_of(values, 50) == 1.5
+        assert percentile_of(values, 10) == 1.0
+        assert percentile_of(values, 90) == 2.0
+    
+    def test_empty(self, backend):
+        assert percentile_of([], 50) is None
+
+
+class TestShortcutPercentile:
+    def test_names(self):
+        assert shortcut_percentile("median") == 50.0
+        assert shortcut_percentile("p99") == 99.0
+        assert shortcut_percentile("P5") == 5.0
+        assert shortcut_percentile("p0") is None
+        assert shortcut_percentile("p100") is None
+        assert shortcut_percentile("avg") is None
+
+
+class TestRegisteredAggregates:
+    """Test the aggregates registered on a SQLite connection."""
+    
+    def setup_method(self):
+        self.conn = sqlite3.connect(':memory:')
+        register_aggregates(self.conn)
+        self.cursor = self.conn.cursor()
+        self.cursor.execute("CREATE TABLE data (grp TEXT, x)")
+        rows = [("a", v) for v in range(1, 11)] + [("b", 7), ("b", None), ("b", "n/a"), ("b", "3")]
+        self.cursor.executemany("INSERT INTO data VALUES (?, ?)", rows)
+    
+    def query(self, expr):
+        self.cursor.execute(f"SELECT grp, {expr} FROM data GROUP BY grp ORDER BY grp")
+        return self.cursor.fetchall()
+    
+    def test_median(self):
+        assert self.query("median(x)") == [("a", 5.5), ("b", 5.0)]
+    
+    def test_shortcuts(self):
+        assert self.query("p90(x)") == [("a", pytest.approx(9.1)), ("b", pytest.approx(6.6))]
+    
+    def test_percentile(self):
+        assert self.query("percentile(x, 25)") == [("a", 3.25), ("b", 4.0)]
+    
+    def test_percentile_out_of_range(self):
+        with pytest.raises(sqlite3.Error):
+            self.query("percentile(x, 101)")
+    
+    def test_no_values(self):
+        self.cursor.execute("SELECT median(x) FROM data WHERE x IS NULL")
+        assert self.cursor.fetchone() == (None,)
+    
+    def test_variance_and_stddev(self):
+        assert self.query("variance(x)") == [("a", pytest.approx(55 / 6)), ("b", 8.0)]
+        assert self.query("stddev(x)") == [("a", pytest.approx((55 / 6) ** 0.5)), ("b", pytest.approx(8.0 ** 0.5))]
+        self.cursor.execute("SELECT stddev(x) FROM data WHERE x = 1")
+        assert self.cursor.fetchone() == (None,)
+    
+    def test_merged_moments_match_variance(self):
+        # Partial states per (group, parity) merged per group
+        self.cursor.execute(
+            "SELECT grp, uplt_merge_variance(m), uplt_merge_stddev(m) FROM "
+            "(SELECT grp, uplt_moments(x) AS m FROM data GROUP BY grp, rowid % 2) "
+            "GROUP BY grp ORDER BY grp"
+        )
+        assert self.cursor.fetchall() == [
+            ("a", pytest.approx(55 / 6), pytest.approx((55 / 6) ** 0.5)),
+            ("b", pytest.approx(8.0), pytest.approx(8.0 ** 0.5)),
+        ]
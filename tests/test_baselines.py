@@ -0,0 +1,123 @@
+import sqlite3
+
+import pytest
+
+from uplt.baselines import baseline_path
+from uplt.charts import create_multi_comparison
+
+
+class TestBaselinePath:
+    """Test resolving baseline names to snapshot files."""
+    
+    def test_plain_name_uses_baseline_dir(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("UPLT_BASELINE_DIR", str(tmp_path))
+        assert baseline_path("nightly") == str(tmp_path / "nightly.db")
+    
+    def test_paths_are_used_as_is(self):
+        assert baseline_path("refs/nightly") == "refs/nightly"
+        assert baseline_path("nightly.db") == "nightly.db"
+
+
+class TestStoredBaselines:
+    """Test saving aggregates and comparing fresh data against them."""
+    
+    def setup_method(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.cursor = self.conn.cursor()
+        self.cursor.execute("CREATE TABLE data (build TEXT, metric TEXT, ts REAL)")
+    
+    def load(self, rows):
+        self.cursor.execute("DELETE FROM data")
+        self.cursor.executemany("INSERT INTO data VALUES (?, ?, ?)", rows)
+    
+    def compare(self, value_field="avg(ts)", **kwargs):
+        return create_multi_comparison(
+            self.cursor, "build", "metric", value_field, "data", **kwargs
+        )
+    
+    @pytest.fixture(autouse=True)
+    def baseline_dir(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("UPLT_BASELINE_DIR", str(tmp_path))
+        return tmp_path
+    
+    def test_save_and_compare(self, baseline_dir):
+        """Test fresh builds are compared against the saved reference."""
+        self.load([("ref", "x", 10), ("ref", "x", 12), ("ref", "y", 20)])
+        result = self.compare(save_baseline="nightly")
+        
+        assert result.startswith("Saved 2 metrics of version 'ref' as baseline 'nightly'")
+        assert (baseline_dir / "nightly.db").exists()
+        
+        # The reference rows are no longer part of the input
+        self.load([("new", "x", 22), ("new", "x", 22), ("new", "y", 30)])
+        result = self.compare(against_baseline="nightly")
+        lines = result.splitlines()
+        
+        assert lines[0].split() == ["|", "nightly", "|", "new"]
+        assert "22 (+100.0%)" in result
+        assert "30 (+50.0%)" in result
+        # Nothing is left behind in the session database
+        self.cursor.execute("SELECT name FROM sqlite_temp_master")
+        assert self.cursor.fetchall() == []
+    
+    def test_stats_against_saved_moments(self):
+        """Test Welch statistics work from the stored moments."""
+        self.load([("ref", "x", 10), ("ref", "x", 11), ("ref", "x", 12)])
+        self.compare(save_baseline="nightly")
+        self.load([("new", "x", 20), ("new", "x", 21), ("new", "x", 22)])
+        result = self.compare(against_baseline="nightly", stats=True)
+        
+        row = result.splitlines()[2]
+        assert "21 (+90.9%) ±" in row
+        assert not row.rstrip().endswith("~")
+    
+    @pytest.mark.parametrize("value_field", ["count(*)", None])
+    def test_save_and_compare_counts(self, value_field):
+        """Test row counts, which have no values to keep moments of, can be saved."""
+        self.load([("ref", "x", 10), ("ref", "x", 12), ("ref", "y", 20)])
+        result = self.compare(value_field, save_baseline="nightly")
+        assert result.startswith("Saved 2 metrics of version 'ref'")
+        
+        self.load([("new", "x", 1), ("new", "x", 2), ("new", "x", 3), ("new", "y", 4)])
+        result = self.compare(value_field, against_baseline="nightly")
+        
+        assert "3 (+50.0%)" in result
+        assert "1 (+0.0%)" in result
+    
+    def test_saves_requested_baseline_version(self):
+        """Test --baseline selects which version is saved."""
+        self.load([("a", "x", 1), ("b", "x", 2)])
+        result = self.compare(save_baseline="nightly", baseline="b")
+        
+        assert "version 'b'" in result
+    
+    def test_missing_baseline(self):
+        """Test comparing against an unknown baseline explains how to create it."""
+        self.load([("new", "x", 1)])
+        result = self.compare(against_baseline="missing")
+        
+        assert result.startswith("Baseline 'missing' not found")
+        assert "--save-baseline" in result
+    
+    def test_value_fields_must_match(self):
+        """Test a snapshot can only be used for the value fields it was saved with."""
+        self.load([("ref", "x", 1)])
+        self.compare(save_baseline="nightly")
+        result = self.compare("max(ts)", against_baseline="nightly")
+        
+        assert result == "Baseline 'nightly' was saved for values avg(ts); got max(ts)"
+    
+    def test_version_name_clash(self):
+        """Test a version named like the baseline is rejected."""
+        self.load([("nightly", "x", 1)])
+        self.compare(save_baseline="nightly")
+        result = self.compare(against_baseline="nightly")
+        
+        assert result == "Version 'nightly' clashes with the stored baseline name"
+    
+    def test_bootstrap_needs_raw_samples(self):
+        """Test bootstrap intervals are refused since snapshots hold no samples."""
+        self.load([("new", "x", 1)])
+        result = self.compare(against_baseline="nightly", ci="bootstrap")
+        
+        assert "raw samples" in result
@@ -0,0 +1,65 @@
+import pytest
+from uplt.bootstrap import (
+    attach_intervals,
+    bootstrap_diff_intervals,
+    parse_ci_spec,
+    parse_samples,
+)
+
+
+class TestParseCISpec:
+    def test_default_resamples(self):
+        assert parse_ci_spec("bootstrap") == 1000
+    
+    def test_explicit_resamples(self):
+        assert parse_ci_spec("bootstrap:10000") == 10000
+        assert parse_ci_spec("BOOTSTRAP:50") == 50
+    
+    def test_invalid_specs(self):
+        with pytest.raises(ValueError):
+            parse_ci_spec("jackknife")
+        with pytest.raises(ValueError):
+            parse_ci_spec("bootstrap:many")
+        with pytest.raises(ValueError):
+            parse_ci_spec("bootstrap:0")
+
+
+class TestBootstrap:
+    def test_parse_samples(self):
+        assert parse_samples("1,2.5,abc,3") == [1.0, 2.5, 3.0]
+        assert parse_samples(None) == []
+    
+    def test_clear_difference(self):
+        task = ("metric", [10, 11, 12, 11, 10], [[20, 21, 22, 21, 20]])
+        [(low, high)] = bootstrap_diff_intervals(task, resamples=500)
+        assert 0 < low <= 10 <= high
+    
+    def test_deterministic_seed(self):
+        task = ("metric", [1, 5, 2, 8, 3], [[2, 6, 1, 9, 4]])
+        first = bootstrap_diff_intervals(task, resamples=200, seed=7)
+        second = bootstrap_diff_intervals(task, resamples=200, seed=7)
+        other = bootstrap_diff_intervals(task, resamples=200, seed=8)
+        assert first == second
+        assert first != other
+    
+    def test_missing_samples(self):
+        task = ("metric", [1, 2], [[], [3, 4]])
+        intervals = bootstrap_diff_intervals(task, resamples=50)
+        assert intervals[0] is None
+        assert intervals[1] is not None
+        assert bootstrap_diff_intervals(("m", [], [[1]]), resamples=50) == [None]
+    
+    def test_other_statistics(self):
+        task = ("metric", [1, 2, 3], [[11, 12, 13]])
+        [(low, high)] = bootstrap_diff_intervals(task, statistic="max", resamples=100)
+        assert 8 <= low <= high <= 12
+    
+    def test_worker_pool_matches_serial(self):
+        items = [
+            (i, (f"m{i}", [1, 2, 3, i], [[2, 3, 4, i + 1]]))
+            for i in range(40)
+        ]
+        serial = list(attach_intervals(items, resamples=100, jobs=1))
+        parallel = list(attach_intervals(items, resamples=100, jobs=2))
+        assert serial == parallel
+        assert [payload for payload, _ in parallel] == list(range(40))
@@ -7,8 +7,10 @@ from uplt.charts.utils import (
 )
 from uplt.charts import (
     create_heatmap,
-    create_multi_comparison
+    create_multi_comparison,
+    iter_multi_comparison
 )
+from uplt.charts.table import render_table, truncate_cell
 
 
 class TestNumericAxisFunctions:
@@ -60,6 +62,38 @@ class TestNumericAxisFunctions:
         assert find_bin_index(45, scale) == -1
 
 
+class TestTableRenderer:
+    def test_widths_from_headers_and_rows(self):
+        lines = list(render_table(["name", "v"], [["a", "10"], ["bbbbbb", "2"]]))
+        assert lines[0] == "name   | v "
+        assert lines[1] == "-------+---"
+        assert lines[2] == "a      | 10"
+        assert lines[3] == "bbbbbb | 2 "
+    
+    def test_rows_beyond_lookahead_are_truncated(self):
+        rows = [["a"], ["b"], ["long value"]]
+        lines = list(render_table(["col"], rows, lookahead=2))
+        # Width comes from the header and first two rows only
+        assert lines[-1] == "lo…"
+    
+    def test_max_width_caps_columns(self):
+        lines = list(render_table(["header"], [["some long cell"]], max_width=5))
+        assert lines[0] == "head…"
+        assert lines[2] == "some…"
+    
+    def test_streams_lazily(self):
+        def rows():
+            yield ["a"]
+            raise AssertionError("read past lookahead")
+        lines = render_table(["col"], rows(), lookahead=0)
+        assert next(lines) == "col"
+    
+    def test_truncate_cell(self):
+        assert truncate_cell("abc", 5) == "abc"
+        assert truncate_cell("abcdef", 4) == "abc…"
+        assert truncate_cell("abcdef", 1) == "…"
+
+
 class TestHeatmapAggregation:
     """Test the new SQL-based aggregation for heatmaps."""
     
@@ -121,6 +155,20 @@ class TestHeatmapAggregation:
         # The max values should be 30 and 300
         assert "30" in result
         assert "300" in result
+    
+    def test_time_axis(self):
+        # 2025-05-26 13:00 to 15:00 UTC in epoch seconds
+        self.cursor.execute("CREATE TABLE events (t INTEGER, y INTEGER)")
+        self.cursor.executemany("INSERT INTO events VALUES (?, ?)",
+                                [(1748264400 + i * 600, i % 2) for i in range(13)])
+        result = create_heatmap(
+            self.cursor, "t", "y", "count(*)", "events", x_time=True
+        )
+        
+        assert result is not None
+        # 10-minute steps labelled with the time of day instead of epoch seconds
+        assert "13:00 13:10" in result
+        assert "X-axis: 2025-05-26T13:00:00Z" in result
 
 
 class TestComparison:
@@ -271,6 +319,141 @@ class TestComparison:
         assert "| A " in result
         assert "| B " in result
     
+    def test_iter_comparison_matches_chart(self):
+        """Test streaming lines match the assembled chart."""
+        lines = list(iter_multi_comparison(
+            self.cursor, "model_id", "input_size", "score", "test_data"
+        ))
+        result = create_multi_comparison(
+            self.cursor, "model_id", "input_size", "score", "test_data"
+        )
+        assert "\n".join(lines) == result
+        assert len(lines) == 5  # header + separator + 3 metrics
+    
+    def test_comparison_max_width(self):
+        """Test wide cells are truncated with an indicator."""
+        result = create_multi_comparison(
+            self.cursor, "model_id", "input_size", "score", "test_data",
+            max_width=5
+        )
+        
+        assert "15 (…" in result
+        assert "15 (+50.0%)" not in result
+    
+    def test_comparison_sort_by_pct(self):
+        """Test ranking metrics by percentage change."""
+        result = create_multi_comparison(
+            self.cursor, "model_id", "input_size", "score", "test_data", sort_by="pct"
+        )
+        rows = result.splitlines()[2:]
+        # +88.9% (256), +50.0% (128), +18.2% (512)
+        assert [row.split()[0] for row in rows] == ["256", "128", "512"]
+    
+    def test_comparison_top_n(self):
+        """Test keeping only the top ranked metrics."""
+        result = create_multi_comparison(
+            self.cursor, "model_id", "input_size", "latency", "test_data",
+            sort_by="diff", top=2
+        )
+        rows = result.splitlines()[2:]
+        # Latency diffs: 512 -> +24, 256 -> +7, 128 -> +2
+        assert [row.split()[0] for row in rows] == ["512", "256"]
+    
+    def test_comparison_top_defaults_to_abs_pct(self):
+        """Test --top without a sort key ranks by absolute percentage."""
+        self.cursor.execute("INSERT INTO test_data VALUES ('A', 1024, 100, 20)")
+        self.cursor.execute("INSERT INTO test_data VALUES ('B', 1024, 100, 2)")
+        result = create_multi_comparison(
+            self.cursor, "model_id", "input_size", "score", "test_data", top=1
+        )
+        rows = result.splitlines()[2:]
+        assert len(rows) == 1
+        assert rows[0].startswith("1024")
+    
+    def test_comparison_sort_keeps_unranked_metrics(self):
+        """Test metrics without a baseline value are listed last when sorting."""
+        self.cursor.execute("INSERT INTO test_data VALUES ('B', 2048, 1, 1)")
+        result = create_multi_comparison(
+            self.cursor, "model_id", "input_size", "score", "test_data", sort_by="pct"
+        )
+        rows = result.splitlines()[2:]
+        assert len(rows) == 4
+        assert rows[-1].startswith("2048")
+    
+    def test_comparison_pairs_all(self):
+        """Test --pairs all prints one section per pair of versions."""
+        self.cursor.execute("INSERT INTO test_data VALUES ('C', 128, 15, 20)")
+        result = create_multi_comparison(
+            self.cursor, "model_id", "input_size", "score", "test_data", pairs="all"
+        )
+        
+        assert "=== A vs B ===" in result
+        assert "=== A vs C ===" in result
+        assert "=== B vs C ===" in result
+        assert "15 (+50.0%)" in result   # A -> B for 128
+        assert "20 (+33.3%)" in result   # B -> C for 128
+        # The aggregates table is temporary and cleaned up afterwards
+        self.cursor.execute("SELECT name FROM sqlite_temp_master")
+        assert self.cursor.fetchall() == []
+    
+    def test_comparison_pairs_explicit(self):
+        """Test explicit BASELINE:VERSION pairs."""
+        result = create_multi_comparison(
+            self.cursor, "model_id", "input_size", "score", "test_data", pairs="B:A"
+        )
+        
+        assert result.splitlines()[0] == "=== B vs A ==="
+        assert "10 (-33.3%)" in result
+    
+    def test_comparison_pairs_unknown_version(self):
+        """Test pairs naming a missing version report the available ones."""
+        result = create_multi_comparison(
+            self.cursor, "model_id", "input_size", "score", "test_data", pairs="A:Z"
+        )
+        
+        assert result == "Version 'Z' not found. Available versions: A, B"
+    
+    def test_comparison_pairs_matrix(self):
+        """Test the versions x versions summary of mean percentage changes."""
+        result = create_multi_comparison(
+            self.cursor, "model_id", "input_size", "score", "test_data",
+            pairs="all", matrix=True
+        )
+        lines = result.splitlines()
+        
+        assert lines[0].split() == ["baseline", "|", "A", "|", "B"]
+        # Mean of +50.0%, +88.9%, +18.2% over 3 shared metrics
+        assert "+52.4% (3)" in lines[2]
+        assert lines[2].startswith("A ")
+        assert lines[3].startswith("B ")
+    
+    def test_comparison_multiple_value_fields(self):
+        """Test several value fields are compared in stacked sections."""
+        result = create_multi_comparison(
+            self.cursor, "model_id", "input_size", "avg(score), max(latency)", "test_data"
+        )
+        sections = result.split("\n\n")
+        
+        assert len(sections) == 2
+        assert sections[0].startswith("=== avg(score) ===")
+        assert "15 (+50.0%)" in sections[0]
+        assert sections[1].startswith("=== max(latency) ===")
+        assert "55 (+77.4%)" in sections[1]
+    
+    def test_comparison_multiple_value_fields_single_scan(self):
+        """Test all value fields are aggregated by a single query over the table."""
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        list(iter_multi_comparison(
+            self.cursor, "model_id", "input_size", "avg(score), avg(latency), count(*)",
+            "test_data"
+        ))
+        self.conn.set_trace_callback(None)
+        
+        scans = [s for s in statements if "FROM test_data" in s]
+        assert len(scans) == 1
+        assert "GROUP BY" in scans[0]
+    
     def test_comparison_with_null_values(self):
         """Test comparison handles NULL values correctly."""
         self.cursor.execute("INSERT INTO test_data VALUES ('A', 768, NULL, 25)")
@@ -332,6 +515,98 @@ class TestComparison:
         assert "20" in result  # C's score for 128
 
 
+class TestComparisonStats:
+    """Test significance testing in comparison charts."""
+    
+    def setup_method(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.cursor = self.conn.cursor()
+        self.cursor.execute("CREATE TABLE runs (version TEXT, metric TEXT, value REAL)")
+        data = [
+            ('A', 'fast', 10), ('A', 'fast', 12), ('A', 'fast', 11),
+            ('B', 'fast', 15), ('B', 'fast', 16), ('B', 'fast', 14),
+            ('A', 'noisy', 10), ('A', 'noisy', 20),
+            ('B', 'noisy', 11), ('B', 'noisy', 19),
+            ('A', 'single', 5), ('B', 'single', 6),
+        ]
+        self.cursor.executemany("INSERT INTO runs VALUES (?, ?, ?)", data)
+    
+    def teardown_method(self):
+        self.conn.close()
+    
+    def test_stats_marks_insignificant_cells(self):
+        result = create_multi_comparison(
+            self.cursor, "version", "metric", "avg(value)", "runs", stats=True
+        )
+        lines = result.splitlines()
+        fast = next(line for line in lines if line.startswith("fast"))
+        noisy = next(line for line in lines if line.startswith("noisy"))
+        single = next(line for line in lines if line.startswith("single"))
+        
+        assert "15 (+36.4%) ±20.6%" in fast
+        assert "~" not in fast
+        assert noisy.rstrip().endswith("~")
+        # Too few samples to test
+        assert single.rstrip().endswith("~")
+        assert "Welch's t-test" in lines[-1]
+    
+    def test_stats_half_width_in_diff_mode(self):
+        result = create_multi_comparison(
+            self.cursor, "version", "metric", "avg(value)", "runs",
+            stats=True, display_mode="diff"
+        )
+        assert "+4 ±2.27" in result
+    
+    def test_bootstrap_intervals(self):
+        result = create_multi_comparison(
+            self.cursor, "version", "metric", "avg(value)", "runs", ci="bootstrap:500"
+        )
+        lines = result.splitlines()
+        fast = next(line for line in lines if line.startswith("fast"))
+        noisy = next(line for line in lines if line.startswith("noisy"))
+        
+        assert "15 (+36.4%) [+" in fast
+        assert "~" not in fast
+        assert noisy.rstrip().endswith("~")
+        assert "bootstrap, 500 resamples" in lines[-1]
+    
+    def test_bootstrap_is_deterministic(self):
+        first = create_multi_comparison(
+            self.cursor, "version", "metric", "avg(value)", "runs", ci="bootstrap:200", seed=3
+        )
+        second = create_multi_comparison(
+            self.cursor, "version", "metric", "avg(value)", "runs", ci="bootstrap:200", seed=3
+        )
+        assert first == second
+    
+    def test_bootstrap_unsupported_aggregation(self):
+        result = create_multi_comparison(
+            self.cursor, "version", "metric", "count(value)", "runs", ci="bootstrap"
+        )
+        assert result == "Bootstrap confidence intervals are not supported for count()"
+    
+    def test_stats_requires_value_field(self):
+        result = create_multi_comparison(
+            self.cursor, "version", "metric", None, "runs", stats=True
+        )
+        assert result == "Statistics require a value field to compare"
+    
+    @pytest.mark.parametrize("value", ["count(*)", "max(value)", "p90(value)", "avg(value), sum(value)"])
+    def test_stats_only_for_averages(self, value):
+        with pytest.raises(ValueError, match="only supports avg"):
+            create_multi_comparison(self.cursor, "version", "metric", value, "runs", stats=True)
+    
+    @pytest.mark.parametrize("alpha", [0, 1, -0.5, 2])
+    def test_alpha_out_of_range(self, alpha):
+        with pytest.raises(ValueError, match="--alpha must be between 0 and 1"):
+            create_multi_comparison(self.cursor, "version", "metric", "avg(value)", "runs",
+                                    stats=True, alpha=alpha)
+    
+    def test_sql_errors_are_raised(self):
+        with pytest.raises(ValueError, match="SQL Error: no such column: missing"):
+            create_multi_comparison(self.cursor, "version", "metric", "avg(missing)", "runs")
+
+
 class TestChartsWithSQLiteFunctions:
     """Test charts work correctly with SQLite functions in field arguments."""
     
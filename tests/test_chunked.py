@@ -0,0 +1,36 @@
+import random
+
+import pytest
+
+from uplt.chunked import iter_chunk_results, stream_column_types
+from uplt.core import infer_column_types
+
+
+class TestStreamColumnTypes:
+    """Test one-pass type inference against core.infer_column_types."""
+    
+    def test_matches_infer_column_types(self):
+        rng = random.Random(6)
+        values = ["1", "-2", " 3 ", "4.5", "1e3", "", "  ", "abc", "nan"]
+        for _ in range(200):
+            rows = [[rng.choice(values) for _ in range(3)] for _ in range(rng.randrange(1, 6))]
+            rows.append(["7"])  # short rows count as missing values
+            headers = ["a", "b", "c"]
+            assert stream_column_types(iter(rows), 3) == infer_column_types(headers, rows)
+
+
+class TestChunkResults:
+    """Test row-local queries over chunks in worker processes."""
+    
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_order_preserved(self, jobs):
+        rows = [[str(i), str(i % 3)] for i in range(500)]
+        chunks = iter_chunk_results(rows, "data", ["n", "m"], ["INTEGER", "INTEGER"],
+                                    "SELECT *, n * 2 FROM data WHERE m = 0", jobs, chunk_rows=17)
+        
+        lines = ''.join(chunks).splitlines()
+        assert lines == [f"{i},0,{i * 2}" for i in range(0, 500, 3)]
+    
+    def test_sql_error_before_output(self):
+        with pytest.raises(ValueError, match="SQL Error"):
+            iter_chunk_results([["1"]], "data", ["n"], ["INTEGER"], "SELECT * FROM data WHERE n >", 2)
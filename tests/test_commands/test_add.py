@@ -293,4 +293,59 @@ class TestAddCommand:
         
         # Check data
         assert "test,10,5,15,2.0" in output
-        assert "other,20,8,28," in output  # SQLite may round differently
\ No newline at end of file
+        assert "other,20,8,28," in output  # SQLite may round differently
+    
+    def test_add_parallel_file(self, tmp_path):
+        """Test add over --input with --jobs matches the single-process output."""
+        path = tmp_path / "data.csv"
+        path.write_text("name,price,qty\n" + "\n".join(
+            f"item{i},{i % 13 if i % 5 else i / 4},{i % 7}" for i in range(30000)
+        ))
+        expr = "price * qty as total, iif(qty > 3, substr(name, 1, 5), 'small') as tag"
+        
+        expected = subprocess.run(
+            [sys.executable, "-m", "uplt", "--input", str(path), "add", expr],
+            capture_output=True, text=True
+        )
+        proc = subprocess.run(
+            [sys.executable, "-m", "uplt", "--input", str(path), "--jobs", "2", "add", expr],
+            capture_output=True, text=True
+        )
+        
+        assert proc.returncode == 0
+        assert proc.stdout == expected.stdout
+    
+    def test_add_parallel_rowid(self, tmp_path):
+        """Test rowid numbers rows across the whole file under --jobs."""
+        path = tmp_path / "data.csv"
+        path.write_text("name,size\n" + "\n".join(f"item{i},{i % 10}" for i in range(20000)))
+        
+        proc = subprocess.run(
+            [sys.executable, "-m", "uplt", "-i", str(path), "-j", "2", "add", "rowid as n"],
+            capture_output=True, text=True
+        )
+        
+        assert proc.returncode == 0, proc.stderr
+        assert proc.stdout.splitlines()[-1] == "item19999,9,20000"
+    
+    def test_add_compiled_matches_sqlite(self):
+        """Test compiled add expressions print what SQLite computes for them."""
+        csv_data = "name,price,qty\nApple,1.5,3\nBerry,,4\nCherry,2,x\nDate,-0.5,9223372036854775807"
+        expr = "price * qty, qty / 2 as half, upper(name) || '-' || length(name), iif(price > 1, 'hi', 'lo')"
+        
+        compiled = subprocess.run(
+            [sys.executable, "-m", "uplt", "-v", "add", expr],
+            input=csv_data, capture_output=True, text=True
+        )
+        # round() isn't compiled, so this one runs in SQLite
+        fallback = subprocess.run(
+            [sys.executable, "-m", "uplt", "-v", "add", expr + ", round(1)"],
+            input=csv_data, capture_output=True, text=True
+        )
+        
+        assert compiled.returncode == 0 and fallback.returncode == 0
+        assert "Evaluated compiled expression" in compiled.stderr
+        assert "Evaluating with SQLite" in fallback.stderr
+        compiled_lines = compiled.stdout.splitlines()
+        assert compiled_lines[0] == "name,price,qty,expr_4,half,expr_6,expr_7"
+        assert [line + ",1.0" for line in compiled_lines[1:]] == fallback.stdout.splitlines()[1:]
@@ -0,0 +1,85 @@
+"""Test --save-db and --db."""
+import subprocess
+import sys
+
+
+CSV_DATA = "model,metric,latency\nA,x,10\nA,y,200\nB,x,12\nB,y,180\nA,x,110\nB,x,13\n"
+
+
+def uplt(*args, input=None):
+    return subprocess.run(
+        [sys.executable, "-m", "uplt", *args],
+        input=input,
+        capture_output=True,
+        text=True
+    )
+
+
+def test_save_then_query(tmp_path):
+    db = str(tmp_path / "data.db")
+    saved = uplt("--save-db", db, "g", "model", "max(latency)", input=CSV_DATA)
+    assert saved.returncode == 0, saved.stderr
+    assert saved.stdout == "model,max(latency)\nA,200\nB,180\n"
+
+    result = uplt("--db", db, "g", "model", "max(latency)")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == saved.stdout
+
+
+def test_save_with_streaming_command(tmp_path):
+    db = str(tmp_path / "data.db")
+    result = uplt("--save-db", db, "top", "model", input=CSV_DATA)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.startswith("model,count,error\n")
+    assert uplt("--db", db, "q", "SELECT count(*) FROM data").stdout == "count(*)\n6\n"
+
+
+def test_filter_and_compare(tmp_path):
+    db = str(tmp_path / "data.db")
+    assert uplt("--save-db", db, "--index", "model;metric,model", "q", "SELECT 1",
+                input=CSV_DATA).returncode == 0
+    result = uplt("--db", db, "filter", "latency > 100")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == "model,metric,latency\nA,y,200\nB,y,180\nA,x,110\n"
+    result = uplt("--db", db, "cmp", "model", "metric", "avg(latency)")
+    assert result.returncode == 0, result.stderr
+    assert "B" in result.stdout
+
+
+def test_db_is_read_only(tmp_path):
+    db = str(tmp_path / "data.db")
+    uplt("--save-db", db, "q", "SELECT 1", input=CSV_DATA)
+    result = uplt("--db", db, "q", "DELETE FROM data")
+    assert result.returncode == 1
+    assert "readonly" in result.stderr
+    assert uplt("--db", db, "q", "SELECT count(*) FROM data").stdout == "count(*)\n6\n"
+
+
+def test_db_in_batch(tmp_path):
+    db = str(tmp_path / "data.db")
+    uplt("--save-db", db, "q", "SELECT 1", input=CSV_DATA)
+    result = uplt("--db", db, "filter", "latency > 100", "--into", "slow", ";;",
+                  "q", "SELECT count(*) FROM slow")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == "count(*)\n3\n"
+
+
+def test_db_errors(tmp_path):
+    db = str(tmp_path / "data.db")
+    result = uplt("--db", db, "q", "SELECT 1")
+    assert result.returncode == 1
+    assert "Database not found" in result.stderr
+
+    uplt("--save-db", db, "q", "SELECT 1", input=CSV_DATA)
+    result = uplt("--db", db, "describe")
+    assert result.returncode == 1
+    assert "can't be used with --db" in result.stderr
+    result = uplt("--db", db, "-i", db, "q", "SELECT 1")
+    assert result.returncode == 1
+    assert "--db can't be combined with --input" in result.stderr
+
+
+def test_index_requires_save_db():
+    result = uplt("--index", "model", "q", "SELECT 1", input=CSV_DATA)
+    assert result.returncode == 1
+    assert "--index only applies with --save-db" in result.stderr
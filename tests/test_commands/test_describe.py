@@ -0,0 +1,58 @@
+"""Test the describe command functionality."""
+import subprocess
+import sys
+
+
+class TestDescribeCommand:
+    """Test the describe command functionality."""
+    
+    def run(self, *args, csv_data):
+        return subprocess.run(
+            [sys.executable, "-m", "uplt", *args],
+            input=csv_data,
+            capture_output=True,
+            text=True
+        )
+    
+    def test_describe_csv(self):
+        """Test one summary row per column as CSV."""
+        csv_data = "name,score\nA,10\nB,20\nC,\nD,30"
+        
+        proc = self.run("describe", csv_data=csv_data)
+        
+        assert proc.returncode == 0
+        lines = proc.stdout.strip().splitlines()
+        assert lines[0] == "column,type,count,nulls,distinct,min,max,mean,stddev,p50,p90,p99"
+        assert lines[1] == "name,TEXT,4,0,4,A,D,,,,,"
+        assert lines[2].startswith("score,INTEGER,3,1,3,10,30,20.0,10.0,20.0,")
+    
+    def test_describe_selected_columns_pretty(self):
+        """Test describing a subset of columns as a table."""
+        csv_data = "name,score,weight\nA,10,1.5\nB,20,2.5"
+        
+        proc = self.run("--pretty", "describe", "weight", csv_data=csv_data)
+        
+        assert proc.returncode == 0
+        lines = proc.stdout.splitlines()
+        assert lines[0].startswith("column | type | count")
+        assert len(lines) == 3
+        assert lines[2].startswith("weight | REAL ")
+    
+    def test_describe_numeric_threshold(self):
+        """Test --numeric-threshold types columns as they are loaded."""
+        csv_data = "v\n" + "\n".join(str(i) for i in range(1, 11)) + "\nx"
+        
+        proc = self.run("--numeric-threshold", "80", "describe", csv_data=csv_data)
+        
+        assert proc.returncode == 0, proc.stderr
+        assert proc.stdout.splitlines()[1].startswith("v,INTEGER,10,1,10,1,10,5.5,")
+        
+        proc = self.run("describe", csv_data=csv_data)
+        assert proc.stdout.splitlines()[1] == "v,TEXT,11,0,11,1,x,,,,,"
+    
+    def test_describe_unknown_column(self):
+        """Test an unknown column is reported."""
+        proc = self.run("describe", "missing", csv_data="a,b\n1,2")
+        
+        assert proc.returncode == 1
+        assert "Unknown column(s): missing" in proc.stderr
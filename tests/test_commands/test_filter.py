@@ -174,4 +174,107 @@ class TestFilterCommand:
         assert "x,y" in lines[0]
         assert "2,20" in output
         assert "3,30" in output
-        assert "1,10" not in output
\ No newline at end of file
+        assert "1,10" not in output
+    
+    def test_filter_parallel_file(self, tmp_path):
+        """Test filter over --input with --jobs keeps matching rows in input order."""
+        path = tmp_path / "data.csv"
+        path.write_text("id,score\n" + "\n".join(f"{i},{(i * 37) % 101}" for i in range(25000)))
+        
+        proc = subprocess.run(
+            [sys.executable, "-m", "uplt", "-i", str(path), "-j", "2", "filter", "score > 90"],
+            capture_output=True,
+            text=True
+        )
+        
+        assert proc.returncode == 0
+        lines = proc.stdout.splitlines()
+        assert lines[0] == "id,score"
+        assert lines[1:] == [f"{i},{(i * 37) % 101}" for i in range(25000) if (i * 37) % 101 > 90]
+    
+    def test_filter_parallel_rowid(self, tmp_path):
+        """Test rowid conditions see row numbers of the whole file under --jobs."""
+        path = tmp_path / "data.csv"
+        path.write_text("id\n" + "\n".join(str(i) for i in range(25000)))
+        
+        proc = subprocess.run(
+            [sys.executable, "-m", "uplt", "-i", str(path), "-j", "2", "filter", "rowid <= 2"],
+            capture_output=True, text=True
+        )
+        
+        assert proc.returncode == 0, proc.stderr
+        assert proc.stdout.splitlines() == ["id", "0", "1"]
+    
+    def test_filter_compiled_matches_sqlite(self):
+        """Test compiled filter conditions keep the rows SQLite keeps."""
+        csv_data = "name,score,tag\na,10,x\nb,,y\nc,2.5,\nd,-3,x\ne,7,z"
+        condition = "(score > 2 OR tag IS NULL) AND tag NOT IN ('z') AND name LIKE '_'"
+        
+        compiled = subprocess.run(
+            [sys.executable, "-m", "uplt", "-v", "filter", condition],
+            input=csv_data, capture_output=True, text=True
+        )
+        query = subprocess.run(
+            [sys.executable, "-m", "uplt", "query", f"SELECT * FROM data WHERE {condition}"],
+            input=csv_data, capture_output=True, text=True
+        )
+        
+        assert compiled.returncode == 0
+        assert "Evaluated compiled expression" in compiled.stderr
+        assert compiled.stdout == query.stdout
+        # Empty cells stay text, and text sorts after every number
+        assert compiled.stdout.splitlines()[1:] == ["a,10.0,x", "b,,y", "c,2.5,"]
+    
+    def test_filter_invalid_expression_reports_sqlite_error(self):
+        """Test expressions the compiler rejects still get SQLite's error message."""
+        proc = subprocess.run(
+            [sys.executable, "-m", "uplt", "filter", "missing > 1"],
+            input="a,b\n1,2", capture_output=True, text=True
+        )
+        
+        assert proc.returncode == 1
+        assert "no such column: missing" in proc.stderr
+        assert proc.stdout == ""
+    
+    def test_filter_parse_times(self):
+        """Test timestamps compare as epoch seconds and are printed back as ISO-8601 text."""
+        csv_data = ("test_time,value\n2025-05-26T13:11:48Z,1\n2025-05-26T15:40:00+02:00,2\n"
+                    "2025-05-27T00:00:00Z,3")
+        
+        proc = subprocess.run(
+            [sys.executable, "-m", "uplt", "--parse-times", "filter",
+             "test_time < time_bucket('1d', '2025-05-27T08:00:00Z')"],
+            input=csv_data,
+            capture_output=True,
+            text=True
+        )
+        
+        assert proc.returncode == 0, proc.stderr
+        assert proc.stdout.splitlines() == [
+            "test_time,value",
+            "2025-05-26T13:11:48Z,1",
+            "2025-05-26T13:40:00Z,2",
+        ]
+    
+    def test_filter_parse_times_text_literals(self):
+        """Test ISO-8601 literals are compared with timestamps as epoch seconds."""
+        csv_data = ("test_time,value\n2025-05-26T10:00:00Z,1\n2025-05-26T13:00:00Z,2\n"
+                    "2025-05-27T00:00:00Z,3")
+        
+        for condition in ("test_time > '2025-05-26T12:00:00Z'",
+                          "'2025-05-26T12:00:00Z' < test_time",
+                          "test_time BETWEEN '2025-05-26T12:00' AND '2025-05-27'",
+                          "test_time > epoch('2025-05-26T12:00:00Z')"):
+            proc = subprocess.run(
+                [sys.executable, "-m", "uplt", "--parse-times", "filter", condition],
+                input=csv_data,
+                capture_output=True,
+                text=True
+            )
+            
+            assert proc.returncode == 0, proc.stderr
+            assert proc.stdout.splitlines() == [
+                "test_time,value",
+                "2025-05-26T13:00:00Z,2",
+                "2025-05-27T00:00:00Z,3",
+            ], condition
@@ -447,4 +447,316 @@ class TestGroupByCommand:
         assert "V1,GET,150" in output
         assert "V1,POST,200" in output  
         assert "V2,GET,120" in output
-        assert "V2,POST,180" in output
\ No newline at end of file
+        assert "V2,POST,180" in output
+    
+    def test_groupby_pretty_output(self):
+        """Test groupby rendered as an aligned table."""
+        csv_data = "type,value\nA,10\nA,20\nLonger,30"
+        
+        proc = subprocess.run(
+            [sys.executable, "-m", "uplt", "--pretty", "g", "type", "sum(value) as total"],
+            input=csv_data,
+            capture_output=True,
+            text=True
+        )
+        
+        assert proc.returncode == 0
+        lines = proc.stdout.splitlines()
+        
+        assert lines[0] == "type   | total"
+        assert lines[1] == "-------+------"
+        assert lines[2] == "A      | 30   "
+        assert lines[3] == "Longer | 30   "
+    
+    def test_groupby_percentile_shortcut(self):
+        """Test the aggregate-all shortcut with a percentile."""
+        csv_data = "model,latency,tokens\nA,1,10\nA,2,20\nA,3,30\nA,4,40\nA,100,50\nB,5,5"
+        
+        proc = subprocess.run(
+            [sys.executable, "-m", "uplt", "g", "model", "p50"],
+            input=csv_data,
+            capture_output=True,
+            text=True
+        )
+        
+        assert proc.returncode == 0
+        lines = proc.stdout.strip().splitlines()
+        
+        assert lines[0] == "model,latency_p50,tokens_p50"
+        assert lines[1] == "A,3.0,30.0"
+        assert lines[2] == "B,5.0,5.0"
+    
+    def test_groupby_percentiles(self):
+        """Test median, pNN and percentile(x, q) aggregations."""
+        csv_data = "model,latency\n" + "\n".join(f"A,{i}" for i in range(1, 102))
+        
+        proc = subprocess.run(
+            [sys.executable, "-m", "uplt", "g", "model",
+             "median(latency), p90(latency), percentile(latency, 25) as q1"],
+            input=csv_data,
+            capture_output=True,
+            text=True
+        )
+        
+        assert proc.returncode == 0
+        lines = proc.stdout.strip().splitlines()
+        
+        assert lines[0] == "model,median(latency),p90(latency),q1"
+        assert lines[1] == "A,51.0,91.0,26.0"
+    
+    def test_groupby_rollup(self):
+        """Test subtotals and a grand total with --rollup."""
+        csv_data = "model,n_depth,avg_ts\nA,0,10\nA,0,12\nA,512,8\nB,0,20"
+        
+        proc = subprocess.run(
+            [sys.executable, "-m", "uplt", "--rollup", "g", "model,n_depth", "avg(avg_ts)"],
+            input=csv_data,
+            capture_output=True,
+            text=True
+        )
+        
+        assert proc.returncode == 0
+        assert proc.stdout.strip().splitlines() == [
+            "model,n_depth,avg(avg_ts)",
+            "A,0,11.0",
+            "A,512,8.0",
+            "A,(all),10.0",
+            "B,0,20.0",
+            "B,(all),20.0",
+            "(all),(all),12.5",
+        ]
+    
+    def test_groupby_grouping_sets(self):
+        """Test explicit grouping sets by alias."""
+        csv_data = "model,n_depth,avg_ts\nA,0,10\nA,512,8\nB,0,20"
+        
+        proc = subprocess.run(
+            [sys.executable, "-m", "uplt", "--grouping-sets", "depth;()",
+             "g", "model,n_depth as depth", "sum(avg_ts) as total"],
+            input=csv_data,
+            capture_output=True,
+            text=True
+        )
+        
+        assert proc.returncode == 0
+        assert proc.stdout.strip().splitlines() == [
+            "model,depth,total",
+            "(all),0,30",
+            "(all),512,8",
+            "(all),(all),38",
+        ]
+    
+    def test_groupby_top_rows(self):
+        """Test the best rows per group with --top."""
+        csv_data = "model,test,latency\nA,t1,10\nA,t2,30\nA,t3,20\nB,t1,5\nB,t2,\nB,t3,7"
+        
+        proc = subprocess.run(
+            [sys.executable, "-m", "uplt", "--top", "2", "g", "model", "max(latency)"],
+            input=csv_data,
+            capture_output=True,
+            text=True
+        )
+        
+        assert proc.returncode == 0
+        assert proc.stdout.strip().splitlines() == [
+            "model,rank,test,latency",
+            "A,1,t2,30",
+            "A,2,t3,20",
+            "B,1,t3,7",
+            "B,2,t1,5",
+        ]
+    
+    def test_groupby_top_rows_by_expression(self):
+        """Test ranking by an explicit --by expression, smallest first with min()."""
+        csv_data = "model,test,latency\nA,t1,10\nA,t2,30\nB,t1,5"
+        
+        proc = subprocess.run(
+            [sys.executable, "-m", "uplt", "--top", "1", "--by=-latency", "g", "model", "min(x)"],
+            input=csv_data,
+            capture_output=True,
+            text=True
+        )
+        
+        assert proc.returncode == 0
+        assert proc.stdout.strip().splitlines() == [
+            "model,rank,-latency,test,latency",
+            "A,1,-30,t2,30",
+            "B,1,-5,t1,5",
+        ]
+    
+    def test_groupby_top_rows_parse_times(self):
+        """Test --top prints timestamps as ISO-8601 text with --parse-times."""
+        csv_data = "model,t,latency\na,2024-01-01T01:00:00Z,9\na,2024-01-01T02:00:00Z,3\nb,2024-01-01T03:00:00Z,5"
+        
+        proc = subprocess.run(
+            [sys.executable, "-m", "uplt", "--parse-times", "--top", "1", "--by", "latency",
+             "g", "model"],
+            input=csv_data,
+            capture_output=True,
+            text=True
+        )
+        
+        assert proc.returncode == 0, proc.stderr
+        assert proc.stdout.strip().splitlines() == [
+            "model,rank,t,latency",
+            "a,1,2024-01-01T01:00:00Z,9",
+            "b,1,2024-01-01T03:00:00Z,5",
+        ]
+    
+    def test_top_must_be_positive(self):
+        """Test --top 0 and negative values are rejected for groupby and comparisons."""
+        csv_data = "model,test,latency\nA,t1,10\nA,t2,30\nB,t1,5"
+        
+        for top, command in [("0", ["g", "model", "max(latency)"]),
+                             ("-1", ["cmp", "model", "test", "avg(latency)"])]:
+            proc = subprocess.run(
+                [sys.executable, "-m", "uplt", "--top", top] + command,
+                input=csv_data, capture_output=True, text=True
+            )
+            
+            assert proc.returncode == 1
+            assert "Error: --top must be at least 1" in proc.stderr
+    
+    def test_groupby_presorted(self):
+        """Test --presorted streams the same groups as the normal path."""
+        csv_data = "model,latency,n\nA,1,1\nA,3,2\nB,5,3\nC,2,4\nC,4,5"
+        
+        for aggregations in ["avg(latency),count(*) as runs", "median(latency),max(n)", "sum"]:
+            expected = subprocess.run(
+                [sys.executable, "-m", "uplt", "g", "model", aggregations],
+                input=csv_data, capture_output=True, text=True
+            )
+            proc = subprocess.run(
+                [sys.executable, "-m", "uplt", "--presorted", "g", "model", aggregations],
+                input=csv_data, capture_output=True, text=True
+            )
+            
+            assert proc.returncode == 0
+            assert proc.stdout == expected.stdout
+    
+    def test_groupby_presorted_out_of_order(self):
+        """Test --presorted fails clearly when keys aren't sorted."""
+        proc = subprocess.run(
+            [sys.executable, "-m", "uplt", "--presorted", "g", "model", "sum(latency)"],
+            input="model,latency\nB,1\nA,2",
+            capture_output=True,
+            text=True
+        )
+        
+        assert proc.returncode == 1
+        assert "Input is not sorted by model: (A) comes after (B) at data row 2" in proc.stderr
+    
+    def test_groupby_jobs(self):
+        """Test --jobs merges partial aggregates into the same output as one process."""
+        csv_data = "model,latency\n" + "\n".join(f"m{i % 7},{i}" for i in range(200))
+        
+        for aggregations in ["avg(latency),count(*) as runs,max(latency)", "median(latency)", "sum"]:
+            expected = subprocess.run(
+                [sys.executable, "-m", "uplt", "g", "model", aggregations],
+                input=csv_data, capture_output=True, text=True
+            )
+            proc = subprocess.run(
+                [sys.executable, "-m", "uplt", "--jobs", "2", "g", "model", aggregations],
+                input=csv_data, capture_output=True, text=True
+            )
+            
+            assert proc.returncode == 0
+            assert proc.stdout == expected.stdout
+    
+    def test_groupby_jobs_distinct(self):
+        """Test --jobs falls back to one process for DISTINCT aggregates over computed keys."""
+        csv_data = "k,v\n" + "\n".join(f"ab{i % 4},{i % 50}" for i in range(400))
+        command = ["g", "substr(k, 1, 2) as kk", "count(distinct v)"]
+        
+        expected = subprocess.run([sys.executable, "-m", "uplt"] + command,
+                                  input=csv_data, capture_output=True, text=True)
+        proc = subprocess.run([sys.executable, "-m", "uplt", "--jobs", "2"] + command,
+                              input=csv_data, capture_output=True, text=True)
+        
+        assert proc.returncode == 0, proc.stderr
+        assert expected.stdout == "kk,count(distinct v)\nab,50\n"
+        assert proc.stdout == expected.stdout
+    
+    def test_groupby_jobs_late_text_value(self):
+        """Test --jobs picks the columns of a bare aggregate as one process does."""
+        csv_data = ("model,n_depth,latency,score\n"
+                    + "\n".join(f"m{i % 3},{i % 5},{i},{i % 10}" for i in range(300))
+                    + "\nm0,1,2,N/A")
+        
+        outputs = []
+        for jobs in ("1", "2"):
+            proc = subprocess.run([sys.executable, "-m", "uplt", "-j", jobs, "g", "model", "avg"],
+                                  input=csv_data, capture_output=True, text=True)
+            assert proc.returncode == 0, proc.stderr
+            outputs.append(proc.stdout)
+        
+        assert outputs[0].startswith("model,n_depth_avg,latency_avg,score_avg\n")
+        assert outputs[1] == outputs[0]
+    
+    def test_groupby_time_bucket(self):
+        """Test time_bucket keys are grouped as epoch seconds and printed as ISO-8601 text."""
+        csv_data = ("test_time,latency\n2025-05-26T13:11:48Z,10\n2025-05-26T13:14:02Z,20\n"
+                    "2025-05-26T15:40:00+02:00,30\n2025-05-26T14:02:10Z,40")
+        
+        for flags in ([], ["--parse-times"]):
+            proc = subprocess.run(
+                [sys.executable, "-m", "uplt"] + flags
+                + ["groupby", "time_bucket('30m', test_time) as slot", "avg(latency), count(*)"],
+                input=csv_data, capture_output=True, text=True
+            )
+            
+            assert proc.returncode == 0, proc.stderr
+            assert proc.stdout.splitlines() == [
+                "slot,avg(latency),count(*)",
+                "2025-05-26T13:00:00Z,15.0,2",
+                "2025-05-26T13:30:00Z,30.0,1",
+                "2025-05-26T14:00:00Z,40.0,1",
+            ]
+    
+    def test_groupby_parse_times_default_aggregates_skip_timestamps(self):
+        """Test epoch timestamp columns aren't averaged by the default aggregation."""
+        csv_data = "test_time,host,latency\n2025-05-26T13:11:48Z,a,10\n2025-05-26T13:14:02Z,a,20"
+        
+        proc = subprocess.run(
+            [sys.executable, "-m", "uplt", "--parse-times", "groupby", "host"],
+            input=csv_data, capture_output=True, text=True
+        )
+        
+        assert proc.returncode == 0
+        assert proc.stdout.splitlines() == ["host,latency_avg", "a,15.0"]
+    
+    def test_groupby_dict_encode(self):
+        """Test groupby over dictionary encoded columns matches the plain table."""
+        rows = [f"model-{i % 3}.gguf,{'cpu' if i % 2 else 'gpu'},{i}" for i in range(30)]
+        csv_data = "model_filename,device,latency\n" + "\n".join(rows)
+        
+        outputs = []
+        for flags in ([], ["--dict-encode"]):
+            proc = subprocess.run(
+                [sys.executable, "-m", "uplt"] + flags
+                + ["groupby", "model_filename, device", "avg(latency), count(*)"],
+                input=csv_data, capture_output=True, text=True
+            )
+            assert proc.returncode == 0, proc.stderr
+            outputs.append(proc.stdout)
+        
+        assert outputs[0] == outputs[1]
+        assert outputs[1].splitlines()[1] == "model-0.gguf,cpu,15.0,5"
+    
+    def test_groupby_numeric_threshold(self):
+        """Test stray tokens in a mostly-numeric column are nulled instead of making it text."""
+        csv_data = "model,latency\na,10\na,N/A\na,20\nb,9.5\nb,100\nb,-"
+        
+        proc = subprocess.run(
+            [sys.executable, "-m", "uplt", "--numeric-threshold", "60", "-v",
+             "groupby", "model", "min(latency), max(latency), count(latency)"],
+            input=csv_data, capture_output=True, text=True
+        )
+        
+        assert proc.returncode == 0, proc.stderr
+        assert proc.stdout.splitlines() == [
+            "model,min(latency),max(latency),count(latency)",
+            "a,10.0,20.0,2",
+            "b,9.5,100.0,2",
+        ]
+        assert "Stored 2 non-numeric values of latency as NULL" in proc.stderr
@@ -0,0 +1,140 @@
+"""Test batches: run scripts and commands separated by ';;'."""
+import subprocess
+import sys
+import pytest
+
+
+CSV_DATA = "model,metric,latency\nA,x,10\nA,y,200\nB,x,12\nB,y,180\nA,x,110\nB,x,13\n"
+
+
+def uplt(*args, input=None):
+    return subprocess.run(
+        [sys.executable, "-m", "uplt", *args],
+        input=input,
+        capture_output=True,
+        text=True
+    )
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    csv_file = tmp_path / "data.csv"
+    csv_file.write_text(CSV_DATA)
+    return csv_file
+
+
+def test_separated_commands_share_one_load():
+    result = uplt("q", "SELECT count(*) FROM data", ";;", "g", "model", "max(latency)", input=CSV_DATA)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == (
+        "==> q 'SELECT count(*) FROM data' <==\n"
+        "count(*)\n6\n"
+        "\n"
+        "==> g model 'max(latency)' <==\n"
+        "model,max(latency)\nA,200\nB,180\n"
+    )
+
+
+def test_single_output_is_not_labeled():
+    result = uplt("filter", "latency > 100", "--into", "slow", ";;",
+                  "q", "SELECT model FROM slow ORDER BY latency", input=CSV_DATA)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == "model\nA\nB\nA\n"
+
+
+def test_first_command_options_apply_to_all():
+    result = uplt("-p", "q", "SELECT 1 AS one", ";;", "q", "SELECT 2 AS two", input=CSV_DATA)
+    assert result.returncode == 0, result.stderr
+    assert "one\n---\n1" in result.stdout
+    assert "two\n---\n2" in result.stdout
+
+
+def test_run_script(tmp_path, data_file):
+    totals = tmp_path / "totals.csv"
+    script = tmp_path / "report.uplt"
+    script.write_text(
+        "# Slow requests\n"
+        "filter \"latency > 100\" --into slow\n"
+        "add \"latency / 10 AS tenths\" \\\n"
+        "    -t slow --into scaled\n"
+        f"groupby model \"sum(tenths) AS total\" -t scaled > '{totals}'\n"
+        "\n"
+        "q \"SELECT count(*) FROM slow\" ;; q \"SELECT count(*) FROM data\"\n"
+    )
+    result = uplt("-i", str(data_file), "run", str(script))
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == (
+        "==> q 'SELECT count(*) FROM slow' <==\ncount(*)\n3\n"
+        "\n"
+        "==> q 'SELECT count(*) FROM data' <==\ncount(*)\n6\n"
+    )
+    assert totals.read_text() == "model,total\nA,31\nB,18\n"
+
+
+def test_into_compares_time_literals():
+    csv_data = "ts,v\n2025-05-26T10:00:00Z,1\n2025-05-26T13:00:00Z,2\n"
+    result = uplt("--parse-times", "filter", "ts > '2025-05-26T12:00:00Z'", "--into", "late", ";;",
+                  "q", "SELECT v FROM late", input=csv_data)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == "v\n2\n"
+
+
+def test_streaming_commands_read_loaded_input(data_file):
+    result = uplt("-i", str(data_file), "top", "model", ";;", "describe")
+    assert result.returncode == 0, result.stderr
+    assert "==> top model <==\nmodel,count,error\nA,3,0\nB,3,0\n" in result.stdout
+    assert "==> describe <==\ncolumn,type" in result.stdout
+
+
+def test_heatmap_and_comparison(data_file):
+    result = uplt("-i", str(data_file), "hm", "latency", "model", ";;",
+                  "cmp", "model", "metric", "avg(latency)")
+    assert result.returncode == 0, result.stderr
+    assert "==> hm latency model <==" in result.stdout
+    assert "==> cmp model metric 'avg(latency)' <==" in result.stdout
+
+
+def test_failing_command_stops_batch():
+    result = uplt("q", "SELECT 1", ";;", "q", "SELECT * FROM missing", ";;", "q", "SELECT 3",
+                  input=CSV_DATA)
+    assert result.returncode == 1
+    assert "Batch stopped at command 2: q 'SELECT * FROM missing'" in result.stderr
+    assert "SELECT 3" not in result.stdout
+
+
+def test_into_requires_batch():
+    result = uplt("filter", "latency > 100", "--into", "slow", input=CSV_DATA)
+    assert result.returncode == 1
+    assert "--into only applies to commands of a batch" in result.stderr
+
+
+def test_into_only_for_add_and_filter():
+    result = uplt("q", "SELECT 1", "--into", "t", ";;", "q", "SELECT 2", input=CSV_DATA)
+    assert result.returncode == 1
+    assert "--into only applies to add and filter" in result.stderr
+
+
+def test_into_existing_table():
+    result = uplt("filter", "latency > 100", "--into", "data", ";;", "q", "SELECT 1", input=CSV_DATA)
+    assert result.returncode == 1
+    assert "Table 'data' already exists" in result.stderr
+
+
+def test_nested_run_is_rejected(tmp_path):
+    script = tmp_path / "nested.uplt"
+    script.write_text("run other.uplt\n")
+    result = uplt("run", str(script), input=CSV_DATA)
+    assert result.returncode == 1
+    assert "Not a command for a batch: run other.uplt" in result.stderr
+
+
+def test_missing_script():
+    result = uplt("run", "does-not-exist.uplt", input=CSV_DATA)
+    assert result.returncode == 1
+    assert "Error:" in result.stderr
+
+
+def test_connect_rejects_batches():
+    result = uplt("--connect", "/tmp/none.sock", "q", "SELECT 1", ";;", "q", "SELECT 2")
+    assert result.returncode == 1
+    assert "Batches can't be sent to a server" in result.stderr
@@ -0,0 +1,171 @@
+"""Test the serve command and --connect clients."""
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import pytest
+
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+
+CSV_DATA = "model,metric,latency\nA,x,10\nA,y,20\nB,x,12\nB,y,18\nA,x,11\nB,x,13\n"
+
+
+def uplt(*args, input=None):
+    return subprocess.run(
+        [sys.executable, "-m", "uplt", *args],
+        input=input,
+        capture_output=True,
+        text=True
+    )
+
+
+def start_server(socket_path, *args):
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uplt", "serve", "--socket", str(socket_path), *args],
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    deadline = time.monotonic() + 20
+    while not os.path.exists(socket_path):
+        if proc.poll() is not None:
+            raise AssertionError(proc.stderr.read())
+        assert time.monotonic() < deadline, "server didn't start"
+        time.sleep(0.05)
+    return proc
+
+
+@pytest.fixture
+def served(tmp_path):
+    """(socket path, CSV file) of a server running on CSV_DATA."""
+    csv_file = tmp_path / "data.csv"
+    csv_file.write_text(CSV_DATA)
+    socket_path = tmp_path / "uplt.sock"
+    proc = start_server(socket_path, str(csv_file))
+    yield socket_path, csv_file
+    proc.terminate()
+    proc.wait(timeout=10)
+    proc.stderr.close()
+
+
+class TestServe:
+    """Test commands answered by a server."""
+    
+    @pytest.mark.parametrize("command", [
+        ["q", "SELECT * FROM data WHERE latency > 11"],
+        ["groupby", "model", "avg(latency),count(*)"],
+        ["groupby", "model,metric", "max(latency)", "--rollup"],
+        ["filter", "metric = 'x'"],
+        ["cmp", "model", "metric", "avg(latency)"],
+        ["describe"],
+        ["top", "model", "-k", "1"],
+    ])
+    def test_same_output_as_direct_run(self, served, command):
+        """Output and exit status match running the command on the file."""
+        socket_path, _ = served
+        expected = uplt(*command, input=CSV_DATA)
+        proc = uplt("--connect", str(socket_path), *command)
+        assert proc.returncode == expected.returncode == 0
+        assert proc.stdout == expected.stdout
+    
+    def test_concurrent_clients(self, served):
+        """Clients running at the same time each get their own complete output."""
+        socket_path, _ = served
+        expected = uplt("groupby", "model,metric", "avg(latency)", input=CSV_DATA).stdout
+        outputs = []
+        
+        def client():
+            outputs.append(uplt("--connect", str(socket_path),
+                                "groupby", "model,metric", "avg(latency)").stdout)
+        
+        threads = [threading.Thread(target=client) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert outputs == [expected] * 6
+    
+    def test_loaded_table_is_read_only(self, served):
+        """Clients can't change the served tables."""
+        socket_path, _ = served
+        proc = uplt("--connect", str(socket_path), "q", "DROP TABLE data")
+        assert proc.returncode == 1
+        assert "not authorized" in proc.stderr
+        proc = uplt("--connect", str(socket_path), "q", "SELECT count(*) AS n FROM data")
+        assert proc.stdout == "n\n6\n"
+    
+    def test_reload_on_change(self, served):
+        """A changed file is loaded again before the next command."""
+        socket_path, csv_file = served
+        csv_file.write_text("model,metric,latency\nC,z,1\n")
+        # Make sure the change is visible even with a coarse mtime resolution
+        stat = os.stat(csv_file)
+        os.utime(csv_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+        proc = uplt("--connect", str(socket_path), "q", "SELECT model FROM data")
+        assert proc.stdout == "model\nC\n"
+    
+    def test_errors(self, served):
+        """Errors are reported by the client with a failing exit status."""
+        socket_path, _ = served
+        proc = uplt("--connect", str(socket_path), "-t", "other", "q", "SELECT 1")
+        assert proc.returncode == 1
+        assert "Table 'other' is not served (tables: data)" in proc.stderr
+        proc = uplt("--connect", str(socket_path), "q")
+        assert proc.returncode == 1
+        assert "SQL query required" in proc.stderr
+    
+    @pytest.mark.parametrize("options, flag", [
+        (["-i", "other.csv"], "--input"),
+        (["--save-baseline", "nightly"], "--save-baseline"),
+        (["--against-baseline", "nightly"], "--against-baseline"),
+        (["--db", "other.db"], "--db"),
+        (["--save-db", "saved.db"], "--save-db"),
+        (["--save-db", "saved.db", "--index", "model"], "--save-db, --index"),
+    ])
+    def test_unsupported_client_options(self, served, options, flag):
+        """Options the server can't honor are refused instead of ignored."""
+        socket_path, _ = served
+        proc = uplt("--connect", str(socket_path), *options, "cmp", "model", "metric", "avg(latency)")
+        assert proc.returncode == 1
+        assert f"{flag} can't be used with --connect" in proc.stderr
+        assert proc.stdout == ""
+    
+    def test_several_files(self, tmp_path):
+        """Each file is served as a table named after it."""
+        (tmp_path / "runs.csv").write_text(CSV_DATA)
+        (tmp_path / "models.csv").write_text("model,size\nA,7\nB,13\n")
+        socket_path = tmp_path / "uplt.sock"
+        proc = start_server(socket_path, str(tmp_path / "runs.csv"), str(tmp_path / "models.csv"))
+        try:
+            result = uplt("--connect", str(socket_path), "-t", "runs", "q",
+                          "SELECT size, max(latency) AS worst FROM runs JOIN models USING (model) "
+                          "GROUP BY size ORDER BY size")
+            assert result.stdout == "size,worst\n7,20\n13,18\n"
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+            proc.stderr.close()
+    
+    def test_idle_timeout(self, tmp_path):
+        """The server exits and removes its socket after the idle timeout."""
+        csv_file = tmp_path / "data.csv"
+        csv_file.write_text(CSV_DATA)
+        socket_path = tmp_path / "uplt.sock"
+        proc = start_server(socket_path, str(csv_file), "--idle-timeout", "0.5")
+        assert proc.wait(timeout=20) == 0
+        proc.stderr.close()
+        assert not socket_path.exists()
+    
+    def test_no_server(self, tmp_path):
+        """Connecting to a socket nobody listens on fails."""
+        proc = uplt("--connect", str(tmp_path / "missing.sock"), "q", "SELECT 1")
+        assert proc.returncode == 1
+        assert "Can't connect" in proc.stderr
+    
+    def test_serve_requires_socket(self, tmp_path):
+        """serve needs a socket path and a file."""
+        proc = uplt("serve", str(tmp_path / "data.csv"))
+        assert proc.returncode == 1
+        assert "--socket" in proc.stderr
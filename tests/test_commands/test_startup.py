@@ -0,0 +1,59 @@
+"""Test that commands import only the modules they need."""
+import subprocess
+import sys
+import pytest
+
+
+# Runs a command like the uplt console script, then lists the imported modules
+SCRIPT = """
+import sys
+from uplt.cli import main
+sys.argv = ['uplt'] + sys.argv[1:]
+try:
+    main()
+finally:
+    sys.stderr.write('\\nMODULES ' + ' '.join(sorted(sys.modules)))
+"""
+
+
+def imported_modules(*command):
+    proc = subprocess.run(
+        [sys.executable, "-c", SCRIPT, *command],
+        input="a,b\nx,1\ny,2\n",
+        capture_output=True,
+        text=True
+    )
+    assert proc.returncode == 0, proc.stderr
+    return set(proc.stderr.rsplit("MODULES ", 1)[1].split())
+
+
+class TestStartup:
+    """Test the imports of short invocations."""
+    
+    @pytest.mark.parametrize("command", [
+        ["q", "SELECT * FROM data"],
+        ["filter", "b > 1"],
+        ["groupby", "a", "max(b)"],
+    ])
+    def test_slow_modules_not_imported(self, command):
+        """typing, shutil, random and hashlib are left to the code paths that need them."""
+        modules = imported_modules(*command)
+        assert not modules & {"typing", "shutil", "random", "hashlib"}
+    
+    def test_query_skips_other_commands(self):
+        """A plain query doesn't load the groupby, chart or expression modules."""
+        modules = imported_modules("q", "SELECT * FROM data")
+        assert "uplt.core" in modules
+        assert not modules & {"uplt.query_builder", "uplt.expressions", "uplt.charts", "uplt.describe"}
+    
+    def test_package_exports(self):
+        """Re-exports of the package are loaded on first access."""
+        proc = subprocess.run(
+            [sys.executable, "-c",
+             "import sys, uplt; assert 'uplt.query_builder' not in sys.modules; "
+             "print(uplt.parse_chart_command.__module__, 'format_output' in dir(uplt))"],
+            capture_output=True,
+            text=True
+        )
+        assert proc.returncode == 0, proc.stderr
+        assert proc.stdout.split() == ["uplt.query_builder", "True"]
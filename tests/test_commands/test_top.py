@@ -0,0 +1,60 @@
+"""Test the top command functionality."""
+import subprocess
+import sys
+
+
+class TestTopCommand:
+    """Test the top command functionality."""
+    
+    def run(self, *args, csv_data=""):
+        return subprocess.run(
+            [sys.executable, "-m", "uplt", *args],
+            input=csv_data,
+            capture_output=True,
+            text=True
+        )
+    
+    def test_top_values(self):
+        """Test the most frequent values with their error bounds."""
+        csv_data = "user,bytes\n" + "\n".join(
+            f"{user},10" for user in ["a"] * 5 + ["b"] * 3 + ["c"] * 2 + ["d"]
+        )
+        
+        proc = self.run("top", "user", "-k", "2", csv_data=csv_data)
+        
+        assert proc.returncode == 0
+        assert proc.stdout.strip().splitlines() == ["user,count,error", "a,5,0", "b,3,0"]
+    
+    def test_top_as_pipeline_stage(self):
+        """Test the CSV output can feed another uplt command."""
+        csv_data = "user,bytes\n" + "\n".join(f"{u},1" for u in ["x"] * 4 + ["y"] * 2 + ["z"])
+        
+        top = self.run("top", "user", csv_data=csv_data)
+        proc = self.run("query", "SELECT user FROM data WHERE count > 1", csv_data=top.stdout)
+        
+        assert proc.returncode == 0
+        assert proc.stdout.strip().splitlines() == ["user", "x", "y"]
+    
+    def test_top_exact_from_file(self, tmp_path):
+        """Test --exact recounts the candidates in a second pass over --input."""
+        path = tmp_path / "data.csv"
+        path.write_text("user\n" + "\n".join(str(i % 7) for i in range(700)) + "\n9\n9\n")
+        
+        proc = self.run("--input", str(path), "--exact", "top", "user", "-k", "3")
+        
+        assert proc.returncode == 0
+        assert proc.stdout.strip().splitlines() == ["user,count", "0,100", "1,100", "2,100"]
+    
+    def test_top_exact_needs_file(self):
+        """Test --exact is rejected for stdin."""
+        proc = self.run("--exact", "top", "user", csv_data="user\na")
+        
+        assert proc.returncode == 1
+        assert "--input FILE" in proc.stderr
+    
+    def test_top_unknown_column(self):
+        """Test an unknown column is reported."""
+        proc = self.run("top", "missing", csv_data="a,b\n1,2")
+        
+        assert proc.returncode == 1
+        assert "Unknown column(s): missing" in proc.stderr
@@ -9,6 +9,7 @@ from uplt.core import (
     execute_query,
     format_output,
     auto_detect_headers,
+    null_stray_values,
 )
 
 
@@ -120,6 +121,20 @@ class TestInferColumnType:
     def test_integers_with_empty(self):
         values = ["1", "", "3", None, "5"]
         assert infer_column_type(values) == "INTEGER"
+    
+    def test_numeric_threshold(self):
+        values = ["10", "N/A", "12", "-", "15", "", "9", "11", "13", "14", "16"]
+        # 8 of 10 non-empty values are numbers
+        assert infer_column_type(values) == "TEXT"
+        assert infer_column_type(values, 0.8) == "INTEGER"
+        assert infer_column_type(values, 0.9) == "TEXT"
+        assert infer_column_type(["1.5", "x", "2"], 0.5) == "REAL"
+        assert infer_column_type(["x", "y"], 0.5) == "TEXT"
+    
+    def test_null_stray_values(self):
+        rows = [["a", "1", "N/A"], ["b", "-", "2.5"], ["c", "3"]]
+        assert null_stray_values(rows, ["TEXT", "INTEGER", "REAL"]) == {1: 1, 2: 1}
+        assert rows == [["a", "1", None], ["b", None, "2.5"], ["c", "3"]]
 
 
 class TestCreateTableFromCSV:
@@ -130,6 +145,17 @@ class TestCreateTableFromCSV:
     def teardown_method(self):
         self.conn.close()
     
+    def test_numeric_threshold_nulls_stray_values(self):
+        csv_data = "name,latency\na,10\nb,N/A\nc,9.5\nd,100\ne,20"
+        nulled = {}
+        create_table_from_csv(self.cursor, csv_data, numeric_threshold=0.75, nulled=nulled)
+        
+        assert nulled == {"latency": 1}
+        self.cursor.execute("SELECT typeof(latency), MIN(latency), MAX(latency) FROM data WHERE name = 'd'")
+        assert self.cursor.fetchone() == ("real", 100.0, 100.0)
+        self.cursor.execute("SELECT MIN(latency), MAX(latency), COUNT(latency) FROM data")
+        assert self.cursor.fetchone() == (9.5, 100.0, 4)
+    
     def test_basic_csv(self):
         csv_data = "name,age,salary\nJohn,25,50000\nJane,30,65000"
         headers = create_table_from_csv(self.cursor, csv_data)
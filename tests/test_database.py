@@ -0,0 +1,112 @@
+import sqlite3
+
+import pytest
+
+from uplt.aggregates import register_aggregates
+from uplt.core import create_table_from_csv
+from uplt.database import open_database, parse_index_spec, save_database
+
+
+CSV = """model,latency,ts
+A,10,2025-05-26T13:00:00Z
+A,20,2025-05-26T13:20:00Z
+B,12,2025-05-26T14:10:00Z
+B,18,2025-05-26T14:40:00Z"""
+
+
+def _save(path, table='data', timestamps=None, dictionaries=None, indexes=None):
+    conn = sqlite3.connect(':memory:')
+    register_aggregates(conn)
+    headers = create_table_from_csv(conn.cursor(), CSV, table, 'auto', timestamps, dictionaries)
+    save_database(conn, str(path), table, headers, timestamps, dictionaries, indexes)
+    conn.close()
+    return headers
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "data.db"
+    _save(path)
+    conn, headers, timestamps, dictionaries = open_database(str(path), 'data')
+    try:
+        assert headers == ['model', 'latency', 'ts']
+        assert timestamps is None and dictionaries is None
+        rows = conn.execute("SELECT model, p50(latency) FROM data GROUP BY model ORDER BY model").fetchall()
+        assert rows == [('A', 15.0), ('B', 15.0)]
+    finally:
+        conn.close()
+
+
+def test_read_only(tmp_path):
+    path = tmp_path / "data.db"
+    _save(path)
+    conn, *_ = open_database(str(path), 'data')
+    try:
+        with pytest.raises(sqlite3.OperationalError, match="readonly"):
+            conn.execute("DELETE FROM data")
+        # Temporary tables still work
+        conn.execute("CREATE TEMP TABLE slow AS SELECT * FROM data WHERE latency > 15")
+        assert conn.execute("SELECT count(*) FROM slow").fetchone() == (2,)
+        assert conn.execute("PRAGMA mmap_size").fetchone()[0] > 0
+    finally:
+        conn.close()
+
+
+def test_column_details_are_kept(tmp_path):
+    path = tmp_path / "data.db"
+    _save(path, timestamps={}, dictionaries={})
+    conn, headers, timestamps, dictionaries = open_database(str(path), 'data')
+    try:
+        assert headers == ['model', 'latency', 'ts']
+        assert timestamps == {'ts': '%Y-%m-%dT%H:%M:%SZ'}
+        assert dictionaries == {'model': ['A', 'B']}
+        assert conn.execute("SELECT ts FROM data_text LIMIT 1").fetchone() == ('2025-05-26T13:00:00Z',)
+    finally:
+        conn.close()
+
+
+def test_indexes(tmp_path):
+    path = tmp_path / "data.db"
+    _save(path, indexes=[['model'], ['model', 'latency']])
+    conn = sqlite3.connect(str(path))
+    names = {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    conn.close()
+    assert {'data_model_idx', 'data_model_latency_idx'} <= names
+
+
+def test_indexes_of_encoded_table(tmp_path):
+    path = tmp_path / "data.db"
+    _save(path, dictionaries={}, indexes=[['model']])
+    conn = sqlite3.connect(str(path))
+    tables = conn.execute("SELECT tbl_name FROM sqlite_master WHERE name = 'data_codes_model_idx'").fetchall()
+    conn.close()
+    assert tables == [('data_codes',)]
+
+
+def test_unknown_index_column(tmp_path):
+    with pytest.raises(ValueError, match="Unknown column"):
+        _save(tmp_path / "data.db", indexes=[['nope']])
+
+
+def test_parse_index_spec():
+    assert parse_index_spec("model; model, n_depth") == [['model'], ['model', 'n_depth']]
+    with pytest.raises(ValueError):
+        parse_index_spec("model;;n_depth")
+
+
+def test_missing_table(tmp_path):
+    path = tmp_path / "data.db"
+    _save(path)
+    with pytest.raises(ValueError, match=r"Table 'runs' doesn't exist .*\(tables: data\)"):
+        open_database(str(path), 'runs')
+
+
+def test_missing_file(tmp_path):
+    with pytest.raises(ValueError, match="Database not found"):
+        open_database(str(tmp_path / "none.db"), 'data')
+
+
+def test_not_a_database(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text(CSV)
+    with pytest.raises(ValueError, match="Can't read"):
+        open_database(str(path), 'data')
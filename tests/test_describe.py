@@ -0,0 +1,96 @@
+import io
+import math
+import random
+import statistics
+
+import pytest
+
+from uplt.core import open_csv_stream
+from uplt.describe import HEADERS, describe_rows
+
+
+def summarize(headers, rows, **kwargs):
+    return {row[0]: dict(zip(HEADERS, row)) for row in describe_rows(headers, rows, **kwargs)}
+
+
+class TestOpenCsvStream:
+    """Test lazy CSV reading with header and delimiter detection."""
+    
+    def test_headers_and_rows(self):
+        headers, rows = open_csv_stream(io.StringIO("a;b c\n1;2\n\n3;4\n"))
+        assert headers == ["a", "b_c"]
+        assert list(rows) == [["1", "2"], ["3", "4"]]
+    
+    def test_headerless(self):
+        headers, rows = open_csv_stream(io.StringIO("1,2\n3,4\n"))
+        assert headers == ["f1", "f2"]
+        assert len(list(rows)) == 2
+    
+    def test_empty(self):
+        with pytest.raises(ValueError):
+            open_csv_stream(io.StringIO(""))
+
+
+class TestDescribe:
+    """Test single-pass column profiles."""
+    
+    def test_column_summaries(self):
+        rows = [["1", "1.5", "x"], ["3", "", "y"], ["2", "2.5", "x"], ["", "abc", ""]]
+        result = summarize(["i", "r", "t"], rows)
+        
+        assert result["i"]["type"] == "INTEGER"
+        assert (result["i"]["count"], result["i"]["nulls"]) == (3, 1)
+        assert (result["i"]["min"], result["i"]["max"], result["i"]["mean"]) == (1, 3, 2.0)
+        assert result["i"]["stddev"] == 1.0
+        assert result["i"]["p50"] == 2.0
+        
+        # A single non-numeric value makes the column text
+        assert result["r"]["type"] == "TEXT"
+        assert (result["r"]["min"], result["r"]["max"]) == ("1.5", "abc")
+        assert result["r"]["mean"] is None
+        
+        assert result["t"]["distinct"] == 2
+    
+    def test_numeric_threshold(self):
+        rows = [[str(i), f"{i}.5" if i % 2 else str(i)] for i in range(1, 11)] + [["x", "y"]]
+        
+        for chunk_rows in (100, 3):
+            result = summarize(["i", "r"], rows, numeric_threshold=0.8, chunk_rows=chunk_rows)
+            # Stray values count as NULLs, as they are stored when loaded
+            assert result["i"]["type"] == "INTEGER"
+            assert (result["i"]["count"], result["i"]["nulls"], result["i"]["distinct"]) == (10, 1, 10)
+            assert (result["i"]["min"], result["i"]["max"], result["i"]["mean"]) == (1, 10, 5.5)
+            assert result["r"]["type"] == "REAL"
+        
+        result = summarize(["i"], [row[:1] for row in rows], numeric_threshold=0.95)
+        assert result["i"]["type"] == "TEXT"
+        assert (result["i"]["count"], result["i"]["distinct"]) == (11, 11)
+    
+    def test_short_rows_count_as_nulls(self):
+        result = summarize(["a", "b"], [["1"], ["2", "3"]])
+        assert result["b"]["nulls"] == 1
+    
+    def test_chunks_merge_to_exact_moments(self):
+        rng = random.Random(7)
+        values = [rng.gauss(10, 3) for _ in range(5000)]
+        rows = [[f"{v!r}"] for v in values]
+        
+        whole = summarize(["x"], rows)["x"]
+        chunked = summarize(["x"], rows, chunk_rows=333)["x"]
+        
+        for result in (whole, chunked):
+            assert result["type"] == "REAL"
+            assert result["count"] == 5000
+            assert result["mean"] == pytest.approx(statistics.fmean(values))
+            assert result["stddev"] == pytest.approx(statistics.stdev(values))
+            assert (result["min"], result["max"]) == (min(values), max(values))
+            assert result["p50"] == pytest.approx(statistics.median(values), rel=0.05)
+    
+    def test_parallel_matches_serial(self):
+        rows = [[str(i % 97), f"k{i % 13}"] for i in range(30_000)]
+        serial = summarize(["n", "k"], rows, chunk_rows=5000)
+        parallel = summarize(["n", "k"], rows, chunk_rows=5000, jobs=2)
+        
+        assert serial == parallel
+        assert serial["k"]["distinct"] == 13
+        assert not math.isnan(serial["n"]["p99"])
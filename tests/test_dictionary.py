@@ -0,0 +1,73 @@
+import sqlite3
+
+from uplt.core import create_table_from_csv
+from uplt.dictionary import build_code_groupby_query, encode_columns
+
+
+CSV = """model,cpu,n_depth,ts
+qwen-7b.gguf,Xeon 8480,0,10.5
+qwen-7b.gguf,EPYC 9654,512,12.0
+llama-8b.gguf,Xeon 8480,0,20.0
+llama-8b.gguf,Xeon 8480,512,22.0
+qwen-7b.gguf,,0,11.0
+llama-8b.gguf,EPYC 9654,0,21.0"""
+
+
+def _load(csv_data, **kwargs):
+    conn = sqlite3.connect(':memory:')
+    cursor = conn.cursor()
+    create_table_from_csv(cursor, csv_data, 'data', 'yes', **kwargs)
+    return cursor
+
+
+class TestEncodeColumns:
+    def test_low_cardinality_text_columns(self):
+        rows = [["b", "x1", "1"], ["a", "x2", "2"], ["b", "x3", "3"], ["a", "x4", "4"]]
+        types = ["TEXT", "TEXT", "INTEGER"]
+        dictionaries = encode_columns(rows, types)
+        assert dictionaries == {0: ["a", "b"]}
+        assert types == ["INTEGER", "TEXT", "INTEGER"]
+        assert [row[0] for row in rows] == [2, 1, 2, 1]
+
+    def test_short_rows_stay_null(self):
+        rows = [["a"], ["a", "x"], ["a", "x"], ["a", "x"]]
+        dictionaries = encode_columns(rows, ["TEXT", "TEXT"])
+        assert dictionaries == {0: ["a"], 1: ["x"]}
+        assert rows[0] == [1]
+
+
+class TestEncodedTable:
+    def test_view_matches_plain_table(self):
+        plain = _load(CSV)
+        dictionaries = {}
+        encoded = _load(CSV, dictionaries=dictionaries)
+        assert set(dictionaries) == {"model", "cpu"}
+        query = "SELECT * FROM data ORDER BY rowid"
+        assert encoded.execute("SELECT * FROM data").fetchall() == plain.execute(query).fetchall()
+        assert encoded.execute("SELECT typeof(model) FROM data_codes LIMIT 1").fetchone() == ("integer",)
+        # Codes follow the order of the values
+        assert encoded.execute("SELECT model FROM data WHERE cpu = 'Xeon 8480' ORDER BY model").fetchall() == \
+            plain.execute("SELECT model FROM data WHERE cpu = 'Xeon 8480' ORDER BY model").fetchall()
+
+    def test_groupby_on_codes(self):
+        plain = _load(CSV)
+        dictionaries = {}
+        encoded = _load(CSV, dictionaries=dictionaries)
+        query = build_code_groupby_query(
+            'data', list(dictionaries), [("cpu", None), ("n_depth", None)],
+            [("avg(ts)", None), ("count(*)", "runs")]
+        )
+        assert "data_codes" in query
+        expected = plain.execute(
+            "SELECT cpu, n_depth, avg(ts), count(*) AS runs FROM data GROUP BY cpu, n_depth ORDER BY cpu, n_depth"
+        )
+        assert encoded.execute(query).fetchall() == expected.fetchall()
+        assert [d[0] for d in encoded.description] == ["cpu", "n_depth", "avg(ts)", "runs"]
+
+    def test_groupby_needs_text_for_some_queries(self):
+        encoded = ['model', 'cpu']
+        # An aggregate of an encoded column or an expression key can't use the codes
+        assert build_code_groupby_query('data', encoded, [("cpu", None)], [("max(model)", None)]) is None
+        assert build_code_groupby_query('data', encoded, [("upper(cpu)", None)], [("count(*)", None)]) is None
+        assert build_code_groupby_query('data', encoded, [("n_depth", None)], [("count(*)", None)]) is None
+        assert build_code_groupby_query('data', encoded, [("cpu", None)], [("count(*) FILTER (WHERE 'model' > '')", None)])
@@ -0,0 +1,77 @@
+import random
+import sqlite3
+
+import pytest
+
+from uplt.aggregates import register_aggregates
+from uplt.core import infer_column_types, insert_rows
+from uplt.partitioned import parallel_groupby, partial_plan, partition_rows
+
+
+HEADERS = ["model", "depth", "latency"]
+
+
+@pytest.fixture
+def rows():
+    rng = random.Random(5)
+    return [[f"m{rng.randrange(30)}", rng.choice(["1", "1.0", "2", "3"]), str(rng.randrange(100))]
+            for _ in range(2000)]
+
+
+def run_serial(rows, keys, aggregates):
+    conn = sqlite3.connect(':memory:')
+    register_aggregates(conn)
+    cursor = conn.cursor()
+    types = infer_column_types(HEADERS, rows)
+    cursor.execute(f"CREATE TABLE data ({', '.join(f'{h} {t}' for h, t in zip(HEADERS, types))})")
+    insert_rows(cursor, "data", len(HEADERS), rows)
+    key_exprs = ', '.join(expr for expr, _ in keys)
+    select = ', '.join(f"{e} as {a}" if a else e for e, a in keys + aggregates)
+    cursor.execute(f"SELECT {select} FROM data GROUP BY {key_exprs} ORDER BY {key_exprs}")
+    return [d[0] for d in cursor.description], cursor.fetchall()
+
+
+def run_parallel(rows, keys, aggregates, jobs):
+    conn = sqlite3.connect(':memory:')
+    register_aggregates(conn)
+    return parallel_groupby(conn.cursor(), "data", HEADERS, infer_column_types(HEADERS, rows),
+                            rows, keys, aggregates, jobs)
+
+
+class TestParallelGroupBy:
+    """Test partitioned groupby against the serial GROUP BY."""
+    
+    @pytest.mark.parametrize("keys", [
+        [("model", None), ("depth", "d")],
+        [("substr(model, 1, 2)", "prefix")],
+    ])
+    @pytest.mark.parametrize("jobs", [1, 3])
+    def test_matches_serial(self, rows, keys, jobs):
+        aggregates = [("avg(latency)", None), ("count(*)", "n"), ("min(latency)", None),
+                      ("sum(latency)", None), ("stddev(latency)", "sd")]
+        columns, results = run_parallel(rows, keys, aggregates, jobs)
+        expected_columns, expected = run_serial(rows, keys, aggregates)
+        
+        assert columns == expected_columns
+        assert len(results) == len(expected)
+        for row, expected_row in zip(results, expected):
+            assert row == pytest.approx(expected_row)
+    
+    def test_not_decomposable(self, rows):
+        assert partial_plan(["avg(x)", "median(x)"]) is None
+        assert run_parallel(rows, [("model", None)], [("median(latency)", None)], 2) is None
+        assert partial_plan(["count(distinct x)"]) is None
+        assert run_parallel(rows, [("substr(model, 1, 2)", "prefix")],
+                            [("count(distinct latency)", None)], 2) is None
+    
+    def test_equal_numbers_share_a_partition(self):
+        rows = [["a", "1", "0"], ["a", "1.0", "0"], ["a", "01", "0"], ["b", "x", "0"]]
+        parts = partition_rows(rows, [1], [False, True, True], 16)
+        
+        assert [["a", "1", "0"], ["a", "1.0", "0"], ["a", "01", "0"]] in parts
+    
+    def test_partial_plan(self):
+        assert partial_plan(["avg(x)", "max(y)"]) == (
+            ["SUM(x)", "COUNT(x)", "MAX(y)"],
+            ["SUM(p0) * 1.0 / SUM(p1)", "MAX(p2)"],
+        )
@@ -0,0 +1,71 @@
+import random
+import sqlite3
+
+import pytest
+
+from uplt.aggregates import register_aggregates
+from uplt.presorted import create_staging_table, iter_presorted_groups
+
+
+def run_presorted(headers, rows, keys, aggregates, chunk_rows):
+    conn = sqlite3.connect(':memory:')
+    register_aggregates(conn)
+    cursor = conn.cursor()
+    create_staging_table(cursor, "data", headers, rows)
+    columns, results = iter_presorted_groups(
+        cursor, "data", len(headers), rows, keys, aggregates, chunk_rows=chunk_rows
+    )
+    return columns, list(results)
+
+
+def run_sqlite(headers, rows, keys, aggregates):
+    conn = sqlite3.connect(':memory:')
+    register_aggregates(conn)
+    cursor = conn.cursor()
+    create_staging_table(cursor, "data", headers, rows)
+    cursor.executemany(f"INSERT INTO data VALUES ({', '.join('?' * len(headers))})", rows)
+    key_exprs = ', '.join(expr for expr, _ in keys)
+    select = ', '.join(f"{e} as {a}" if a else e for e, a in keys + aggregates)
+    cursor.execute(f"SELECT {select} FROM data GROUP BY {key_exprs} ORDER BY {key_exprs}")
+    return [d[0] for d in cursor.description], cursor.fetchall()
+
+
+class TestPresortedGroupBy:
+    """Test streaming aggregation of sorted input against SQLite's GROUP BY."""
+    
+    @pytest.fixture
+    def rows(self):
+        rng = random.Random(4)
+        rows = [[model, str(rng.randrange(4)), str(rng.randrange(100)), ""]
+                for model in ["a", "b", "c", "d"] for _ in range(rng.randrange(1, 60))]
+        rows.sort(key=lambda row: (row[0], int(row[1])))
+        return rows
+    
+    @pytest.mark.parametrize("aggregates", [
+        [("avg(latency)", None), ("count(*)", "runs"), ("min(latency)", None), ("sum(x)", None)],
+        [("median(latency)", None), ("max(latency)", "worst")],
+    ])
+    @pytest.mark.parametrize("chunk_rows", [1, 7, 1000])
+    def test_matches_group_by(self, rows, aggregates, chunk_rows):
+        headers = ["model", "depth", "latency", "x"]
+        keys = [("model", None), ("depth", "d")]
+        
+        assert run_presorted(headers, rows, keys, aggregates, chunk_rows) == \
+            run_sqlite(headers, rows, keys, aggregates)
+    
+    def test_distinct_across_chunks(self):
+        rows = [["a", str(i % 100)] for i in range(300)] + [["b", "1"]]
+        aggregates = [("count(distinct v)", None), ("sum(distinct v)", "total")]
+        
+        columns, results = run_presorted(["k", "v"], rows, [("k", None)], aggregates, 100)
+        assert columns == ["k", "count(distinct v)", "total"]
+        assert results == [("a", 100, 4950), ("b", 1, 1)]
+    
+    @pytest.mark.parametrize("aggregates", [[("sum(v)", None)], [("median(v)", None)]])
+    def test_out_of_order_keys(self, aggregates):
+        rows = [["a", "1"], ["b", "2"], ["a", "3"]]
+        
+        with pytest.raises(ValueError, match="group \\(a\\) appears again at data row 3"):
+            run_presorted(["k", "v"], rows, [("k", None)], aggregates, 10)
+        with pytest.raises(ValueError, match="\\(a\\) comes after \\(b\\) at data row 3"):
+            run_presorted(["k", "v"], rows, [("k", None)], aggregates, 2)
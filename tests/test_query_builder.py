@@ -1,5 +1,16 @@
 import pytest
-from uplt.query_builder import parse_aggregation, parse_chart_command
+import sqlite3
+
+from uplt.query_builder import (
+    GROUPING_PARTIALS_TABLE,
+    build_grouping_sets_query,
+    decompose_aggregate,
+    is_row_local,
+    parse_aggregation,
+    parse_chart_command,
+    parse_grouping_sets,
+    rollup_sets,
+)
 
 
 class TestParseAggregation:
@@ -28,6 +39,16 @@ class TestParseAggregation:
         assert func == "count"
         assert field == "id"
     
+    def test_percentile_functions(self):
+        assert parse_aggregation("median(latency)") == ("median", "latency")
+        assert parse_aggregation("P99(latency)") == ("p99", "latency")
+        assert parse_aggregation("percentile(latency, 90)") == ("percentile", "latency, 90")
+        assert parse_aggregation("p100(latency)") == (None, "p100(latency)")
+    
+    def test_approximate_functions(self):
+        assert parse_aggregation("approx_percentile(x, 99)") == ("approx_percentile", "x, 99")
+        assert parse_aggregation("approx_count_distinct(user)") == ("approx_count_distinct", "user")
+    
     def test_no_aggregation(self):
         func, field = parse_aggregation("price")
         assert func is None
@@ -183,3 +204,84 @@ class TestParseChartCommand:
             "metrics_field": "metrics",
             "value_field": "value"
         }
+
+
+class TestGroupingSets:
+    """Test grouping set parsing and the one-pass grouping query."""
+    
+    def setup_method(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.cursor = self.conn.cursor()
+        self.cursor.execute("CREATE TABLE data (model TEXT, depth INTEGER, ts REAL)")
+        self.cursor.executemany("INSERT INTO data VALUES (?, ?, ?)", [
+            ("A", 0, 10), ("A", 0, 12), ("A", 512, 8), ("B", 0, 20), ("B", 512, None),
+        ])
+    
+    def run(self, agg_exprs, grouping_sets):
+        partials, query = build_grouping_sets_query(
+            "data", ["model", "depth"], ["model", "depth"], agg_exprs, agg_exprs, grouping_sets
+        )
+        if partials:
+            self.cursor.execute(f"CREATE TEMP TABLE {GROUPING_PARTIALS_TABLE} AS {partials}")
+        self.cursor.execute(query)
+        return self.cursor.fetchall()
+    
+    def test_decompose_aggregate(self):
+        assert decompose_aggregate("avg(x)") == (["SUM(x)", "COUNT(x)"], "SUM({0}) * 1.0 / SUM({1})")
+        assert decompose_aggregate("count(*)") == (["COUNT(*)"], "SUM({0})")
+        assert decompose_aggregate("MAX(x)") == (["MAX(x)"], "MAX({0})")
+        assert decompose_aggregate("stddev(x)") == (["uplt_moments(x)"], "uplt_merge_stddev({0})")
+        assert decompose_aggregate("median(x)") is None
+        assert decompose_aggregate("sum(x) / count(*)") is None
+        assert decompose_aggregate("count(distinct x)") is None
+        assert decompose_aggregate("SUM(DISTINCT x)") is None
+    
+    def test_is_row_local(self):
+        assert is_row_local("price * quantity as total")
+        assert is_row_local("iif(substr(name, 1, 2) = 'ab', 1, 0)")
+        assert not is_row_local("price / (SELECT max(price) FROM data)")
+        assert not is_row_local("avg(price)")
+        assert not is_row_local("row_number() OVER (ORDER BY price)")
+        assert not is_row_local("p99(latency)")
+        assert not is_row_local("rowid as n")
+        assert not is_row_local("_ROWID_ <= 2")
+        assert not is_row_local("oid % 2 = 0")
+        assert not is_row_local("random() % 10")
+        assert not is_row_local("changes()")
+    
+    def test_rollup_sets(self):
+        assert rollup_sets(2) == [(0, 1), (0,), ()]
+    
+    def test_parse_grouping_sets(self):
+        assert parse_grouping_sets("model,depth; depth; ()", ["model", "depth"]) == [(0, 1), (1,), ()]
+        assert parse_grouping_sets("(depth, model);", ["model", "depth"]) == [(0, 1), ()]
+        with pytest.raises(ValueError, match="not a group by field"):
+            parse_grouping_sets("region", ["model", "depth"])
+    
+    def test_rollup_merges_partials(self):
+        rows = self.run(["avg(ts)", "count(*)", "max(ts)"], rollup_sets(2))
+        
+        assert rows == [
+            ("A", 0, 11.0, 2, 12.0),
+            ("A", 512, 8.0, 1, 8.0),
+            ("A", "(all)", 10.0, 3, 12.0),
+            ("B", 0, 20.0, 1, 20.0),
+            ("B", 512, None, 1, None),
+            ("B", "(all)", 20.0, 2, 20.0),
+            ("(all)", "(all)", 12.5, 5, 20.0),
+        ]
+    
+    def test_rollup_count_distinct(self):
+        rows = self.run(["count(distinct model)", "count(*)"], rollup_sets(2))
+        
+        assert rows[-1] == ("(all)", "(all)", 2, 5)
+        assert ("A", "(all)", 1, 3) in rows
+    
+    def test_non_decomposable_aggregates_scan_the_table(self):
+        partials, _ = build_grouping_sets_query(
+            "data", ["model"], ["model"], ["median(ts)"], ["median(ts)"], [(0,), ()]
+        )
+        assert partials is None
+        
+        rows = self.run(["min(ts)", "sum(ts) / count(ts)"], [(1,), ()])
+        assert rows == [("(all)", 0, 10.0, 14.0), ("(all)", 512, 8.0, 8.0), ("(all)", "(all)", 8.0, 12.5)]
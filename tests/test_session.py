@@ -0,0 +1,99 @@
+import io
+import subprocess
+import sys
+
+import pytest
+
+from uplt import Session
+
+
+CSV = """model,metric,latency,ts
+A,x,10,2025-05-26T13:00:00Z
+A,y,20,2025-05-26T13:20:00Z
+B,x,12,2025-05-26T14:10:00Z
+B,y,18,2025-05-26T14:40:00Z
+A,x,11,2025-05-26T15:05:00Z"""
+
+
+@pytest.fixture
+def session():
+    with Session() as session:
+        session.load(io.StringIO(CSV))
+        yield session
+
+
+def _run_cli(*args):
+    proc = subprocess.run([sys.executable, "-m", "uplt", *args], input=CSV,
+                          capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+    return proc.stdout
+
+
+class TestLoad:
+    def test_path_and_columns(self, tmp_path):
+        path = tmp_path / "runs.csv"
+        path.write_text(CSV)
+        with Session() as session:
+            assert session.load(path, table="runs") == ["model", "metric", "latency", "ts"]
+            assert session.columns("runs") == ["model", "metric", "latency", "ts"]
+            assert list(session.query("SELECT count(*) FROM runs")) == [(5,)]
+
+    def test_several_tables(self, session):
+        session.load(io.StringIO("model,size\nA,7\nB,13"), table="models")
+        rows = session.query("SELECT size, max(latency) FROM data JOIN models USING (model) "
+                             "GROUP BY size ORDER BY size")
+        assert list(rows) == [(7, 20), (13, 18)]
+
+    def test_errors(self, session):
+        with pytest.raises(ValueError, match="already loaded"):
+            session.load(io.StringIO(CSV))
+        with pytest.raises(ValueError, match="No input data"):
+            session.load(io.StringIO(""), table="empty")
+        with pytest.raises(ValueError, match="Table 'other' is not loaded"):
+            session.filter("latency > 1", table="other")
+        with pytest.raises(ValueError, match="SQL Error"):
+            session.query("SELECT nope FROM data")
+
+
+class TestCommands:
+    def test_results_are_iterators(self, session):
+        rows = session.filter("latency > 11")
+        assert next(rows) == ("A", "y", 20, "2025-05-26T13:20:00Z")
+        assert [d[0] for d in rows.description] == ["model", "metric", "latency", "ts"]
+        assert list(rows) == [("B", "x", 12, "2025-05-26T14:10:00Z"), ("B", "y", 18, "2025-05-26T14:40:00Z")]
+
+    def test_interleaved_results(self, session):
+        # Each call has its own cursor, so results can be read side by side
+        first = session.query("SELECT latency FROM data")
+        second = session.query("SELECT model FROM data")
+        assert list(zip(first, second))[:2] == [((10,), ("A",)), ((20,), ("A",))]
+
+    def test_add(self, session):
+        rows = session.add("latency * 2 as double")
+        assert [d[0] for d in rows.description][-1] == "double"
+        assert [row[-1] for row in rows] == [20, 40, 24, 36, 22]
+
+    def test_groupby_matches_cli(self, session):
+        rows = session.groupby("model,metric", "avg(latency) as mean, count(*) as n")
+        expected = _run_cli("groupby", "model,metric", "avg(latency) as mean, count(*) as n")
+        lines = ["model,metric,mean,n"] + [",".join(map(str, row)) for row in rows]
+        assert "\n".join(lines) + "\n" == expected
+
+    def test_groupby_shortcut(self, session):
+        rows = session.groupby(["model"], "max")
+        assert [d[0] for d in rows.description] == ["model", "latency_max"]
+        assert list(rows) == [("A", 20), ("B", 18)]
+
+    def test_heatmap_and_compare_match_cli(self, session):
+        assert session.heatmap("latency", "model") + "\n" == _run_cli("heatmap", "latency", "model")
+        lines = session.compare("model", "metric", "avg(latency)", display_mode="value")
+        assert "\n".join(lines) + "\n" == _run_cli("-m", "value", "cmp", "model", "metric", "avg(latency)")
+
+    def test_parse_times(self):
+        with Session() as session:
+            session.load(io.StringIO(CSV), parse_times=True)
+            rows = session.groupby("time_bucket('1h', ts) as hour", "count(*) as n")
+            assert list(rows) == [("2025-05-26T13:00:00Z", 2), ("2025-05-26T14:00:00Z", 2),
+                                  ("2025-05-26T15:00:00Z", 1)]
+            rows = session.query("SELECT max(ts) - min(ts) FROM data")
+            assert list(rows) == [(7500,)]
@@ -0,0 +1,119 @@
+import bisect
+import pickle
+import random
+import sqlite3
+
+import pytest
+
+from uplt.aggregates import register_aggregates
+from uplt.sketches import HyperLogLog, KLLSketch
+
+
+class TestKLLSketch:
+    """Test the KLL quantile sketch."""
+    
+    def setup_method(self):
+        rng = random.Random(3)
+        self.values = [rng.lognormvariate(0, 1) for _ in range(100_000)]
+        self.ordered = sorted(self.values)
+    
+    def rank_error(self, sketch, q):
+        estimate = sketch.quantile(q)
+        return abs(bisect.bisect_left(self.ordered, estimate) / len(self.ordered) - q)
+    
+    def test_rank_error_is_bounded(self):
+        sketch = KLLSketch()
+        for value in self.values:
+            sketch.update(value)
+        
+        for q in (0.01, 0.1, 0.5, 0.9, 0.99):
+            assert self.rank_error(sketch, q) < 0.017
+    
+    def test_memory_is_bounded(self):
+        sketch = KLLSketch()
+        for value in self.values:
+            sketch.update(value)
+        
+        assert sketch.count == len(self.values)
+        assert sum(len(c) for c in sketch.compactors) < 4 * sketch.k
+    
+    def test_merge(self):
+        parts = [KLLSketch(seed=i) for i in range(4)]
+        for i, value in enumerate(self.values):
+            parts[i % 4].update(value)
+        # Sketches survive a round trip to a worker process
+        merged = pickle.loads(pickle.dumps(parts[0]))
+        for part in parts[1:]:
+            merged.merge(part)
+        
+        assert merged.count == len(self.values)
+        for q in (0.1, 0.5, 0.9):
+            assert self.rank_error(merged, q) < 0.017
+    
+    def test_small_inputs_are_exact(self):
+        sketch = KLLSketch()
+        for value in [4, 1, 3, 2]:
+            sketch.update(value)
+        
+        assert sketch.quantile(0.5) == 2.5
+        assert KLLSketch().quantile(0.5) is None
+
+
+class TestHyperLogLog:
+    """Test the HyperLogLog distinct counter."""
+    
+    def test_estimate_error(self):
+        counter = HyperLogLog()
+        for i in range(200_000):
+            counter.update(f"user-{i % 50_000}")
+        
+        assert counter.estimate() == pytest.approx(50_000, rel=0.03)
+    
+    def test_small_counts(self):
+        counter = HyperLogLog()
+        for value in [1, 1.0, "1", "a", None, 2]:
+            counter.update(value)
+        
+        # 1 and 1.0 are the same number; "1" is text
+        assert counter.estimate() == 5
+    
+    def test_merge(self):
+        a, b = HyperLogLog(), HyperLogLog()
+        for i in range(10_000):
+            a.update(i)
+            b.update(i + 5_000)
+        a.merge(b)
+        
+        assert a.estimate() == pytest.approx(15_000, rel=0.03)
+    
+    def test_merge_precision_mismatch(self):
+        with pytest.raises(ValueError):
+            HyperLogLog(10).merge(HyperLogLog(12))
+
+
+class TestSketchAggregates:
+    """Test the approximate aggregates registered on a connection."""
+    
+    def setup_method(self):
+        self.conn = sqlite3.connect(':memory:')
+        register_aggregates(self.conn)
+        self.cursor = self.conn.cursor()
+        self.cursor.execute("CREATE TABLE data (grp TEXT, x)")
+        rows = [("a", i % 1000) for i in range(20_000)] + [("b", 1), ("b", 2), ("b", None)]
+        self.cursor.executemany("INSERT INTO data VALUES (?, ?)", rows)
+    
+    def query(self, expr):
+        self.cursor.execute(f"SELECT grp, {expr} FROM data GROUP BY grp ORDER BY grp")
+        return self.cursor.fetchall()
+    
+    def test_approx_percentile(self):
+        (_, a), (_, b) = self.query("approx_percentile(x, 90)")
+        
+        assert a == pytest.approx(900, abs=20)
+        assert b == pytest.approx(1.9)
+    
+    def test_approx_count_distinct(self):
+        (_, a), (_, b) = self.query("approx_count_distinct(x)")
+        
+        assert a == pytest.approx(1000, rel=0.03)
+        assert b == 2
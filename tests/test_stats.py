@@ -0,0 +1,59 @@
+import math
+import pytest
+from uplt.stats import (
+    moments_to_mean_var,
+    regularized_incomplete_beta,
+    student_t_two_sided_p,
+    student_t_quantile,
+    welch_test,
+)
+
+
+def moments(values):
+    return len(values), sum(values), sum(v * v for v in values)
+
+
+class TestDistributions:
+    def test_incomplete_beta_bounds(self):
+        assert regularized_incomplete_beta(0.0, 2, 3) == 0.0
+        assert regularized_incomplete_beta(1.0, 2, 3) == 1.0
+        # I_x(1, 1) is the uniform CDF
+        assert regularized_incomplete_beta(0.3, 1, 1) == pytest.approx(0.3)
+    
+    def test_t_p_value(self):
+        # Reference values from standard t tables
+        assert student_t_two_sided_p(2.0, 10) == pytest.approx(0.07339, abs=1e-4)
+        assert student_t_two_sided_p(0.0, 5) == pytest.approx(1.0)
+    
+    def test_t_quantile(self):
+        assert student_t_quantile(0.95, 10) == pytest.approx(2.2281, abs=1e-3)
+        assert student_t_quantile(0.99, 3) == pytest.approx(5.8409, abs=1e-3)
+        # Large df approaches the normal distribution
+        assert student_t_quantile(0.95, 1e6) == pytest.approx(1.96, abs=1e-3)
+
+
+class TestWelchTest:
+    def test_mean_and_variance(self):
+        mean, var = moments_to_mean_var(*moments([1, 2, 3, 4]))
+        assert mean == 2.5
+        assert var == pytest.approx(5 / 3)
+    
+    def test_significant_difference(self):
+        result = welch_test(moments([10, 12, 11, 13, 9]), moments([15, 14, 16, 17, 15]))
+        assert result.diff == pytest.approx(4.4)
+        assert result.t == pytest.approx(5.0471, abs=1e-3)
+        assert result.p_value == pytest.approx(0.001323, abs=1e-5)
+        assert result.half_width == pytest.approx(2.0458, abs=1e-3)
+    
+    def test_no_difference(self):
+        result = welch_test(moments([10, 20]), moments([11, 19]))
+        assert result.diff == 0
+        assert result.p_value == pytest.approx(1.0)
+    
+    def test_too_few_samples(self):
+        assert welch_test(moments([10]), moments([11, 12])) is None
+    
+    def test_zero_variance(self):
+        result = welch_test(moments([5, 5]), moments([6, 6]))
+        assert result.p_value == 0.0
+        assert math.isinf(result.t)
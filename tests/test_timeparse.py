@@ -0,0 +1,153 @@
+import calendar
+import sqlite3
+
+import pytest
+
+from uplt.aggregates import register_aggregates
+from uplt.core import create_table_from_csv
+from uplt.timeparse import (
+    convert_time_literals,
+    convert_timestamp_columns,
+    create_time_scale,
+    display_expression,
+    parse_timestamp,
+    parse_width,
+    time_bucket,
+    time_label_format,
+)
+
+
+class TestParseTimestamp:
+    @pytest.mark.parametrize("text, expected", [
+        ("2025-05-26T13:11:48Z", calendar.timegm((2025, 5, 26, 13, 11, 48))),
+        ("2025-05-26 13:11:48", calendar.timegm((2025, 5, 26, 13, 11, 48))),
+        ("2025-05-26T13:11", calendar.timegm((2025, 5, 26, 13, 11, 0))),
+        ("2025-05-26", calendar.timegm((2025, 5, 26, 0, 0, 0))),
+        ("2025-05-26T15:11:48+02:00", calendar.timegm((2025, 5, 26, 13, 11, 48))),
+        ("2025-05-26T08:41:48-0430", calendar.timegm((2025, 5, 26, 13, 11, 48))),
+        ("1969-12-31T23:59:59Z", -1),
+        ("2024-02-29", calendar.timegm((2024, 2, 29, 0, 0, 0))),
+    ])
+    def test_valid(self, text, expected):
+        assert parse_timestamp(text) == expected
+
+    def test_fraction(self):
+        assert parse_timestamp("1970-01-01T00:00:01.25Z") == 1.25
+
+    @pytest.mark.parametrize("text", [
+        "2025-13-01", "2025-02-30", "2023-02-29", "2025-05-26T24:00:00", "20250526", "abc", "12",
+    ])
+    def test_invalid(self, text):
+        assert parse_timestamp(text) is None
+
+    def test_days_match_calendar(self):
+        for year in (1900, 1970, 2000, 2024, 2100):
+            for month in range(1, 13):
+                assert parse_timestamp(f"{year}-{month:02d}-01") == calendar.timegm((year, month, 1, 0, 0, 0))
+
+
+class TestTimeBucket:
+    @pytest.mark.parametrize("width, seconds", [
+        ("30s", 30), ("5m", 300), ("1h", 3600), ("1d", 86400), ("2w", 1209600), ("90", 90), (60, 60),
+    ])
+    def test_widths(self, width, seconds):
+        assert parse_width(width) == seconds
+
+    @pytest.mark.parametrize("width", ["0m", "5y", "m", "-5m"])
+    def test_invalid_width(self, width):
+        with pytest.raises(ValueError):
+            parse_width(width)
+
+    def test_buckets(self):
+        assert time_bucket('5m', 1748265108) == 1748265000
+        assert time_bucket('5m', 1748265108.9) == 1748265000
+        assert time_bucket('1d', "2025-05-26T13:11:48Z") == calendar.timegm((2025, 5, 26, 0, 0, 0))
+        assert time_bucket('1m', "125") == 120
+        assert time_bucket('1m', -1) == -60
+        assert time_bucket('1m', None) is None
+        assert time_bucket('1m', "not a time") is None
+
+    def test_registered_on_connections(self):
+        conn = sqlite3.connect(':memory:')
+        register_aggregates(conn)
+        assert conn.execute("SELECT time_bucket('1h', '2025-05-26T13:11:48Z')").fetchone() == (1748264400,)
+        assert conn.execute("SELECT epoch('2025-05-26'), epoch(5), epoch('abc')").fetchone() == \
+            (1748217600, 5, None)
+
+
+class TestEpochStorage:
+    def test_convert_columns(self):
+        rows = [["2025-05-26T13:11:48Z", "2025-05-26", "x", "2025-05-26T00:00:00.5Z"],
+                ["", "2025-05-27", "2025-05-26", "2025-05-26T00:00:01Z"]]
+        types = ["TEXT", "TEXT", "TEXT", "TEXT"]
+        formats = convert_timestamp_columns(rows, types)
+        assert types == ["INTEGER", "INTEGER", "TEXT", "REAL"]
+        assert formats == {0: '%Y-%m-%dT%H:%M:%SZ', 1: '%Y-%m-%d', 3: '%Y-%m-%dT%H:%M:%fZ'}
+        assert rows[0][0] == 1748265108 and rows[1][0] is None
+        assert rows[1][1] == 1748304000
+        assert rows[0][3] == 1748217600.5
+
+    def test_table_and_text_view(self):
+        conn = sqlite3.connect(':memory:')
+        cursor = conn.cursor()
+        timestamps = {}
+        csv_data = "day,test_time,name\n2025-05-26,2025-05-26T13:11:48Z,a\n2025-05-27,2025-05-26T15:00:00+02:00,b"
+        create_table_from_csv(cursor, csv_data, 'data', 'yes', timestamps)
+        assert timestamps == {'day': '%Y-%m-%d', 'test_time': '%Y-%m-%dT%H:%M:%SZ'}
+        assert cursor.execute("SELECT typeof(day), typeof(test_time) FROM data").fetchall() == \
+            [('integer', 'integer')] * 2
+        assert cursor.execute("SELECT * FROM data_text").fetchall() == [
+            ('2025-05-26', '2025-05-26T13:11:48Z', 'a'),
+            ('2025-05-27', '2025-05-26T13:00:00Z', 'b'),
+        ]
+
+    def test_without_timestamps_columns_stay_text(self):
+        conn = sqlite3.connect(':memory:')
+        cursor = conn.cursor()
+        create_table_from_csv(cursor, "t\n2025-05-26T13:11:48Z", 'data', 'yes')
+        assert cursor.execute("SELECT typeof(t) FROM data").fetchone() == ('text',)
+
+    def test_display_expression(self):
+        timestamps = {'day': '%Y-%m-%d'}
+        assert display_expression("DAY", timestamps) == "strftime('%Y-%m-%d', DAY, 'unixepoch')"
+        assert display_expression("time_bucket('1h', t)") == \
+            "strftime('%Y-%m-%dT%H:%M:%SZ', time_bucket('1h', t), 'unixepoch')"
+        assert display_expression("latency", timestamps) is None
+
+
+class TestTimeLiterals:
+    TIMESTAMPS = {'ts': '%Y-%m-%dT%H:%M:%SZ'}
+
+    @pytest.mark.parametrize("expr, expected", [
+        ("ts > '2025-05-26T12:00:00Z'", "ts > 1748260800"),
+        ("'2025-05-26' <= TS and name = '2025-05-26'", "1748217600 <= TS and name = '2025-05-26'"),
+        ("ts between '2025-05-26' and '2025-05-27'", "ts between 1748217600 and 1748304000"),
+        ('"ts"<>\'2025-05-26\'', '"ts"<>1748217600'),
+    ])
+    def test_converted(self, expr, expected):
+        assert convert_time_literals(expr, self.TIMESTAMPS) == expected
+
+    @pytest.mark.parametrize("expr", [
+        "ts = 'abc'", "tsx > '2025-05-26'", "t.ts2 > '2025-05-26'", "value > 1",
+    ])
+    def test_unchanged(self, expr):
+        assert convert_time_literals(expr, self.TIMESTAMPS) == expr
+
+    def test_without_timestamps(self):
+        assert convert_time_literals("ts > '2025-05-26'", None) == "ts > '2025-05-26'"
+
+
+class TestTimeScale:
+    def test_steps_are_whole_units(self):
+        start = 1748265108
+        assert create_time_scale(start, start + 4 * 3600, 20)[1:3] == [1748264400 + 900, 1748264400 + 1800]
+        scale = create_time_scale(start, start + 30 * 86400, 10)
+        assert scale[1] - scale[0] == 604800
+        assert scale[0] % 86400 == 0
+
+    def test_label_formats(self):
+        day = 1748217600
+        assert time_label_format([day, day + 900, day + 1800]) == '%H:%M'
+        assert time_label_format([day, day + 43200, day + 86400 * 2]) == '%m-%d %H:%M'
+        assert time_label_format([day, day + 86400]) == '%m-%d'
+        assert time_label_format([day, day + 30]) == '%H:%M:%S'
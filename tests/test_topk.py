@@ -0,0 +1,66 @@
+import random
+
+from uplt.topk import SpaceSaving, exact_counts, heavy_hitters, sqlite_sort_key, top_rows_per_group
+
+
+class TestTopRowsPerGroup:
+    """Test bounded top-K selection per group."""
+    
+    def test_largest_per_group(self):
+        rows = [("A", 10, "t1"), ("B", 5, "t2"), ("A", 30, "t3"), ("A", 20, "t4"), ("B", 7, "t5")]
+        result = list(top_rows_per_group(rows, 1, 2))
+        
+        assert [(group, rank, row[2]) for group, rank, row in result] == [
+            (("A",), 1, "t3"), (("A",), 2, "t4"), (("B",), 1, "t5"), (("B",), 2, "t2"),
+        ]
+    
+    def test_smallest_and_ties(self):
+        rows = [("A", 1, "first"), ("A", 1, "second"), ("A", 0, "zero"), ("A", None, "null")]
+        result = [row[2] for _, _, row in top_rows_per_group(rows, 1, 2, largest=False)]
+        
+        assert result == ["zero", "first"]
+    
+    def test_matches_sorting(self):
+        rng = random.Random(2)
+        rows = [(rng.randrange(20), rng.random(), i) for i in range(5000)]
+        result = list(top_rows_per_group(rows, 1, 3))
+        
+        for group in range(20):
+            expected = sorted((r for r in rows if r[0] == group), key=lambda r: -r[1])[:3]
+            assert [row for (g,), _, row in result if g == group] == expected
+    
+    def test_mixed_types_sort_like_sqlite(self):
+        values = ["b", 2.5, None, 1, "a"]
+        assert sorted(values, key=sqlite_sort_key) == [None, 1, 2.5, "a", "b"]
+
+
+class TestSpaceSaving:
+    """Test Space-Saving heavy hitters."""
+    
+    def test_exact_when_counters_suffice(self):
+        summary = heavy_hitters("abracadabra", 2)
+        
+        assert summary.top(3) == [("a", 5, 0), ("b", 2, 0), ("r", 2, 0)]
+        assert summary.total == 11
+    
+    def test_error_bounds_hold(self):
+        rng = random.Random(3)
+        # Zipf-like stream with a long tail of rare values
+        stream = [str(int(rng.paretovariate(1.0))) for _ in range(20000)]
+        truth = exact_counts(stream, set(stream))
+        summary = SpaceSaving(50)
+        for value in stream:
+            summary.update(value)
+        
+        assert len(summary.counts) == 50
+        for value, count, error in summary.top(50):
+            assert count - error <= truth[value] <= count
+        # Every value above total / capacity is tracked
+        frequent = {v for v, c in truth.items() if c > len(stream) / 50}
+        assert frequent <= set(summary.counts)
+        # The true top values are reported in order
+        expected = sorted(truth, key=lambda v: -truth[v])[:3]
+        assert [value for value, _, _ in summary.top(3)] == expected
+    
+    def test_exact_counts_only_candidates(self):
+        assert exact_counts(["a", "b", "a", "c"], ["a", "c", "z"]) == {"a": 2, "c": 1, "z": 0}